@@ -0,0 +1,47 @@
+from contextvars import ContextVar
+from fastapi import APIRouter, Response
+from fastapi.routing import APIRoute
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from utils.metrics import observe_stage
+import time
+
+# perf_counter() when the route handler of the current request started, before the body was parsed
+_request_started = ContextVar("request_started", default=None)
+
+class TimedRoute(APIRoute):
+    """
+    Route that remembers when its handler started, so the endpoint can observe how long
+    reading and validating the request body took before it was called.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            _request_started.set(time.perf_counter())
+            return await handler(request)
+
+        return timed_handler
+
+def observe_parse_stage():
+    """
+    Records the time elapsed since the route handler started as the "parse" stage.
+    Called first thing in endpoints served by a TimedRoute, it covers reading the body,
+    decoding the JSON and validating it with Pydantic.
+    """
+    started = _request_started.get()
+    if started is not None:
+        observe_stage("parse", time.perf_counter() - started)
+
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Endpoint exposing the metrics of this worker in the Prometheus text format.
+
+    Returns:
+        Response: Latency histograms per request stage, verdict counters, matrix sizes,
+                  database connection wait times and cache hit ratios.
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -1,48 +1,385 @@
-from fastapi import APIRouter, HTTPException
-from schemas.dna import DnaRequest, DnaResponse
-from services.mutant_service import check_if_mutant
-from repositories.dna_repository import save_dna
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from schemas.dna import DnaRequest, DnaResponse, DnaBatchRequest, DnaBatchResponse, DnaBatchItemResponse, DnaRowsResponse
+from services.mutant_service import check_if_mutant, StreamingDetector
+from services.executor_service import run_detection, run_blocking
+from services.verdict_cache import verdict_cache
+from services.stats_service import stats_cache
+from repositories.dna_repository import save_dna, save_dna_batch
+from repositories import async_dna_repository
+from db.database import DB_DRIVER
+from utils.dna_codec import DnaMatrix, encode_dna, encode_verdict
+from utils.metrics import time_stage, record_verdict
+from api.metrics import TimedRoute, observe_parse_stage
+from datetime import datetime
+import asyncio
+import json
+import os
 import uuid
 
-router = APIRouter()
+# Number of NDJSON samples classified and saved together by /mutant/stream
+NDJSON_CHUNK_SIZE = int(os.getenv("NDJSON_CHUNK_SIZE", 500))
+# Longest NDJSON line accepted by /mutant/stream, which bounds the memory used per line
+NDJSON_MAX_LINE_BYTES = int(os.getenv("NDJSON_MAX_LINE_BYTES", 16 * 1024 * 1024))
+# Matrices with more bases are described by their size and first bases in response details
+DETAIL_MAX_BASES = int(os.getenv("DETAIL_MAX_BASES", 100))
 
-@router.post("/mutant", response_model=DnaResponse)
-async def is_mutant(dna_request: DnaRequest):
+BINARY_MEDIA_TYPE = "application/octet-stream"
+
+# /mutant reads its body itself, so both accepted bodies are documented here
+MUTANT_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": {"$ref": "#/components/schemas/DnaRequest"}},
+            BINARY_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+        }
+    }
+}
+
+# Routes remember when their handler started, to time the parsing of request bodies
+router = APIRouter(route_class=TimedRoute)
+
+async def _read_dna(request):
+    """
+    Reads the DNA matrix of a /mutant request, sent as a JSON DnaRequest or as a binary body.
+
+    Args:
+        request (Request): The incoming request.
+
+    Raises:
+        RequestValidationError: Raised with 422 if the JSON body is not a valid DnaRequest.
+        HTTPException: Raised with 422 if the binary body is not a valid matrix.
+
+    Returns:
+        DnaMatrix: The validated matrix.
+    """
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith(BINARY_MEDIA_TYPE):
+        try:
+            return DnaMatrix.from_wire(body)
+        except ValueError as error:
+            raise HTTPException(status_code=422, detail=str(error))
+    try:
+        return DnaRequest.model_validate_json(body).dna
+    except ValidationError as error:
+        # Located under "body", as FastAPI reports errors of the bodies it validates itself
+        raise RequestValidationError([{**item, "loc": ("body", *item["loc"])} for item in error.errors(include_url=False)])
+
+def describe_dna(dna):
+    """
+    Describes a DNA matrix in response details, echoing the bases of small matrices only.
+
+    Args:
+        dna (DnaMatrix): The DNA matrix.
+
+    Returns:
+        str: "The DNA sequence '<bases>'", or its size and first DETAIL_MAX_BASES bases when it is larger.
+    """
+    if dna.n * dna.n <= DETAIL_MAX_BASES:
+        return f"The DNA sequence '{dna.text}'"
+    return f"The {dna.n}x{dna.n} DNA sequence '{dna.data[:DETAIL_MAX_BASES].decode('ascii')}...'"
+
+@router.post("/mutant", response_model=DnaResponse, openapi_extra=MUTANT_REQUEST_BODY)
+async def is_mutant(request: Request):
     """
     Endpoint to determine if a given DNA sequence belongs to a mutant.
 
+    The matrix is sent as a JSON DnaRequest or, with Content-Type application/octet-stream, in the
+    binary format read by DnaMatrix.from_wire, which is decoded without a string per row. Clients
+    that accept application/octet-stream get the compact result of encode_verdict, with the same
+    status codes, instead of JSON.
+
     Args:
-        dna_request (DnaRequest): The DNA sequence data for verification.
+        request (Request): The incoming request with the DNA sequence data for verification.
 
     Raises:
         HTTPException: Raised if the DNA sequence is already recorded as mutant or human.
         HTTPException: Raised if the DNA sequence is identified as a new human.
+        HTTPException: Raised with 422 if the DNA matrix is not valid.
 
     Returns:
         DnaResponse: The response indicating mutant status if newly identified as mutant.
     """
+    dna = await _read_dna(request)
+    observe_parse_stage()
+
     # Generate a random ID for the record
     record_id = str(uuid.uuid4())
 
-    # Normalize the DNA sequence as a single string
-    dna_sequence_str = "".join(dna_request.dna)
+    # Its storage form and digest, which also keys the verdict cache, come without encoding it again
+    with time_stage("encode"):
+        encoded = encode_dna(dna)
+    digest = encoded.digest
 
-    # Check if the DNA belongs to a mutant
-    is_mutant = check_if_mutant(dna_request.dna)
+    # Repeated submissions are answered from the cache without detection or database work
+    cached = verdict_cache.get(digest)
+    if cached:
+        save_result = {"exists": True, **cached}
+    else:
+        # Check if the DNA belongs to a mutant, in a worker process for large matrices
+        with time_stage("detect"):
+            is_mutant = await run_detection(check_if_mutant, dna)
+
+        # Save the record and get the response status without blocking the event loop
+        stats_generation = stats_cache.generation()
+        with time_stage("db_save"):
+            if DB_DRIVER == "asyncpg":
+                save_result = await async_dna_repository.save_dna(record_id, encoded, is_mutant)
+            else:
+                save_result = await run_blocking(save_dna, record_id, encoded, is_mutant)
+        verdict_cache.put(digest, save_result["is_mutant"], save_result["record_id"])
+        if not save_result["exists"]:
+            stats_cache.apply_delta(datetime.now().date(), save_result["is_mutant"], stats_generation)
+    record_verdict(save_result["is_mutant"], save_result["exists"], len(dna))
+
+    if BINARY_MEDIA_TYPE in request.headers.get("accept", ""):
+        # Same status codes as the JSON responses, without the detail
+        status_code = 200 if save_result["is_mutant"] and not save_result["exists"] else 403
+        return Response(
+            encode_verdict(save_result["is_mutant"], save_result["exists"], save_result["record_id"]),
+            status_code=status_code,
+            media_type=BINARY_MEDIA_TYPE
+        )
+
+    # Only small matrices are echoed whole, the detail of a large one stays short
+    with time_stage("join"):
+        dna_description = describe_dna(dna)
 
-    # Save the record and get the response status
-    save_result = save_dna(record_id, dna_sequence_str, is_mutant)
-    
     if save_result["exists"] == True:
         # If the sequence already exists, raise a 403 error specifying if it belongs to a human or mutant
         if save_result["is_mutant"]:
-            raise HTTPException(status_code=403, detail=f"The DNA sequence '{dna_sequence_str}' is already recorded as mutant.")
+            raise HTTPException(status_code=403, detail=f"{dna_description} is already recorded as mutant.")
         else:
-            raise HTTPException(status_code=403, detail=f"The DNA sequence '{dna_sequence_str}' is already recorded as human.")
-    
-    if is_mutant:
+            raise HTTPException(status_code=403, detail=f"{dna_description} is already recorded as human.")
+
+    if save_result["is_mutant"]:
         # If it is a new mutant, save to the database and respond with 200, specifying it as a new mutant
-        return DnaResponse(status="mutant", record_id=save_result["record_id"], detail=f"The DNA sequence '{dna_sequence_str}' is identified as a new mutant.")
+        return DnaResponse(status="mutant", record_id=save_result["record_id"], detail=f"{dna_description} is identified as a new mutant.")
     else:
         # If it is a new human, save to the database and raise a 403 error specifying it as a new human
-        raise HTTPException(status_code=403, detail=f"The DNA sequence '{dna_sequence_str}' is identified as a new human.")
\ No newline at end of file
+        raise HTTPException(status_code=403, detail=f"{dna_description} is identified as a new human.")
+
+async def classify_and_save(dna_sequences):
+    """
+    Classifies and records several DNA sequences, answering repeated ones from the verdict cache.
+
+    Args:
+        dna_sequences (list): DNA matrices, each a DnaMatrix or a list of strings.
+
+    Returns:
+        list: One dictionary per sequence, in input order, with the keys returned by save_dna.
+    """
+    # Answer repeated samples from the cache and keep the others for detection
+    encoded = [encode_dna(dna) for dna in dna_sequences]
+    digests = [item.digest for item in encoded]
+    save_results = [verdict_cache.get(digest) for digest in digests]
+    pending = [index for index, cached in enumerate(save_results) if cached is None]
+    for index, cached in enumerate(save_results):
+        if cached is not None:
+            save_results[index] = {"exists": True, **cached}
+
+    if pending:
+        # Classify the remaining samples, large ones concurrently in worker processes
+        with time_stage("detect"):
+            verdicts = await asyncio.gather(*(run_detection(check_if_mutant, dna_sequences[index]) for index in pending))
+
+        # Assign each sample a random ID and save them all with a single upsert
+        records = [(str(uuid.uuid4()), encoded[index], is_mutant) for index, is_mutant in zip(pending, verdicts)]
+        stats_generation = stats_cache.generation()
+        with time_stage("db_save"):
+            if DB_DRIVER == "asyncpg":
+                saved = await async_dna_repository.save_dna_batch(records)
+            else:
+                saved = await run_blocking(save_dna_batch, records)
+        for index, save_result in zip(pending, saved):
+            save_results[index] = save_result
+            verdict_cache.put(digests[index], save_result["is_mutant"], save_result["record_id"])
+            if not save_result["exists"]:
+                stats_cache.apply_delta(datetime.now().date(), save_result["is_mutant"], stats_generation)
+
+    for dna, save_result in zip(dna_sequences, save_results):
+        record_verdict(save_result["is_mutant"], save_result["exists"], len(dna))
+    return save_results
+
+@router.post("/mutant/batch", response_model=DnaBatchResponse)
+async def is_mutant_batch(batch_request: DnaBatchRequest):
+    """
+    Endpoint to classify and record several DNA sequences in a single request.
+
+    Unlike /mutant, humans and already recorded sequences do not raise errors: every sample
+    gets its own status, record_id and exists flag in the response.
+
+    Args:
+        batch_request (DnaBatchRequest): The DNA samples to verify.
+
+    Returns:
+        DnaBatchResponse: One result per sample, in request order.
+    """
+    save_results = await classify_and_save([sample.dna for sample in batch_request.samples])
+
+    return DnaBatchResponse(results=[
+        DnaBatchItemResponse(
+            status="mutant" if save_result["is_mutant"] else "human",
+            record_id=save_result["record_id"],
+            exists=save_result["exists"]
+        )
+        for save_result in save_results
+    ])
+
+class NdjsonStreamingResponse(StreamingResponse):
+    """
+    Streaming response that can keep reading the request body while it is being sent.
+
+    StreamingResponse normally listens for the client disconnecting, which consumes the request
+    body; here the body is consumed by the response generator itself.
+    """
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+async def _read_ndjson_lines(body):
+    """
+    Splits a streamed request body into lines without holding more than one line in memory.
+
+    Args:
+        body (AsyncIterator[bytes]): The request body chunks.
+
+    Raises:
+        ValueError: Raised if a line is longer than NDJSON_MAX_LINE_BYTES.
+
+    Yields:
+        bytes: Every non-empty line of the body.
+    """
+    parts = []
+    size = 0
+    async for chunk in body:
+        start = 0
+        end = chunk.find(b"\n")
+        while end >= 0:
+            parts.append(chunk[start:end])
+            line = b"".join(parts)
+            parts, size = [], 0
+            if line.strip():
+                yield line
+            start = end + 1
+            end = chunk.find(b"\n", start)
+        if start < len(chunk):
+            parts.append(chunk[start:])
+            size += len(chunk) - start
+            if size > NDJSON_MAX_LINE_BYTES:
+                raise ValueError(f"NDJSON line longer than {NDJSON_MAX_LINE_BYTES} bytes")
+    line = b"".join(parts)
+    if line.strip():
+        yield line
+
+async def _classify_ndjson(body):
+    """
+    Classifies and records the DnaRequest objects of an NDJSON body in chunks of NDJSON_CHUNK_SIZE.
+
+    A chunk is saved before more of the body is read, so a slow database slows the upload down
+    instead of growing memory.
+
+    Args:
+        body (AsyncIterator[bytes]): The request body chunks.
+
+    Yields:
+        bytes: One NDJSON result line per input line, in input order.
+    """
+    async def flush(chunk):
+        valid = [item for item in chunk if isinstance(item, DnaRequest)]
+        save_results = iter(await classify_and_save([item.dna for item in valid]) if valid else [])
+        lines = []
+        for item in chunk:
+            if isinstance(item, DnaRequest):
+                save_result = next(save_results)
+                result = DnaBatchItemResponse(
+                    status="mutant" if save_result["is_mutant"] else "human",
+                    record_id=save_result["record_id"],
+                    exists=save_result["exists"]
+                ).model_dump()
+            else:
+                result = {"error": item}
+            lines.append(json.dumps(result) + "\n")
+        return "".join(lines).encode("utf-8")
+
+    chunk = []
+    lines = _read_ndjson_lines(body)
+    while True:
+        # Only errors of the line reader end the body, those of classify_and_save propagate
+        try:
+            line = await anext(lines)
+        except StopAsyncIteration:
+            break
+        except ValueError as error:
+            chunk.append(str(error))
+            break
+        try:
+            chunk.append(DnaRequest.model_validate_json(line))
+        except ValidationError as error:
+            chunk.append(json.loads(error.json(include_url=False, include_input=False)))
+        if len(chunk) >= NDJSON_CHUNK_SIZE:
+            yield await flush(chunk)
+            chunk = []
+    if chunk:
+        yield await flush(chunk)
+
+@router.post("/mutant/stream", response_class=NdjsonStreamingResponse)
+async def is_mutant_stream(request: Request):
+    """
+    Endpoint to classify and record a streamed NDJSON body of DnaRequest objects.
+
+    The body is read, classified and saved in chunks of NDJSON_CHUNK_SIZE samples, and one result
+    line is streamed back per input line, so memory stays constant however large the upload is.
+    Lines that are not valid DnaRequest objects get an {"error": [...]} line instead of a result,
+    with the validation errors in the format of a 422 response, and a line over NDJSON_MAX_LINE_BYTES
+    ends the body with an {"error": "..."} message.
+
+    Args:
+        request (Request): The incoming request, whose body is read as a stream.
+
+    Returns:
+        NdjsonStreamingResponse: NDJSON lines with status, record_id and exists for every sample.
+    """
+    return NdjsonStreamingResponse(_classify_ndjson(request.stream()))
+
+@router.post("/mutant/rows", response_model=DnaRowsResponse)
+async def is_mutant_rows(request: Request):
+    """
+    Endpoint to determine if a very large DNA matrix belongs to a mutant, streamed as one row per line.
+
+    The body is read as a stream and fed row by row to a StreamingDetector, which keeps only the
+    last rows, so memory grows with the side of the matrix instead of its area. Reading stops as
+    soon as two sequences are found. The matrix is never held whole, so it is not recorded and
+    does not count in /stats.
+
+    Args:
+        request (Request): The incoming request, whose body is read as a stream of rows.
+
+    Raises:
+        HTTPException: Raised with 422 if the matrix is not square or has characters other than A/T/C/G.
+        HTTPException: Raised with 403 if the DNA sequence is identified as human.
+
+    Returns:
+        DnaRowsResponse: The response indicating mutant status and the rows read to find it.
+    """
+    detector = StreamingDetector(strict=True)
+    try:
+        with time_stage("detect"):
+            async for line in _read_ndjson_lines(request.stream()):
+                if detector.feed(line.strip()):
+                    break
+            is_mutant = detector.is_mutant or detector.finish()
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+    if detector.n is None:
+        raise HTTPException(status_code=422, detail="The DNA matrix must have at least one row")
+
+    if not is_mutant:
+        raise HTTPException(status_code=403, detail=f"The {detector.n}x{detector.n} DNA matrix is identified as human.")
+    return DnaRowsResponse(status="mutant", rows_read=detector.rows_read)
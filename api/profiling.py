@@ -0,0 +1,161 @@
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import tempfile
+import threading
+import time
+import uuid
+from utils.metrics import start_timeline, stop_timeline
+
+# Profiling is only installed when enabled and a secret is set, otherwise requests never reach it
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+# Value the X-Profile request header must carry for the request to be profiled
+PROFILING_SECRET = os.getenv("PROFILING_SECRET", "")
+# Directory where the profile of every profiled request is written
+PROFILING_DUMP_DIR = os.getenv("PROFILING_DUMP_DIR", os.path.join(tempfile.gettempdir(), "x-men-profiles"))
+# Number of functions listed in the text report
+PROFILING_TOP = int(os.getenv("PROFILING_TOP", 40))
+
+PROFILE_HEADER = b"x-profile"
+
+# Stages reported as detection and database time in the timeline summary; db_query is
+# left out as it runs within db_save
+DETECTION_STAGES = ("detect",)
+DATABASE_STAGES = ("db_save", "db_read")
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles the requests carrying the X-Profile header with the profiling secret.
+
+    A profiled request gets X-Profile-Id and Server-Timing response headers with its stage timeline,
+    and leaves two files in the dump directory: <id>.prof, loadable with pstats or snakeviz, and
+    <id>.txt with the timeline of detection versus database time and the top functions by
+    cumulative time. The response body is unchanged.
+
+    cProfile follows the event loop thread, so concurrent requests served while a profiled request
+    awaits can appear in its profile; only one request is profiled at a time, others carrying the
+    header get "X-Profile: busy" and are served normally. Work run in the database threads shows
+    up in the timeline but not in the cProfile breakdown.
+    """
+
+    def __init__(self, app, secret=PROFILING_SECRET, dump_dir=PROFILING_DUMP_DIR, top=PROFILING_TOP):
+        self.app = app
+        self.secret = secret.encode()
+        self.dump_dir = dump_dir
+        self.top = top
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = next((value for name, value in scope["headers"] if name == PROFILE_HEADER), None)
+        if token is None or not hmac.compare_digest(token, self.secret):
+            return await self.app(scope, receive, send)
+        if not self._busy.acquire(blocking=False):
+            return await self.app(scope, receive, _with_headers(send, [(b"x-profile", b"busy")]))
+        try:
+            await self._profile(scope, receive, send)
+        finally:
+            self._busy.release()
+
+    async def _profile(self, scope, receive, send):
+        """
+        Serves one request under cProfile while recording its stage timeline, then writes the dumps.
+        """
+        profile_id = uuid.uuid4().hex
+        timeline, timeline_token = start_timeline()
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                # The endpoint has returned by now, so the timeline is complete
+                elapsed = time.perf_counter() - started
+                message = {**message, "headers": list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile_id.encode()),
+                    (b"server-timing", server_timing(timeline, elapsed).encode()),
+                ]}
+            await send(message)
+
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            profiler.disable()
+            stop_timeline(timeline_token)
+            elapsed = time.perf_counter() - started
+            self._dump(profile_id, scope, profiler, timeline, started, elapsed)
+
+    def _dump(self, profile_id, scope, profiler, timeline, started, elapsed):
+        """
+        Writes the binary profile and the text report of a profiled request.
+        """
+        os.makedirs(self.dump_dir, exist_ok=True)
+        profiler.dump_stats(os.path.join(self.dump_dir, f"{profile_id}.prof"))
+        stats_output = io.StringIO()
+        pstats.Stats(profiler, stream=stats_output).sort_stats("cumulative").print_stats(self.top)
+        with open(os.path.join(self.dump_dir, f"{profile_id}.txt"), "w", encoding="utf-8") as file:
+            file.write(f"{scope['method']} {scope['path']}\n\n")
+            file.write(format_timeline(timeline, started, elapsed))
+            file.write("\n")
+            file.write(stats_output.getvalue())
+
+def _with_headers(send, headers):
+    """
+    Wraps an ASGI send callable to add headers to the response.
+    """
+    async def send_with_headers(message):
+        if message["type"] == "http.response.start":
+            message = {**message, "headers": list(message.get("headers", [])) + headers}
+        await send(message)
+    return send_with_headers
+
+def _stage_totals(timeline):
+    """
+    Adds up the seconds spent in each stage, in the order the stages first appear.
+    """
+    totals = {}
+    for stage, _, seconds in timeline:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return totals
+
+def server_timing(timeline, elapsed):
+    """
+    Builds a Server-Timing header value from a stage timeline.
+
+    Args:
+        timeline (list): (stage, start, seconds) tuples recorded by the stage timers.
+        elapsed (float): Seconds the whole request took.
+
+    Returns:
+        str: The stages and the total, with their durations in milliseconds.
+    """
+    totals = _stage_totals(timeline)
+    totals["total"] = elapsed
+    return ", ".join(f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in totals.items())
+
+def format_timeline(timeline, started, elapsed):
+    """
+    Formats a stage timeline as a text report of detection versus database time.
+
+    Args:
+        timeline (list): (stage, start, seconds) tuples recorded by the stage timers.
+        started (float): perf_counter() when the request started.
+        elapsed (float): Seconds the whole request took.
+
+    Returns:
+        str: One line per stage with its offset and duration, followed by the totals.
+    """
+    lines = ["Timeline (ms from the start of the request):"]
+    for stage, start, seconds in sorted(timeline, key=lambda entry: entry[1]):
+        lines.append(f"  {(start - started) * 1000:>10.3f}  {seconds * 1000:>10.3f}  {stage}")
+    totals = _stage_totals(timeline)
+    detection = sum(totals.get(stage, 0.0) for stage in DETECTION_STAGES)
+    database = sum(totals.get(stage, 0.0) for stage in DATABASE_STAGES)
+    lines.append(
+        f"Total {elapsed * 1000:.3f} ms: detection {detection * 1000:.3f} ms, "
+        f"database {database * 1000:.3f} ms, other {(elapsed - detection - database) * 1000:.3f} ms"
+    )
+    return "\n".join(lines) + "\n"
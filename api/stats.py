@@ -1,16 +1,36 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 from schemas.stats import StatsResponse
-from services.stats_service import get_stats
+from services.stats_service import get_stats, get_stats_async, stats_cache
+from services.executor_service import run_blocking
+from db.database import DB_DRIVER
+from utils.metrics import time_stage
 
 router = APIRouter()
 
 @router.get("/stats", response_model=StatsResponse)
-async def stats():
+async def stats(response: Response, refresh: bool = False):
     """
     Endpoint to retrieve statistics on recorded DNA sequences.
 
+    The statistics are served from a short-lived cache. The "Age" response header tells how many
+    seconds ago they were read from the database, and "?refresh=true" forces a fresh read.
+
+    Args:
+        response (Response): The outgoing response, used to set the "Age" header.
+        refresh (bool): Whether to bypass the cache.
+
     Returns:
         StatsResponse: An object containing statistics including the count of mutant and human records,
                        as well as the ratio of mutants to total records.
     """
-    return get_stats()
+    with time_stage("stats"):
+        if DB_DRIVER == "asyncpg":
+            result = await get_stats_async(refresh)
+        else:
+            # The psycopg2 statistics query is blocking, so it runs in the database thread pool
+            result = await run_blocking(get_stats, refresh)
+
+    age = stats_cache.age()
+    if age is not None:
+        response.headers["Age"] = str(int(age))
+    return result
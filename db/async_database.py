@@ -0,0 +1,55 @@
+import time
+from contextlib import asynccontextmanager
+from db.database import DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT, _connection_params
+from utils.metrics import DB_CONNECTION_WAIT
+
+_async_pool = None
+
+async def init_async_pool():
+    """
+    Create the asyncpg connection pool if it does not exist yet and return it.
+
+    Raises:
+        RuntimeError: Raised if asyncpg is not installed.
+    """
+    global _async_pool
+    if _async_pool is None:
+        # Imported on first use, so deployments on the psycopg2 driver never load it
+        try:
+            import asyncpg
+        except ImportError:  # asyncpg is optional, only the "asyncpg" driver needs it
+            raise RuntimeError("The 'asyncpg' database driver requires asyncpg to be installed.") from None
+        params = _connection_params()
+        _async_pool = await asyncpg.create_pool(
+            user=params["user"],
+            password=params["password"],
+            host=params["host"],
+            port=params["port"],
+            database=params["database"],
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE
+        )
+    return _async_pool
+
+async def close_async_pool():
+    """
+    Close every connection of the asyncpg pool. Called once when the application shuts down.
+    """
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+
+@asynccontextmanager
+async def async_db_connection():
+    """
+    Borrow a connection from the asyncpg pool and give it back when the block ends.
+
+    Yields:
+        asyncpg.Connection: A pooled asyncpg connection.
+    """
+    pool = await init_async_pool()
+    started = time.perf_counter()
+    async with pool.acquire(timeout=DB_POOL_TIMEOUT) as conn:
+        DB_CONNECTION_WAIT.observe(time.perf_counter() - started)
+        yield conn
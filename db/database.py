@@ -1,14 +1,43 @@
 import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+from contextlib import contextmanager
 from dotenv import load_dotenv
+from utils.metrics import DB_CONNECTION_WAIT
+import logging
+import threading
+import time
 import os
 
 load_dotenv()
 
-def get_db_connection():
+logger = logging.getLogger(__name__)
+
+# Data access driver used by the API: "psycopg2" (thread pool) or "asyncpg" (native asyncio)
+DB_DRIVER = os.getenv("DB_DRIVER", "psycopg2")
+
+# Connection pool settings
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 1))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 10))
+# Seconds to wait for a free connection before giving up
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Run "SELECT 1" on every borrowed connection to catch connections dropped by the server
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+
+# Extra attempts to reach the database at startup, waiting DB_INIT_BACKOFF seconds before the first
+# retry and twice as long before each following one
+DB_INIT_RETRIES = int(os.getenv("DB_INIT_RETRIES", 5))
+DB_INIT_BACKOFF = float(os.getenv("DB_INIT_BACKOFF", 0.5))
+
+_pool = None
+_pool_slots = None
+_pool_lock = threading.Lock()
+
+def _connection_params():
     """
-    Establish and return a connection to the PostgreSQL database.
+    Return the PostgreSQL connection parameters read from the environment.
     """
-    return psycopg2.connect(
+    return dict(
         user=os.getenv("DB_USER"),
         password=os.getenv("DB_PASSWORD"),
         host=os.getenv("DB_HOST"),
@@ -16,19 +45,238 @@ def get_db_connection():
         database=os.getenv("DB_NAME")
     )
 
+def get_db_connection():
+    """
+    Establish and return a new, unpooled connection to the PostgreSQL database.
+    """
+    return psycopg2.connect(**_connection_params())
+
+def init_pool():
+    """
+    Create the connection pool if it does not exist yet and return it.
+    """
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadedConnectionPool(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, **_connection_params())
+            # psycopg2's pool fails instead of waiting when it is exhausted, so borrowers queue here
+            _pool_slots = threading.BoundedSemaphore(DB_POOL_MAX_SIZE)
+        return _pool
+
+def close_pool():
+    """
+    Close every pooled connection. Called once when the application shuts down.
+    """
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+            _pool_slots = None
+
+def _is_healthy(conn):
+    """
+    Check whether a pooled connection can still be used.
+    """
+    if conn.closed or conn.get_transaction_status() == extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if DB_POOL_PRE_PING:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+        except psycopg2.Error:
+            return False
+    return True
+
+@contextmanager
+def db_connection():
+    """
+    Borrow a connection from the pool and give it back when the block ends.
+
+    Broken connections are discarded instead of being returned to the pool, and any
+    transaction left open by the block is rolled back.
+
+    Raises:
+        PoolError: Raised if no connection becomes available within DB_POOL_TIMEOUT seconds, or if
+            every connection tried from the pool fails the health check.
+
+    Yields:
+        connection: A healthy psycopg2 connection.
+    """
+    pool = init_pool()
+    slots = _pool_slots
+    started = time.perf_counter()
+    if not slots.acquire(timeout=DB_POOL_TIMEOUT):
+        raise PoolError(f"No database connection available after {DB_POOL_TIMEOUT} seconds")
+    try:
+        conn = pool.getconn()
+        # Replace connections that were closed by the server while idle in the pool
+        for _ in range(DB_POOL_MAX_SIZE):
+            if _is_healthy(conn):
+                break
+            pool.putconn(conn, close=True)
+            conn = pool.getconn()
+        else:
+            if not _is_healthy(conn):
+                pool.putconn(conn, close=True)
+                raise PoolError(f"No healthy database connection after {DB_POOL_MAX_SIZE + 1} attempts")
+        DB_CONNECTION_WAIT.observe(time.perf_counter() - started)
+        try:
+            yield conn
+        finally:
+            broken = conn.closed or conn.get_transaction_status() == extensions.TRANSACTION_STATUS_UNKNOWN
+            if not broken and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            pool.putconn(conn, close=bool(broken))
+    finally:
+        slots.release()
+
+# Recomputes the per-day counters from every stored record
+FILL_DAILY_STATS = '''
+    INSERT INTO dna_daily_stats (date, mutants, humans)
+    SELECT date::date,
+           COUNT(*) FILTER (WHERE is_mutant),
+           COUNT(*) FILTER (WHERE NOT is_mutant)
+    FROM dna_records
+    GROUP BY date::date
+'''
+
 def initialize_db():
     """
     Initialize PostgreSQL database.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    # Create dna_records table if it doesn't already exists
-    cursor.execute('''
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        # Create dna_records table if it doesn't already exists
+        cursor.execute('''
     CREATE TABLE IF NOT EXISTS dna_records (
         id TEXT PRIMARY KEY,
         dna_sequence TEXT,
         is_mutant BOOLEAN,
         date TIMESTAMP DEFAULT CURRENT_DATE
     )''')
-    conn.commit()
-    conn.close()
\ No newline at end of file
+        # Digest of the normalized sequence, indexed so duplicates are resolved without a table scan.
+        # Rows created before this column existed are filled in by "python -m db.maintenance backfill-digests"
+        cursor.execute("ALTER TABLE dna_records ADD COLUMN IF NOT EXISTS dna_digest BYTEA")
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS dna_records_dna_digest_idx ON dna_records (dna_digest)")
+        # Matrices made only of A/C/G/T are stored packed at 2 bits per base, with dna_sequence left NULL.
+        # Text rows are converted by ensure_schema at startup, or by "python -m db.maintenance pack-sequences"
+        cursor.execute('''
+    ALTER TABLE dna_records
+        ADD COLUMN IF NOT EXISTS dna_packed BYTEA,
+        ADD COLUMN IF NOT EXISTS dna_rows INTEGER,
+        ADD COLUMN IF NOT EXISTS dna_cols INTEGER''')
+        # Text rows left to convert are found without scanning the packed ones
+        cursor.execute('''
+    CREATE INDEX IF NOT EXISTS dna_records_unpacked_idx ON dna_records (id)
+        WHERE dna_packed IS NULL AND dna_sequence IS NOT NULL''')
+
+        # Per-day counters kept up to date by save_dna, so statistics never scan dna_records
+        cursor.execute("SELECT to_regclass('dna_daily_stats') IS NOT NULL")
+        daily_stats_exists = cursor.fetchone()[0]
+        cursor.execute('''
+    CREATE TABLE IF NOT EXISTS dna_daily_stats (
+        date DATE PRIMARY KEY,
+        mutants BIGINT NOT NULL DEFAULT 0,
+        humans BIGINT NOT NULL DEFAULT 0
+    )''')
+        if not daily_stats_exists:
+            # First run on an existing database: start the counters from the records already stored
+            cursor.execute(FILL_DAILY_STATS)
+        conn.commit()
+
+# True once every table, column and index created by initialize_db exists
+SCHEMA_IS_CURRENT = '''
+    SELECT to_regclass('dna_daily_stats') IS NOT NULL
+       AND to_regclass('dna_records_dna_digest_idx') IS NOT NULL
+       AND to_regclass('dna_records_unpacked_idx') IS NOT NULL
+       AND EXISTS (SELECT 1 FROM information_schema.columns
+                   WHERE table_name = 'dna_records' AND column_name = 'dna_cols')
+'''
+
+# True while a text record could still be packed. Its digest is computed on the text, or missing
+# for records stored before digests existed, so the same matrix submitted now, digested in packed
+# form, would not be recognized as recorded.
+UNPACKED_RECORDS_PENDING = '''
+    SELECT EXISTS (
+        SELECT 1 FROM dna_records
+        WHERE dna_packed IS NULL AND dna_sequence IS NOT NULL
+          AND dna_sequence ~ '^[ACGT]+$'
+          AND length(dna_sequence) = power(floor(sqrt(length(dna_sequence))), 2)
+    )
+'''
+
+# Advisory lock held while the schema is created or migrated, so workers starting together take turns
+SCHEMA_LOCK_ID = 0x786D656E
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+def _schema_needs_migration():
+    """
+    Check whether the schema is missing anything or text records are left to pack.
+    """
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SCHEMA_IS_CURRENT)
+        if not cursor.fetchone()[0]:
+            return True
+        cursor.execute(UNPACKED_RECORDS_PENDING)
+        return cursor.fetchone()[0]
+
+def _migrate_schema():
+    """
+    Create the schema and pack the text records, holding the schema advisory lock.
+    """
+    # Imported here, db.maintenance builds on this module
+    from db.maintenance import pack_sequences
+
+    # The lock is taken on its own connection and released when it is closed, even if the migration fails
+    lock_conn = get_db_connection()
+    try:
+        with lock_conn.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", (SCHEMA_LOCK_ID,))
+        # Another worker may have finished the migration while this one waited for the lock
+        if _schema_needs_migration():
+            initialize_db()
+            packed = pack_sequences()
+            if packed:
+                logger.info("Packed %d text records", packed)
+    finally:
+        lock_conn.close()
+
+def ensure_schema(retries=DB_INIT_RETRIES, backoff=DB_INIT_BACKOFF):
+    """
+    Make sure the database schema exists and is migrated, once per process. Called when the application starts.
+
+    Read-only queries check the schema, so the DDL of initialize_db, and the table locks it takes,
+    only run on a database that needs them. Text records stored before the packed format are
+    packed before any request is served, with or without a digest. Their digests are computed on
+    the text, or missing, so otherwise the same matrices submitted again would be stored and counted a second time. Connection failures
+    are retried with exponential backoff, so workers started before the database is reachable wait for it.
+
+    Args:
+        retries (int): Extra attempts after the first connection failure.
+        backoff (float): Seconds to wait before the first retry, doubled before each following one.
+
+    Raises:
+        psycopg2.OperationalError: Raised if the database is still unreachable after every retry.
+        PoolError: Raised if no pooled connection became available after every retry.
+    """
+    global _schema_ready
+    with _schema_lock:
+        if _schema_ready:
+            return
+        for attempt in range(retries + 1):
+            try:
+                if _schema_needs_migration():
+                    _migrate_schema()
+                _schema_ready = True
+                return
+            except (psycopg2.OperationalError, PoolError) as error:
+                if attempt == retries:
+                    raise
+                delay = backoff * 2 ** attempt
+                logger.warning("Database not ready (%s), retrying in %.1f seconds", error, delay)
+                time.sleep(delay)
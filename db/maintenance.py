@@ -0,0 +1,195 @@
+import argparse
+import math
+from psycopg2.extras import execute_values
+from db.database import db_connection, initialize_db, FILL_DAILY_STATS
+from utils.dna_codec import encode_dna
+
+# Number of rows updated per transaction by the backfill, to keep locks short
+BACKFILL_BATCH_SIZE = 10_000
+
+def backfill_dna_digests(batch_size=BACKFILL_BATCH_SIZE):
+    """
+    Fills dna_digest for records created before the column existed.
+
+    Rows are processed in batches, one transaction each. When the same sequence was stored
+    more than once, only its oldest record gets the digest; the other copies keep a NULL
+    digest, which the unique index allows, and are never matched again.
+
+    Args:
+        batch_size (int): Maximum number of rows updated per transaction.
+
+    Returns:
+        int: The number of records updated.
+    """
+    updated = 0
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        while True:
+            cursor.execute('''
+                UPDATE dna_records
+                SET dna_digest = sha256(convert_to(dna_sequence, 'UTF8'))
+                WHERE id IN (
+                    SELECT DISTINCT ON (pending.dna_sequence) pending.id
+                    FROM dna_records pending
+                    WHERE pending.dna_digest IS NULL
+                      AND pending.dna_sequence IS NOT NULL
+                      AND NOT EXISTS (
+                          SELECT 1 FROM dna_records digested
+                          WHERE digested.dna_digest = sha256(convert_to(pending.dna_sequence, 'UTF8'))
+                      )
+                    ORDER BY pending.dna_sequence, pending.date, pending.id
+                    LIMIT %s
+                )''', (batch_size,))
+            conn.commit()
+            if cursor.rowcount == 0:
+                return updated
+            updated += cursor.rowcount
+
+# Takes the records removed by a deleted CTE out of the per-day counters
+UNCOUNT_DELETED = '''
+    UPDATE dna_daily_stats
+    SET mutants = dna_daily_stats.mutants - counts.mutants, humans = dna_daily_stats.humans - counts.humans
+    FROM (
+        SELECT date::date AS date, COUNT(*) FILTER (WHERE is_mutant) AS mutants, COUNT(*) FILTER (WHERE NOT is_mutant) AS humans
+        FROM deleted
+        GROUP BY date::date
+    ) AS counts
+    WHERE dna_daily_stats.date = counts.date
+'''
+
+# Deletes packed records that duplicate a text record about to be packed, and takes them out of the
+# per-day counters. They were stored when the same matrix was submitted again before its text record
+# was converted; the text record is older and keeps its ID.
+DELETE_PACKED_DUPLICATES = '''
+    WITH deleted AS (
+        DELETE FROM dna_records taken
+        USING (VALUES %s) AS packed (id, dna_packed, dna_rows, dna_cols, dna_digest)
+        WHERE taken.dna_digest = packed.dna_digest AND taken.id <> packed.id
+        RETURNING taken.date, taken.is_mutant
+    )
+''' + UNCOUNT_DELETED
+
+# Deletes text records that hold the same matrix as another text record packed in the same batch,
+# and takes them out of the per-day counters. Only records without a digest can be such copies.
+DELETE_TEXT_DUPLICATES = '''
+    WITH deleted AS (
+        DELETE FROM dna_records WHERE id = ANY(%s)
+        RETURNING date, is_mutant
+    )
+''' + UNCOUNT_DELETED
+
+PACK_RECORDS = '''
+    UPDATE dna_records
+    SET dna_sequence = NULL, dna_packed = packed.dna_packed, dna_rows = packed.dna_rows,
+        dna_cols = packed.dna_cols, dna_digest = packed.dna_digest
+    FROM (VALUES %s) AS packed (id, dna_packed, dna_rows, dna_cols, dna_digest)
+    WHERE dna_records.id = packed.id
+      AND NOT EXISTS (SELECT 1 FROM dna_records taken WHERE taken.dna_digest = packed.dna_digest)
+'''
+
+def pack_sequences(batch_size=BACKFILL_BATCH_SIZE):
+    """
+    Converts records stored as text into the packed 2-bit format.
+
+    Only square matrices made of A/C/G/T are converted, since the text form does not record the
+    number of rows. Their digest is computed on the packed form, including for records stored
+    before digests existed, which never had one. A packed record that already holds that digest,
+    because the same matrix was submitted again before the conversion, is a duplicate: it is
+    deleted and uncounted, and the text record is packed. Text records holding the same matrix
+    as another one of the batch are deleted and uncounted too, so each matrix is kept once.
+    Called by ensure_schema when the application starts, so records are matched before requests are served.
+
+    Args:
+        batch_size (int): Maximum number of records read and updated per transaction.
+
+    Returns:
+        int: The number of records converted.
+    """
+    converted = 0
+    last_id = ""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        while True:
+            cursor.execute('''
+                SELECT id, dna_sequence FROM dna_records
+                WHERE dna_packed IS NULL AND dna_sequence IS NOT NULL AND id > %s
+                ORDER BY id
+                LIMIT %s''', (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                return converted
+            last_id = rows[-1][0]
+
+            updates = {}
+            copies = []
+            for record_id, dna_sequence_str in rows:
+                side = math.isqrt(len(dna_sequence_str))
+                if side * side != len(dna_sequence_str):
+                    continue
+                encoded = encode_dna([dna_sequence_str[row * side:(row + 1) * side] for row in range(side)])
+                if encoded.packed is None:
+                    continue
+                # Two records of the batch cannot take the same digest, the first one keeps the matrix
+                if encoded.digest in updates:
+                    copies.append(record_id)
+                else:
+                    updates[encoded.digest] = (record_id, encoded.packed, encoded.rows, encoded.cols, encoded.digest)
+
+            if copies:
+                cursor.execute(DELETE_TEXT_DUPLICATES, (copies,))
+            if updates:
+                updates = list(updates.values())
+                execute_values(cursor, DELETE_PACKED_DUPLICATES, updates, page_size=len(updates))
+                execute_values(cursor, PACK_RECORDS, updates, page_size=len(updates))
+                converted += cursor.rowcount
+            conn.commit()
+
+def rebuild_daily_stats():
+    """
+    Rebuilds the dna_daily_stats counters from every record in dna_records.
+
+    Writes to dna_records are blocked while the counters are rebuilt, so no insert is
+    counted twice or missed.
+
+    Returns:
+        int: The number of days in the rebuilt table.
+    """
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("LOCK TABLE dna_records IN SHARE MODE")
+        cursor.execute("DELETE FROM dna_daily_stats")
+        cursor.execute(FILL_DAILY_STATS)
+        days = cursor.rowcount
+        conn.commit()
+    return days
+
+def main(argv=None):
+    """
+    Command line entry point for database maintenance tasks.
+
+    Usage:
+        python -m db.maintenance backfill-digests [--batch-size N]
+        python -m db.maintenance rebuild-daily-stats
+        python -m db.maintenance pack-sequences [--batch-size N]
+    """
+    parser = argparse.ArgumentParser(prog="python -m db.maintenance", description="Database maintenance tasks.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    backfill = subparsers.add_parser("backfill-digests", help="Fill dna_digest for records created before the column existed.")
+    backfill.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE)
+    subparsers.add_parser("rebuild-daily-stats", help="Rebuild the per-day counters from every stored record.")
+    pack = subparsers.add_parser("pack-sequences", help="Convert text records into the packed 2-bit format.")
+    pack.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    # Make sure the columns and indexes the tasks rely on exist
+    initialize_db()
+
+    if args.command == "backfill-digests":
+        print(f"Backfilled {backfill_dna_digests(args.batch_size)} digests.")
+    elif args.command == "rebuild-daily-stats":
+        print(f"Rebuilt daily stats for {rebuild_daily_stats()} days.")
+    elif args.command == "pack-sequences":
+        print(f"Packed {pack_sequences(args.batch_size)} records.")
+
+if __name__ == "__main__":
+    main()
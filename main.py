@@ -1,12 +1,52 @@
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from api import mutant, stats
-from db.database import initialize_db
+from api import mutant, stats, metrics
+from api.profiling import ProfilingMiddleware, PROFILING_ENABLED, PROFILING_SECRET
+from db.database import ensure_schema, close_pool, DB_DRIVER
+from db.async_database import init_async_pool, close_async_pool
+from services.executor_service import start_executors, shutdown_executors, run_blocking
+from repositories.write_behind import write_behind_queue
+from repositories.digest_filter import digest_filter, DIGEST_FILTER_ENABLED
 
-app = FastAPI(debug=True)
+logger = logging.getLogger(__name__)
 
-# Initialize the database when the app starts
-initialize_db()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Starts the detection and database worker pools with the app and stops them on shutdown,
+    draining the write-behind queue and closing the database connection pools last, even if the
+    final flush fails, in which case the IDs of the records that could not be written are logged.
+    The database schema is checked before the first request, instead of when the module is imported.
+    The digest filter is warmed in the background, duplicate lookups are kept until it is ready.
+    """
+    start_executors()
+    await run_blocking(ensure_schema)
+    if DB_DRIVER == "asyncpg":
+        await init_async_pool()
+    elif DIGEST_FILTER_ENABLED:
+        digest_filter.start_warm()
+    yield
+    shutdown_executors()
+    try:
+        write_behind_queue.stop()
+    except Exception:
+        # The records were already answered as saved, their IDs are the only trace left of them
+        record_ids = write_behind_queue.pending_record_ids()
+        logger.exception("Write-behind flush failed at shutdown, %d records were not saved: %s",
+                         len(record_ids), ", ".join(record_ids))
+    finally:
+        await close_async_pool()
+        close_pool()
+
+app = FastAPI(debug=True, lifespan=lifespan)
+
+# Per-request profiling is only installed when enabled with a secret, so other deployments never run it
+if PROFILING_ENABLED and PROFILING_SECRET:
+    app.add_middleware(ProfilingMiddleware)
 
 # Include the endpoints (routers) for mutant detection and statistics
 app.include_router(mutant.router, prefix="/api")
-app.include_router(stats.router, prefix="/api")
\ No newline at end of file
+app.include_router(stats.router, prefix="/api")
+# Prometheus metrics of this worker, outside /api as scrapers expect
+app.include_router(metrics.router)
\ No newline at end of file
@@ -0,0 +1,105 @@
+from datetime import datetime
+from db.async_database import async_db_connection
+from utils.dna_codec import encode_dna
+from utils.metrics import time_stage
+
+# asyncpg prepares every statement on first use and reuses it on the same connection,
+# so the queries below are kept as module constants to always hit the statement cache
+# Same statement as repositories.dna_repository.UPSERT_RECORDS: new records are inserted and the others
+# only read, and rows committed by another transaction while it ran are looked up with SELECT_BY_DIGESTS
+UPSERT_RECORDS = '''
+    WITH batch AS (
+        SELECT * FROM unnest($1::text[], $2::text[], $3::bytea[], $4::integer[], $5::integer[], $6::bytea[],
+                             $7::boolean[], $8::date[])
+            AS batch (id, dna_sequence, dna_packed, dna_rows, dna_cols, dna_digest, is_mutant, date)
+    ), saved AS (
+        INSERT INTO dna_records (id, dna_sequence, dna_packed, dna_rows, dna_cols, dna_digest, is_mutant, date)
+        SELECT * FROM batch
+        ON CONFLICT (dna_digest) DO NOTHING
+        RETURNING dna_digest, id, is_mutant, date
+    ), counted AS (
+        INSERT INTO dna_daily_stats (date, mutants, humans)
+        SELECT date::date, COUNT(*) FILTER (WHERE is_mutant), COUNT(*) FILTER (WHERE NOT is_mutant)
+        FROM saved
+        GROUP BY date::date
+        ON CONFLICT (date) DO UPDATE SET mutants = dna_daily_stats.mutants + EXCLUDED.mutants,
+                                         humans = dna_daily_stats.humans + EXCLUDED.humans
+    )
+    SELECT dna_digest, id, is_mutant, TRUE AS inserted FROM saved
+    UNION ALL
+    SELECT dna_digest, id, is_mutant, FALSE FROM dna_records WHERE dna_digest = ANY($6::bytea[])
+'''
+SELECT_BY_DIGESTS = "SELECT dna_digest, id, is_mutant FROM dna_records WHERE dna_digest = ANY($1::bytea[])"
+SELECT_DAILY_COUNTS = "SELECT date, mutants, humans FROM dna_daily_stats"
+
+async def save_dna(record_id, dna_sequence, is_mutant):
+    """
+    Asynchronous version of repositories.dna_repository.save_dna.
+
+    Args:
+        record_id (str): Unique identifier for the DNA record.
+        dna_sequence (list or EncodedDna): List of strings representing the DNA sequence, or its encoded form.
+        is_mutant (bool): Boolean indicating if the DNA belongs to a mutant.
+
+    Returns:
+        dict: A dictionary containing:
+              - "exists" (bool): Whether the DNA sequence was already in the database.
+              - "is_mutant" (bool): Mutant status of the DNA (True if mutant, False if human).
+              - "record_id" (str): The unique ID of the record.
+    """
+    return (await save_dna_batch([(record_id, dna_sequence, is_mutant)]))[0]
+
+async def save_dna_batch(records):
+    """
+    Asynchronous version of repositories.dna_repository.save_dna_batch.
+
+    Args:
+        records (list): List of (record_id, dna_sequence, is_mutant) tuples, where dna_sequence
+                        is a list of strings representing the DNA sequence, or its encoded form.
+
+    Returns:
+        list: One dictionary per record, in input order, with the same keys returned by save_dna.
+    """
+    today = datetime.now().date()
+    rows = {}
+    digests = []
+    for record_id, dna_sequence, is_mutant in records:
+        encoded = encode_dna(dna_sequence)
+        digest = encoded.digest
+        digests.append(digest)
+        if digest not in rows:
+            rows[digest] = (record_id, encoded.text, encoded.packed, encoded.rows, encoded.cols, digest, is_mutant, today)
+
+    async with async_db_connection() as conn:
+        # Send the records as one array per column and upsert them with a single statement
+        with time_stage("db_query"):
+            saved = await conn.fetch(UPSERT_RECORDS, *(list(column) for column in zip(*rows.values())))
+            stored = {row["dna_digest"]: (row["id"], row["is_mutant"], row["inserted"]) for row in saved}
+            missing = [digest for digest in rows if digest not in stored]
+            if missing:
+                # Stored by a transaction that committed while the upsert ran
+                for row in await conn.fetch(SELECT_BY_DIGESTS, missing):
+                    stored[row["dna_digest"]] = (row["id"], row["is_mutant"], False)
+
+    results = []
+    reported = set()
+    for digest in digests:
+        record_id, is_mutant, inserted = stored[digest]
+        results.append({"exists": not inserted or digest in reported, "is_mutant": is_mutant, "record_id": record_id})
+        reported.add(digest)
+    return results
+
+async def get_daily_counts():
+    """
+    Asynchronous version of repositories.dna_repository.get_daily_counts.
+
+    Returns:
+        list: A list of tuples, each containing:
+              - date (date): The date of the records.
+              - mutants (int): The count of mutant DNA sequences for that date.
+              - humans (int): The count of human DNA sequences for that date.
+    """
+    async with async_db_connection() as conn:
+        with time_stage("db_read"):
+            rows = await conn.fetch(SELECT_DAILY_COUNTS)
+    return [tuple(row) for row in rows]
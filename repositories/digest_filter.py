@@ -0,0 +1,207 @@
+import logging
+import math
+import os
+import threading
+from db.database import db_connection
+from utils.metrics import register_bloom_filter
+
+logger = logging.getLogger(__name__)
+
+# Keep a Bloom filter of the stored sequence digests, so new sequences skip the duplicate lookup
+DIGEST_FILTER_ENABLED = os.getenv("DIGEST_FILTER_ENABLED", "false").lower() in ("1", "true", "yes")
+# Number of digests the filter is sized for; it grows to twice the stored records when warmed
+DIGEST_FILTER_CAPACITY = int(os.getenv("DIGEST_FILTER_CAPACITY", 1_000_000))
+# Target probability of reporting a new sequence as possibly stored
+DIGEST_FILTER_FP_RATE = float(os.getenv("DIGEST_FILTER_FP_RATE", 0.01))
+# Digests fetched per round trip while streaming dna_records into the filter
+DIGEST_FILTER_WARM_BATCH = int(os.getenv("DIGEST_FILTER_WARM_BATCH", 10_000))
+
+# Planner estimate of the stored records, read without scanning the table
+ESTIMATE_RECORDS = "SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = to_regclass('dna_records')"
+SELECT_DIGESTS = "SELECT dna_digest FROM dna_records WHERE dna_digest IS NOT NULL"
+
+def filter_size(capacity, fp_rate):
+    """
+    Computes the optimal size of a Bloom filter.
+
+    Args:
+        capacity (int): Number of entries the filter is sized for.
+        fp_rate (float): Target false-positive probability once capacity entries are added.
+
+    Returns:
+        tuple: (bits, hashes), the number of bits, rounded up to whole bytes, and of hash functions.
+    """
+    capacity = max(1, capacity)
+    bits = math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)
+    bits = max(8, (bits + 7) // 8 * 8)
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+class DigestFilter:
+    """
+    Bloom filter of the sequence digests stored in dna_records.
+
+    A digest the filter has never seen is definitely not stored by this worker's view of the table,
+    so its duplicate lookup can be skipped. Sequence digests are already SHA-256, so the bit positions
+    are derived from the digest itself by double hashing instead of hashing it again. Until warm
+    finishes, every digest is reported as possibly stored and the usual lookups are kept.
+
+    Records written by other workers are only added when this worker sees them, so callers must keep
+    a fallback for a "definitely absent" sequence that turns out to be stored.
+
+    Attributes:
+        capacity (int): Number of digests the filter is sized for.
+        fp_rate (float): Target false-positive probability at capacity.
+        ready (bool): Whether the filter holds every stored digest and can answer lookups.
+        entries (int): Digests added since the filter was last sized.
+        skipped (int): Lookups answered as definitely absent.
+        false_positives (int): Digests reported as possibly stored that turned out to be new.
+    """
+
+    def __init__(self, capacity=DIGEST_FILTER_CAPACITY, fp_rate=DIGEST_FILTER_FP_RATE):
+        self.fp_rate = fp_rate
+        self.ready = False
+        self.skipped = 0
+        self.false_positives = 0
+        self._lock = threading.Lock()
+        self._warm_thread = None
+        # The bit array is only allocated when the filter is warmed
+        self.capacity = capacity
+        self._bits = self._hashes = self._bits_set = self.entries = 0
+        self._array = bytearray()
+
+    def _resize(self, capacity):
+        """
+        Replaces the bit array with an empty one sized for capacity. Caller holds the lock or owns the filter.
+        """
+        self.capacity = capacity
+        self._bits, self._hashes = filter_size(capacity, self.fp_rate)
+        self._array = bytearray(self._bits // 8)
+        self._bits_set = 0
+        self.entries = 0
+
+    def _positions(self, digest):
+        """
+        Returns the bit positions of a digest.
+        """
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:16], "little") | 1
+        bits = self._bits
+        return [(first + i * second) % bits for i in range(self._hashes)]
+
+    def add(self, digest):
+        """
+        Adds a stored sequence digest to the filter.
+
+        Args:
+            digest (bytes): Digest of the normalized DNA sequence.
+        """
+        with self._lock:
+            if not self._bits:
+                return
+            array = self._array
+            for position in self._positions(digest):
+                byte, mask = position >> 3, 1 << (position & 7)
+                if not array[byte] & mask:
+                    array[byte] |= mask
+                    self._bits_set += 1
+            self.entries += 1
+
+    def might_contain(self, digest):
+        """
+        Checks whether a digest may be stored.
+
+        Args:
+            digest (bytes): Digest of the normalized DNA sequence.
+
+        Returns:
+            bool: False only if the digest is definitely not stored, True if it may be or the filter is not ready.
+        """
+        if not self.ready:
+            return True
+        array = self._array
+        for position in self._positions(digest):
+            if not array[position >> 3] & (1 << (position & 7)):
+                self.skipped += 1
+                return False
+        return True
+
+    def record_false_positive(self, count=1):
+        """
+        Counts digests reported as possibly stored that the database then inserted as new.
+
+        Args:
+            count (int): Number of false positives found.
+        """
+        self.false_positives += count
+
+    def warm(self):
+        """
+        Sizes the filter for the stored records and streams every stored digest into it with a
+        server-side cursor, so the table is never held in memory. Digests added while it runs are kept.
+        """
+        with self._lock:
+            self.ready = False
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(ESTIMATE_RECORDS)
+            row = cursor.fetchone()
+            stored = row[0] if row and row[0] else 0
+            with self._lock:
+                self._resize(max(self.capacity, 2 * stored))
+            with conn.cursor(name="digest_filter_warm") as stream:
+                stream.itersize = DIGEST_FILTER_WARM_BATCH
+                stream.execute(SELECT_DIGESTS)
+                for (digest,) in stream:
+                    self.add(bytes(digest))
+            conn.rollback()
+        with self._lock:
+            self.ready = True
+        logger.info("Digest filter warmed with %d digests, %d bytes", self.entries, len(self._array))
+
+    def start_warm(self):
+        """
+        Warms the filter in a background thread, so startup does not wait for the table to be read.
+        """
+        if self._warm_thread is None or not self._warm_thread.is_alive():
+            self._warm_thread = threading.Thread(target=self._warm_quietly, name="digest-filter-warm", daemon=True)
+            self._warm_thread.start()
+
+    def _warm_quietly(self):
+        """
+        Runs warm, leaving the filter disabled if the records cannot be read.
+        """
+        try:
+            self.warm()
+        except Exception:
+            logger.exception("Digest filter warm failed, duplicate lookups stay enabled")
+
+    def expected_fp_rate(self):
+        """
+        Returns the false-positive probability implied by the fraction of bits currently set.
+        """
+        return (self._bits_set / self._bits) ** self._hashes if self._bits else 0.0
+
+    def stats(self):
+        """
+        Returns the size and accuracy of the filter.
+
+        The measured false-positive rate is the fraction of the new sequences that were reported as
+        possibly stored: false positives over false positives plus definitely absent answers.
+
+        Returns:
+            dict: bytes, entries, skipped, false_positives, false_positive_ratio and expected_false_positive_ratio.
+        """
+        negatives = self.skipped + self.false_positives
+        return {
+            "bytes": len(self._array),
+            "entries": self.entries,
+            "skipped": self.skipped,
+            "false_positives": self.false_positives,
+            "false_positive_ratio": self.false_positives / negatives if negatives else 0.0,
+            "expected_false_positive_ratio": self.expected_fp_rate()
+        }
+
+# Filter shared by the repository functions of this worker
+digest_filter = DigestFilter()
+register_bloom_filter("dna_digest", digest_filter.stats)
@@ -1,14 +1,68 @@
 from datetime import datetime
-from db.database import get_db_connection
+from psycopg2.extras import execute_values
+from db.database import db_connection
+from utils.dna_codec import encode_dna
+from utils.metrics import time_stage
+from repositories.write_behind import DB_WRITE_BEHIND, SELECT_BY_DIGESTS, write_behind_queue
+from repositories.digest_filter import digest_filter
+
+# Inserts the new records and returns them together with the stored rows of the others, in one
+# round trip and without writing to existing rows. Rows inserted by the statement are not visible
+# to its final SELECT, so no sequence is reported twice; only inserted rows are added to the per-day
+# counters, within the same statement and therefore the same transaction. A row committed by another
+# transaction after the statement started is skipped by the insert but not seen by the SELECT
+# either, and is looked up afterwards with SELECT_BY_DIGESTS.
+UPSERT_RECORDS = '''
+    WITH batch (id, dna_sequence, dna_packed, dna_rows, dna_cols, dna_digest, is_mutant, date) AS (
+        VALUES %s
+    ), saved AS (
+        INSERT INTO dna_records (id, dna_sequence, dna_packed, dna_rows, dna_cols, dna_digest, is_mutant, date)
+        SELECT * FROM batch
+        ON CONFLICT (dna_digest) DO NOTHING
+        RETURNING dna_digest, id, is_mutant, date
+    ), counted AS (
+        INSERT INTO dna_daily_stats (date, mutants, humans)
+        SELECT date::date, COUNT(*) FILTER (WHERE is_mutant), COUNT(*) FILTER (WHERE NOT is_mutant)
+        FROM saved
+        GROUP BY date::date
+        ON CONFLICT (date) DO UPDATE SET mutants = dna_daily_stats.mutants + EXCLUDED.mutants,
+                                         humans = dna_daily_stats.humans + EXCLUDED.humans
+    )
+    SELECT dna_digest, id, is_mutant, TRUE FROM saved
+    UNION ALL
+    SELECT dna_digest, id, is_mutant, FALSE FROM dna_records WHERE dna_digest IN (SELECT dna_digest FROM batch)
+'''
+# Row template of UPSERT_RECORDS, typed because VALUES outside an INSERT does not take the column types
+UPSERT_TEMPLATE = "(%s, %s::text, %s::bytea, %s::integer, %s::integer, %s::bytea, %s::boolean, %s::date)"
+
+# Inserts records the digest filter reported as definitely absent. Without a conflict to resolve,
+# no existing row is looked up; a row stored meanwhile by another worker is skipped and upserted after.
+INSERT_NEW_RECORDS = '''
+    WITH saved AS (
+        INSERT INTO dna_records (id, dna_sequence, dna_packed, dna_rows, dna_cols, dna_digest, is_mutant, date) VALUES %s
+        ON CONFLICT (dna_digest) DO NOTHING
+        RETURNING dna_digest, id, is_mutant, date
+    ), counted AS (
+        INSERT INTO dna_daily_stats (date, mutants, humans)
+        SELECT date::date, COUNT(*) FILTER (WHERE is_mutant), COUNT(*) FILTER (WHERE NOT is_mutant)
+        FROM saved
+        GROUP BY date::date
+        ON CONFLICT (date) DO UPDATE SET mutants = dna_daily_stats.mutants + EXCLUDED.mutants,
+                                         humans = dna_daily_stats.humans + EXCLUDED.humans
+    )
+    SELECT dna_digest, id, is_mutant, TRUE FROM saved
+'''
 
 def save_dna(record_id, dna_sequence, is_mutant):
     """
     Saves the DNA sequence and mutant status in the database with a ID.
     If the sequence already exists, it does not save it again and returns an "exists" status.
+    New and existing sequences are told apart by a single upsert on the indexed sequence digest,
+    which also keeps concurrent submissions of the same sequence from creating duplicates.
 
     Args:
         record_id (str): Unique identifier for the DNA record.
-        dna_sequence (list): List of strings representing the DNA sequence.
+        dna_sequence (list or EncodedDna): List of strings representing the DNA sequence, or its encoded form.
         is_mutant (bool): Boolean indicating if the DNA belongs to a mutant.
 
     Returns:
@@ -17,50 +71,100 @@ def save_dna(record_id, dna_sequence, is_mutant):
               - "is_mutant" (bool): Mutant status of the DNA (True if mutant, False if human).
               - "record_id" (str): The unique ID of the record.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    return save_dna_batch([(record_id, dna_sequence, is_mutant)])[0]
 
-    # Normalize the DNA sequence into a single string (if not already normalized)
-    dna_sequence_str = "".join(dna_sequence)
+def save_dna_batch(records):
+    """
+    Saves several DNA sequences with a single multi-row upsert on the sequence digest.
+    Sequences already in the database, or repeated earlier in the same batch, are not saved again,
+    and their rows are only read, never rewritten.
+    When DB_WRITE_BEHIND is enabled, new sequences are queued and inserted in the background instead.
+    Sequences the digest filter reports as definitely absent are inserted without resolving a conflict,
+    and only fall back to the upsert if another worker stored them first.
 
-    # Check if the DNA sequence already exists in the database
-    cursor.execute("SELECT is_mutant, id FROM dna_records WHERE dna_sequence = %s", (dna_sequence_str,))
-    result = cursor.fetchone()
-    
-    if result:
-        # If it already exists, return the "exists" status and whether it is mutant or human
-        existing_is_mutant = result[0]
-        conn.close()
-        return {"exists": True, "is_mutant": existing_is_mutant, "record_id": result[1]}
+    Args:
+        records (list): List of (record_id, dna_sequence, is_mutant) tuples, where dna_sequence
+                        is a list of strings representing the DNA sequence, or its encoded form.
 
-    # If it does not exist, insert the new record into the database
-    cursor.execute(
-        "INSERT INTO dna_records (id, dna_sequence, is_mutant, date) VALUES (%s, %s, %s, %s)",
-        (record_id, dna_sequence_str, is_mutant, datetime.now().date())
-    )
-    conn.commit()
-    conn.close()
-    return {"exists": False, "is_mutant": is_mutant, "record_id": record_id}
+    Returns:
+        list: One dictionary per record, in input order, with the same keys returned by save_dna.
+    """
+    if DB_WRITE_BEHIND:
+        return write_behind_queue.save_batch(records)
+
+    # Keep only the first record of every sequence, a row cannot be upserted twice in one statement
+    today = datetime.now().date()
+    rows = {}
+    digests = []
+    for record_id, dna_sequence, is_mutant in records:
+        encoded = encode_dna(dna_sequence)
+        digest = encoded.digest
+        digests.append(digest)
+        if digest not in rows:
+            rows[digest] = (record_id, encoded.text, encoded.packed, encoded.rows, encoded.cols, digest, is_mutant, today)
+
+    absent = [row for digest, row in rows.items() if not digest_filter.might_contain(digest)]
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        with time_stage("db_query"):
+            saved = []
+            if absent:
+                saved = execute_values(cursor, INSERT_NEW_RECORDS, absent, page_size=len(absent), fetch=True)
+            inserted_new = {bytes(row[0]) for row in saved}
+            upserted = [row for digest, row in rows.items() if digest not in inserted_new]
+            if upserted:
+                saved += execute_values(
+                    cursor, UPSERT_RECORDS, upserted, template=UPSERT_TEMPLATE, page_size=len(upserted), fetch=True
+                )
+            stored = {bytes(digest): (record_id, is_mutant, inserted) for digest, record_id, is_mutant, inserted in saved}
+            missing = [digest for digest in rows if digest not in stored]
+            if missing:
+                # Stored by a transaction that committed while the upsert ran
+                cursor.execute(SELECT_BY_DIGESTS, (missing,))
+                for digest, record_id, is_mutant in cursor.fetchall():
+                    stored[bytes(digest)] = (record_id, is_mutant, False)
+            conn.commit()
+
+    # Map every record back to its stored row; repeats within the batch count as existing
+    update_digest_filter(stored, {row[5] for row in absent})
+    results = []
+    reported = set()
+    for digest in digests:
+        record_id, is_mutant, inserted = stored[digest]
+        results.append({"exists": not inserted or digest in reported, "is_mutant": is_mutant, "record_id": record_id})
+        reported.add(digest)
+    return results
+
+def update_digest_filter(stored, absent):
+    """
+    Adds the stored digests to the digest filter and counts its false positives.
+
+    Args:
+        stored (dict): (record_id, is_mutant, inserted) tuples keyed by the digest of every stored sequence.
+        absent (set): Digests the filter reported as definitely absent.
+    """
+    false_positives = 0
+    for digest, (_, _, inserted) in stored.items():
+        if inserted and digest not in absent:
+            false_positives += 1
+        digest_filter.add(digest)
+    if digest_filter.ready and false_positives:
+        digest_filter.record_false_positive(false_positives)
 
 def get_daily_counts():
     """
     Retrieves the daily counts of mutants and humans from the database.
+    Reads the per-day counters maintained by save_dna instead of aggregating every record.
 
     Returns:
         list: A list of tuples, each containing:
-              - date (datetime): The date of the record.
+              - date (date): The date of the records.
               - mutants (int): The count of mutant DNA sequences for that date.
               - humans (int): The count of human DNA sequences for that date.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''  
-        SELECT date, 
-               SUM(CASE WHEN is_mutant THEN 1 ELSE 0 END) AS mutants, 
-               SUM(CASE WHEN NOT is_mutant THEN 1 ELSE 0 END) AS humans
-        FROM dna_records
-        GROUP BY date
-    ''')
-    results = cursor.fetchall()
-    conn.close()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        with time_stage("db_read"):
+            cursor.execute("SELECT date, mutants, humans FROM dna_daily_stats")
+            results = cursor.fetchall()
     return results
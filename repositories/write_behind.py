@@ -0,0 +1,220 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from psycopg2.extras import execute_values
+from db.database import db_connection
+from utils.dna_codec import encode_dna
+
+logger = logging.getLogger(__name__)
+
+# Queue new records in memory and insert them in batches instead of one commit per record
+DB_WRITE_BEHIND = os.getenv("DB_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+# Flush as soon as this many records are queued...
+WRITE_BEHIND_MAX_RECORDS = int(os.getenv("WRITE_BEHIND_MAX_RECORDS", 500))
+# ...or when the oldest queued record has waited this many milliseconds
+WRITE_BEHIND_MAX_DELAY_MS = float(os.getenv("WRITE_BEHIND_MAX_DELAY_MS", 50))
+
+SELECT_BY_DIGESTS = "SELECT dna_digest, id, is_mutant FROM dna_records WHERE dna_digest = ANY(%s)"
+
+# Inserts the queued records and adds the ones actually inserted to the per-day counters
+INSERT_RECORDS = '''
+    WITH saved AS (
+        INSERT INTO dna_records (id, dna_sequence, dna_packed, dna_rows, dna_cols, dna_digest, is_mutant, date) VALUES %s
+        ON CONFLICT (dna_digest) DO NOTHING
+        RETURNING is_mutant, date
+    )
+    INSERT INTO dna_daily_stats (date, mutants, humans)
+    SELECT date::date, COUNT(*) FILTER (WHERE is_mutant), COUNT(*) FILTER (WHERE NOT is_mutant)
+    FROM saved
+    GROUP BY date::date
+    ON CONFLICT (date) DO UPDATE SET mutants = dna_daily_stats.mutants + EXCLUDED.mutants,
+                                     humans = dna_daily_stats.humans + EXCLUDED.humans
+'''
+
+class WriteBehindQueue:
+    """
+    Write-behind buffer for new DNA records.
+
+    New records are answered right away and inserted by a background thread with one multi-row
+    statement and one commit, when max_records are queued or the oldest one has waited max_delay_ms.
+    Queued and in-flight records are checked before the database, so a sequence submitted again
+    before it is flushed is still reported as existing by this worker. A sequence submitted to two
+    workers before either flushes is stored once, but both report it as new.
+
+    Attributes:
+        max_records (int): Number of queued records that triggers a flush.
+        max_delay_ms (float): Maximum milliseconds a record waits before being flushed.
+    """
+
+    def __init__(self, max_records=WRITE_BEHIND_MAX_RECORDS, max_delay_ms=WRITE_BEHIND_MAX_DELAY_MS):
+        self.max_records = max_records
+        self.max_delay_ms = max_delay_ms
+        self._pending = {}
+        self._in_flight = {}
+        self._oldest = None
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+
+    def start(self):
+        """
+        Starts the background flush thread if it is not running.
+        """
+        with self._condition:
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread after every queued record has been flushed.
+        """
+        with self._condition:
+            thread = self._thread
+            self._stopping = True
+            self._condition.notify()
+        if thread is not None:
+            thread.join()
+            self._thread = None
+        # Flush anything queued while the thread was not running
+        self.flush()
+
+    def save_batch(self, records):
+        """
+        Resolves new and existing sequences and queues the new ones for insertion.
+
+        Args:
+            records (list): List of (record_id, dna_sequence, is_mutant) tuples.
+
+        Returns:
+            list: One dictionary per record, in input order, with the same keys returned by save_dna.
+        """
+        self.start()
+        today = datetime.now().date()
+        encoded_records = [(record_id, encode_dna(dna_sequence), is_mutant) for record_id, dna_sequence, is_mutant in records]
+
+        # Only sequences that are not waiting in memory need a database lookup. A queued sequence can be
+        # flushed, and leave the queue, between two locked sections; it is then looked up on the next pass,
+        # and the records are only resolved once every sequence is either queued or looked up.
+        digests = list(dict.fromkeys(encoded.digest for _, encoded, _ in encoded_records))
+        looked_up = set()
+        stored = {}
+        while True:
+            with self._condition:
+                unknown = [digest for digest in digests if digest not in looked_up and self._queued(digest) is None]
+                if not unknown:
+                    return self._resolve(encoded_records, stored, today)
+            with db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(SELECT_BY_DIGESTS, (unknown,))
+                stored.update(
+                    (bytes(digest), (record_id, is_mutant)) for digest, record_id, is_mutant in cursor.fetchall()
+                )
+            looked_up.update(unknown)
+
+    def _resolve(self, encoded_records, stored, today):
+        """
+        Answers every record from the queue or the looked up rows, and queues the new ones. Caller holds the condition.
+        """
+        results = []
+        for record_id, encoded, is_mutant in encoded_records:
+            digest = encoded.digest
+            known = self._queued(digest) or stored.get(digest)
+            if known:
+                results.append({"exists": True, "is_mutant": known[1], "record_id": known[0]})
+                continue
+            self._pending[digest] = (
+                record_id, encoded.text, encoded.packed, encoded.rows, encoded.cols, digest, is_mutant, today
+            )
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            results.append({"exists": False, "is_mutant": is_mutant, "record_id": record_id})
+        if len(self._pending) >= self.max_records:
+            self._condition.notify()
+        return results
+
+    def flush(self):
+        """
+        Inserts every queued record with a single statement and commit.
+        Records stay visible to duplicate checks until the commit succeeds, and are queued
+        again if it fails.
+
+        Returns:
+            int: The number of records sent to the database.
+        """
+        with self._flush_lock:
+            with self._condition:
+                if not self._pending:
+                    return 0
+                self._in_flight, self._pending = self._pending, {}
+                self._oldest = None
+                rows = list(self._in_flight.values())
+            try:
+                with db_connection() as conn:
+                    execute_values(conn.cursor(), INSERT_RECORDS, rows, page_size=len(rows))
+                    conn.commit()
+            except Exception:
+                with self._condition:
+                    self._in_flight.update(self._pending)
+                    self._pending, self._in_flight = self._in_flight, {}
+                    self._oldest = self._oldest or time.monotonic()
+                raise
+            with self._condition:
+                self._in_flight = {}
+            return len(rows)
+
+    def pending_count(self):
+        """
+        Returns the number of records waiting to be inserted, including the ones being flushed.
+        """
+        with self._condition:
+            return len(self._pending) + len(self._in_flight)
+
+    def pending_record_ids(self):
+        """
+        Returns the IDs of the records waiting to be inserted, including the ones being flushed.
+        """
+        with self._condition:
+            return [row[0] for row in (*self._pending.values(), *self._in_flight.values())]
+
+    def _queued(self, digest):
+        """
+        Returns (record_id, is_mutant) if the sequence is queued or being flushed. Caller holds the condition.
+        """
+        row = self._pending.get(digest) or self._in_flight.get(digest)
+        return (row[0], row[6]) if row else None
+
+    def _run(self):
+        """
+        Background loop that flushes when enough records are queued or the oldest one is due.
+        """
+        max_delay = self.max_delay_ms / 1000
+        while True:
+            with self._condition:
+                while not self._stopping:
+                    if len(self._pending) >= self.max_records:
+                        break
+                    if self._oldest is not None:
+                        remaining = self._oldest + max_delay - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+                    else:
+                        self._condition.wait()
+                stopping = self._stopping
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Write-behind flush failed, records were queued again")
+                if stopping:
+                    return
+                time.sleep(max_delay)
+            if stopping and not self.pending_count():
+                return
+
+# Queue shared by the repository functions of this worker
+write_behind_queue = WriteBehindQueue()
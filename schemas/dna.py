@@ -1,5 +1,14 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import AfterValidator, BaseModel, Field, PlainSerializer
+from typing import Annotated, List
+from utils.dna_codec import DnaMatrix
+
+# A list of DNA rows in JSON, validated once into a DnaMatrix: a square matrix of A/T/C/G.
+# Ragged rows or any other character are rejected with a 422 before reaching the endpoint.
+DnaMatrixRows = Annotated[
+    List[str],
+    AfterValidator(DnaMatrix.from_rows),
+    PlainSerializer(lambda matrix: matrix.rows(), return_type=List[str])
+]
 
 class DnaRequest(BaseModel):
     """
@@ -9,9 +18,9 @@ class DnaRequest(BaseModel):
         BaseModel (pydantic.BaseModel): Inherits from Pydantic's BaseModel.
 
     Attributes:
-        dna (List[str]): List of DNA sequence string to be analyzed.
+        dna (DnaMatrix): The DNA matrix to be analyzed, sent as a list of N strings of N bases.
     """
-    dna: List[str]
+    dna: DnaMatrixRows
 
 class DnaResponse(BaseModel):
     """
@@ -28,3 +37,61 @@ class DnaResponse(BaseModel):
     status: str  # Mutant" or Human
     record_id: str
     detail: str
+
+class DnaRowsResponse(BaseModel):
+    """
+    Represents a response model for a DNA matrix streamed row by row, which is not recorded.
+
+    Args:
+        BaseModel (pydantic.BaseModel): Inherits from Pydantic's BaseModel.
+
+    Attributes:
+        status (str): Indicates the result of the analysis ("mutant" or "human").
+        rows_read (int): Number of rows read before the verdict was known.
+    """
+    status: str
+    rows_read: int
+
+
+# Maximum number of DNA samples accepted in a single batch request
+MAX_BATCH_SIZE = 1000
+
+class DnaBatchRequest(BaseModel):
+    """
+    Represents a request model for classifying several DNA samples at once.
+
+    Args:
+        BaseModel (pydantic.BaseModel): Inherits from Pydantic's BaseModel.
+
+    Attributes:
+        samples (List[DnaRequest]): DNA samples to be analyzed, at most MAX_BATCH_SIZE.
+    """
+    samples: List[DnaRequest] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class DnaBatchItemResponse(BaseModel):
+    """
+    Represents the analysis result of one sample in a batch request.
+
+    Args:
+        BaseModel (pydantic.BaseModel): Inherits from Pydantic's BaseModel.
+
+    Attributes:
+        status (str): Indicates the result of the analysis ("mutant" or "human").
+        record_id (str): Unique identifier for the DNA record.
+        exists (bool): Whether the DNA sequence was already recorded before this request.
+    """
+    status: str
+    record_id: str
+    exists: bool
+
+class DnaBatchResponse(BaseModel):
+    """
+    Represents a response model for a batch DNA analysis.
+
+    Args:
+        BaseModel (pydantic.BaseModel): Inherits from Pydantic's BaseModel.
+
+    Attributes:
+        results (List[DnaBatchItemResponse]): One result per sample, in request order.
+    """
+    results: List[DnaBatchItemResponse]
@@ -0,0 +1,98 @@
+import asyncio
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from services.mutant_service import flat_bases, use_parallel_detection
+from services.shared_matrix import SharedMatrix, detect_shared
+from services.process_pool import DETECTION_PROCESS_WORKERS, detection_pool
+
+# Matrices with at most this many cells are checked inline, where a process hop costs more than it saves
+DETECTION_INLINE_MAX_CELLS = int(os.getenv("DETECTION_INLINE_MAX_CELLS", 250_000))
+# Number of threads available for blocking database work
+DB_THREAD_WORKERS = int(os.getenv("DB_THREAD_WORKERS", 16))
+
+_process_pool = None
+_thread_pool = None
+
+def start_executors():
+    """
+    Starts the process pool used for detection and the thread pool used for database work.
+    Called once when the application starts.
+    """
+    global _process_pool, _thread_pool
+    if _process_pool is None and DETECTION_PROCESS_WORKERS > 0:
+        _process_pool = detection_pool
+        # Start the workers now rather than on the first large matrix
+        _process_pool.get()
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=DB_THREAD_WORKERS, thread_name_prefix="db")
+
+def shutdown_executors():
+    """
+    Stops both pools, waiting for the work already submitted to finish. The process pool is
+    stopped even if only parallel band scans started it. Called once when the application shuts down.
+    """
+    global _process_pool, _thread_pool
+    detection_pool.shutdown()
+    _process_pool = None
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=True)
+        _thread_pool = None
+
+async def run_detection(detector, dna_sequence):
+    """
+    Runs a mutant detector without blocking the event loop for large matrices.
+
+    Matrices up to DETECTION_INLINE_MAX_CELLS cells, or any matrix when the process pool is
+    not running, are checked inline, without parallel detection. Matrices large enough for parallel detection are checked
+    from a thread, as check_if_mutant then spreads their bands over the process pool. Other
+    large ones are written to shared memory and checked in the process pool. If a worker process
+    dies, the broken pool is replaced and the matrix is checked once more in the new one.
+
+    Args:
+        detector (callable): Detection function, such as check_if_mutant. Must be picklable, accept a DnaMatrix
+                             and a parallel keyword, which is False when it runs inline.
+        dna_sequence (list of str or DnaMatrix): A list of strings representing the DNA matrix.
+
+    Raises:
+        BrokenProcessPool: Raised if a worker process also dies checking the matrix in the new pool.
+
+    Returns:
+        bool: The result of the detector.
+    """
+    if _process_pool is None or len(dna_sequence) ** 2 <= DETECTION_INLINE_MAX_CELLS:
+        # Never scan bands from the event loop, waiting for them would block it
+        return detector(dna_sequence, parallel=False)
+    loop = asyncio.get_running_loop()
+    if use_parallel_detection(len(dna_sequence)):
+        return await loop.run_in_executor(_thread_pool, detector, dna_sequence)
+    for attempt in range(2):
+        pool = _process_pool.get()
+        try:
+            # Hand the bases over through shared memory rather than pickling the matrix to the worker
+            with SharedMatrix(flat_bases(dna_sequence)) as shared:
+                return await loop.run_in_executor(pool, detect_shared, detector, shared.name, len(dna_sequence))
+        except BrokenProcessPool:
+            _process_pool.replace(pool)
+            if attempt:
+                raise
+
+async def run_blocking(func, *args):
+    """
+    Runs a blocking function, such as a repository call, in the database thread pool.
+    Falls back to the event loop's default executor when the pool is not running.
+
+    Args:
+        func (callable): Blocking function to execute.
+        *args: Positional arguments for the function.
+
+    Returns:
+        Any: The result of the function.
+    """
+    loop = asyncio.get_running_loop()
+    # Run in a copy of the caller's context, as asyncio.to_thread does, so per-request context
+    # variables such as the profiling timeline are visible in the thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_thread_pool, partial(context.run, func, *args))
@@ -1,14 +1,61 @@
+import os
+from collections import deque
+from concurrent.futures import as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from multiprocessing import shared_memory
+from services.shared_matrix import SharedMatrix, read_shared
+from services.process_pool import detection_pool
+from utils.dna_codec import DnaMatrix
+
+# Detection engine used by check_if_mutant when none is given explicitly
+MUTANT_ENGINE = os.getenv("MUTANT_ENGINE", "bitboard")
+
+# Parallel detection splits large matrices into row bands scanned by worker processes
+DETECTION_PARALLEL = os.getenv("DETECTION_PARALLEL", "false").lower() in ("1", "true", "yes")
+# Matrices with fewer cells are always scanned in a single process
+DETECTION_PARALLEL_MIN_CELLS = int(os.getenv("DETECTION_PARALLEL_MIN_CELLS", 4_000_000))
+# Rows owned by each band, 0 picks about four bands per detection process
+DETECTION_BAND_ROWS = int(os.getenv("DETECTION_BAND_ROWS", 0))
+
+# Translation tables that turn a base into b"1" and every other byte into b"0"
+_BITBOARD_TABLES = [
+    bytes(ord("1") if byte == base else ord("0") for byte in range(256))
+    for base in b"ATCG"
+]
+
+@lru_cache(maxsize=None)
+def _numpy():
+    """
+    Imports NumPy on first use, so only workers running the "numpy" engine pay for it.
+
+    Returns:
+        tuple: (numpy, codes) where codes is a lookup table that encodes A/T/C/G as 1..4 and any
+               other byte as 0, or None if NumPy is not installed.
+    """
+    try:
+        import numpy as np
+    except ImportError:  # NumPy is optional, only the "numpy" engine needs it
+        return None
+    codes = np.zeros(256, dtype=np.uint8)
+    for code, base in enumerate(b"ATCG", start=1):
+        codes[base] = code
+    return np, codes
+
 def detect_mutant(dna_sequence):
     """
     Detects if a DNA sequence belongs to a mutant.
     Optimized version that uses early termination and efficient direction checking.
 
     Args:
-        dna_sequence (list of str): A list of strings representing the DNA matrix.
+        dna_sequence (list of str or DnaMatrix): A list of strings representing the DNA matrix.
 
     Returns:
         bool: True if the DNA sequence is identified as mutant, False otherwise.
     """
+    if isinstance(dna_sequence, DnaMatrix):
+        # Index plain strings, slicing a row out of the flat bytes for every cell would be slower
+        dna_sequence = dna_sequence.rows()
     n = len(dna_sequence)
     if n < 4:
         return False
@@ -47,15 +94,467 @@ def detect_mutant(dna_sequence):
 
     return False
 
-def check_if_mutant(dna_sequence):
+def _square_rows(dna_sequence):
     """
-    Executes the mutant detection logic.
+    Returns the rows of the DNA matrix trimmed to a square of side n.
+
+    Mirrors the indexing done by detect_mutant: extra columns are never read and
+    a row shorter than n raises IndexError.
 
     Args:
         dna_sequence (list of str): A list of strings representing the DNA matrix.
 
+    Returns:
+        list of str: The n rows of the matrix, each exactly n characters long.
+    """
+    n = len(dna_sequence)
+    rows = [row[:n] for row in dna_sequence]
+    for row in rows:
+        if len(row) < n:
+            raise IndexError("string index out of range")
+    return rows
+
+def flat_bases(dna_sequence):
+    """
+    Returns the bases of the square DNA matrix as flat ASCII bytes, row after row.
+
+    A DnaMatrix already holds them and is used as is; lists of strings are trimmed by
+    _square_rows and encoded, with characters outside ASCII replaced.
+
+    Args:
+        dna_sequence (list of str or DnaMatrix): The DNA matrix.
+
+    Returns:
+        bytes: The n * n bases.
+    """
+    if isinstance(dna_sequence, DnaMatrix):
+        return dna_sequence.data
+    return "".join(_square_rows(dna_sequence)).encode("ascii", "replace")
+
+def detect_mutant_numpy(dna_sequence):
+    """
+    Detects if a DNA sequence belongs to a mutant using NumPy.
+    Encodes the matrix once into a uint8 array and finds runs of four identical bases
+    in every direction with shifted-slice equality masks.
+
+    Args:
+        dna_sequence (list of str or DnaMatrix): A list of strings representing the DNA matrix.
+
+    Returns:
+        bool: True if the DNA sequence is identified as mutant, False otherwise.
+    """
+    loaded = _numpy()
+    if loaded is None:
+        raise RuntimeError("The 'numpy' detection engine requires NumPy to be installed.")
+    np, base_codes = loaded
+
+    n = len(dna_sequence)
+    if n < 4:
+        return False
+
+    # Encode once: A/T/C/G become 1..4, any other character becomes 0 and is skipped
+    flat = flat_bases(dna_sequence)
+    board = base_codes[np.frombuffer(flat, dtype=np.uint8)].reshape(n, n)
+
+    # Slices (first, second, third, fourth) for right, down-right, down, down-left
+    windows = [
+        (board[:, :-3], board[:, 1:-2], board[:, 2:-1], board[:, 3:]),
+        (board[:-3, :-3], board[1:-2, 1:-2], board[2:-1, 2:-1], board[3:, 3:]),
+        (board[:-3, :], board[1:-2, :], board[2:-1, :], board[3:, :]),
+        (board[:-3, 3:], board[1:-2, 2:-1], board[2:-1, 1:-2], board[3:, :-3]),
+    ]
+
+    sequences_found = 0
+    for first, second, third, fourth in windows:
+        mask = (first != 0) & (first == second) & (first == third) & (first == fourth)
+        sequences_found += int(np.count_nonzero(mask))
+        if sequences_found >= 2:
+            return True
+
+    return False
+
+# Masks of boards up to this many cells are cached; larger ones cost little to build next to a
+# scan of the board and would pin megabytes each in the cache
+BITBOARD_MASK_CACHE_MAX_CELLS = 1 << 20
+
+def _bitboard_masks(n, rows=None):
+    """
+    Returns the shift distances and start-column masks used by detect_mutant_bitboard.
+
+    Cells are numbered row * n + col, so a shift by 1 can wrap into the next row. Each mask
+    keeps only the start positions whose run of four stays inside the board. Masks of boards
+    up to BITBOARD_MASK_CACHE_MAX_CELLS cells are cached.
+
+    Args:
+        n (int): Side of the square DNA matrix, the number of columns.
+        rows (int, optional): Number of rows of the board, n by default, fewer for a band of rows.
+
+    Returns:
+        tuple: Pairs of (shift, mask) for right, down-right, down and down-left.
+    """
+    rows = n if rows is None else rows
+    if rows * n <= BITBOARD_MASK_CACHE_MAX_CELLS:
+        return _cached_bitboard_masks(n, rows)
+    return _build_bitboard_masks(n, rows)
+
+def _build_bitboard_masks(n, rows):
+    """
+    Builds the masks returned by _bitboard_masks for a board of rows x n cells.
+    """
+    every_row = ((1 << (rows * n)) - 1) // ((1 << n) - 1)  # bit 0 of every row
+    left_columns = ((1 << (n - 3)) - 1) * every_row         # start columns 0..n-4
+    right_columns = left_columns << 3                        # start columns 3..n-1
+    all_columns = (1 << (rows * n)) - 1
+    return (
+        (1, left_columns),
+        (n + 1, left_columns),
+        (n, all_columns),
+        (n - 1, right_columns),
+    )
+
+_cached_bitboard_masks = lru_cache(maxsize=64)(_build_bitboard_masks)
+
+def detect_mutant_bitboard(dna_sequence):
+    """
+    Detects if a DNA sequence belongs to a mutant using per-base bitboards.
+    Packs each of A/T/C/G into one Python int for the whole board and finds runs of four
+    with shift-and-AND steps per direction, like connect-four engines do. Needs no NumPy.
+
+    Args:
+        dna_sequence (list of str or DnaMatrix): A list of strings representing the DNA matrix.
+
+    Returns:
+        bool: True if the DNA sequence is identified as mutant, False otherwise.
+    """
+    n = len(dna_sequence)
+    if n < 4:
+        return False
+
+    flat = flat_bases(dna_sequence)
+    masks = _bitboard_masks(n)
+
+    sequences_found = 0
+    for table in _BITBOARD_TABLES:
+        # One bit per cell, cell 0 being the least significant bit
+        board = int(flat.translate(table)[::-1], 2)
+        if not board:
+            continue
+        for shift, mask in masks:
+            pairs = board & (board >> shift)
+            runs = pairs & (pairs >> (2 * shift)) & mask
+            sequences_found += runs.bit_count()
+            if sequences_found >= 2:
+                return True
+
+    return False
+
+class StreamingDetector:
+    """
+    Detects mutants in a square DNA matrix fed one row at a time, keeping only the last rows.
+
+    Runs are counted when their last row arrives: horizontal runs within the row, and vertical and
+    diagonal runs from the three rows before it, which are the only rows kept, as one bitmask per
+    base. Memory is O(n) for an n x n matrix and feeding stops mattering as soon as two runs are
+    found. The verdict matches detect_mutant for the same square matrix, including skipping
+    characters other than A/T/C/G.
+
+    Attributes:
+        n (int): Side of the matrix, taken from the length of the first row.
+        rows_read (int): Number of rows fed so far.
+        sequences_found (int): Runs of four found so far, capped once the matrix is known to be mutant.
+        strict (bool): Whether rows with characters other than A/T/C/G are rejected.
+    """
+
+    def __init__(self, strict=False):
+        self.n = None
+        self.rows_read = 0
+        self.sequences_found = 0
+        self.strict = strict
+        self._window = deque(maxlen=3)
+
+    @property
+    def is_mutant(self):
+        """
+        bool: Whether two runs have been found, which no further row can change.
+        """
+        return self.sequences_found >= 2
+
+    def feed(self, row):
+        """
+        Adds the next row of the matrix.
+
+        Args:
+            row (str or bytes): The row, n bases long.
+
+        Raises:
+            ValueError: Raised if the row is longer or shorter than the first one, the matrix has more
+                        rows than columns, or, when strict, the row has characters other than A/T/C/G.
+
+        Returns:
+            bool: True once the matrix is known to be mutant, after which rows are only counted.
+        """
+        if isinstance(row, str):
+            row = row.encode("ascii", "replace")
+        if self.n is None:
+            self.n = len(row)
+        if len(row) != self.n:
+            raise ValueError(f"Row {self.rows_read + 1} has {len(row)} bases, expected {self.n}")
+        if self.rows_read >= self.n:
+            raise ValueError(f"The DNA matrix must be square, it has more than {self.n} rows")
+        if self.strict and row.translate(None, b"ACGT"):
+            raise ValueError(f"Row {self.rows_read + 1} has characters other than A, T, C and G")
+        self.rows_read += 1
+        if self.is_mutant or self.n < 4:
+            return self.is_mutant
+
+        # One bitmask per base, bit j set when column j holds that base
+        reversed_row = row[::-1]
+        masks = [int(reversed_row.translate(table), 2) for table in _BITBOARD_TABLES]
+        found = 0
+        for base, mask in enumerate(masks):
+            if not mask:
+                continue
+            # Horizontal runs starting at column j
+            pairs = mask & (mask >> 1)
+            found += (pairs & (pairs >> 2)).bit_count()
+            if len(self._window) == 3:
+                # Vertical and diagonal runs starting three rows above at column j
+                first, second, third = (rows[base] for rows in self._window)
+                found += (first & second & third & mask).bit_count()
+                found += (first & (second >> 1) & (third >> 2) & (mask >> 3)).bit_count()
+                found += (first & (second << 1) & (third << 2) & (mask << 3)).bit_count()
+        self._window.append(masks)
+        self.sequences_found = min(self.sequences_found + found, 2)
+        return self.is_mutant
+
+    def finish(self):
+        """
+        Checks that the whole matrix was fed and returns the verdict.
+
+        Raises:
+            ValueError: Raised if fewer rows than columns were fed.
+
+        Returns:
+            bool: True if the DNA sequence is identified as mutant, False otherwise.
+        """
+        if self.n is not None and self.rows_read != self.n:
+            raise ValueError(f"The DNA matrix must be square, it has {self.rows_read} rows of {self.n} bases")
+        return self.is_mutant
+
+def detect_mutant_stream(rows):
+    """
+    Detects if a DNA sequence belongs to a mutant from an iterable of rows, with StreamingDetector.
+    Stops reading rows as soon as the verdict is known, so the rest of the matrix is not validated.
+
+    Args:
+        rows (Iterable[str or bytes]): The rows of a square DNA matrix.
+
+    Raises:
+        ValueError: Raised if the matrix is not square.
+
+    Returns:
+        bool: True if the DNA sequence is identified as mutant, False otherwise.
+    """
+    detector = StreamingDetector()
+    for row in rows:
+        if detector.feed(row):
+            return True
+    return detector.finish()
+
+def _count_band_runs(flat, n, rows, owned_rows, limit=2, cancelled=None, on_found=None):
+    """
+    Counts the runs of four that start in the first rows of a band of the board.
+
+    The band holds owned_rows rows plus up to three more below them, so runs starting in the
+    owned rows are found even when they end further down; runs starting in those extra rows
+    belong to the next band and are not counted.
+
+    Args:
+        flat (bytes): The rows of the band, n bases each.
+        n (int): Side of the square DNA matrix.
+        rows (int): Number of rows in the band.
+        owned_rows (int): Number of leading rows whose runs are counted.
+        limit (int): Stop counting once this many runs are found.
+        cancelled (callable, optional): Checked between steps, counting stops when it returns True.
+        on_found (callable, optional): Called with the runs found so far every time the count grows.
+
+    Returns:
+        int: The runs found, at most limit, or fewer when cancelled.
+    """
+    owned = (1 << (owned_rows * n)) - 1
+    masks = [(shift, mask & owned) for shift, mask in _bitboard_masks(n, rows)]
+    found = 0
+    for table in _BITBOARD_TABLES:
+        board = int(flat.translate(table)[::-1], 2)
+        if not board:
+            continue
+        for shift, mask in masks:
+            if cancelled is not None and cancelled():
+                return found
+            pairs = board & (board >> shift)
+            runs = (pairs & (pairs >> (2 * shift)) & mask).bit_count()
+            if runs:
+                found = min(found + runs, limit)
+                if on_found is not None:
+                    on_found(found)
+                if found >= limit:
+                    return found
+    return found
+
+def _scan_band(matrix_name, n, start, stop, owned_rows, counter_name, slot, slots):
+    """
+    Worker process entry point of detect_mutant_parallel, counts the runs of one band.
+
+    The band is read from the matrix in shared memory. The runs found are published in this
+    band's byte of the shared counter as soon as they are found, so the other bands see them while
+    they run, and counting stops as soon as all bands together have found two.
+
+    Args:
+        matrix_name (str): Name of the shared memory segment holding the whole matrix.
+        n (int): Side of the square DNA matrix.
+        start (int): First row of the band.
+        stop (int): Row after the last row of the band, including the overlap.
+        owned_rows (int): Number of leading rows whose runs are counted.
+        counter_name (str): Name of the shared memory segment holding one byte per band.
+        slot (int): Index of this band's byte.
+        slots (int): Number of bands.
+
+    Returns:
+        int: The runs found in the band, capped at 2.
+    """
+    # Spawned pool workers share the resource tracker of the process that created the
+    # segment, so attaching does not make this worker responsible for unlinking it
+    counter = shared_memory.SharedMemory(name=counter_name)
+    try:
+        if sum(counter.buf[:slots]) >= 2:
+            return 0
+        flat = read_shared(matrix_name, start * n, stop * n)
+        def publish(found):
+            counter.buf[slot] = found
+
+        return _count_band_runs(
+            flat, n, stop - start, owned_rows, cancelled=lambda: sum(counter.buf[:slots]) >= 2, on_found=publish
+        )
+    finally:
+        counter.close()
+
+def use_parallel_detection(n):
+    """
+    Tells whether check_if_mutant scans an n x n matrix in parallel bands.
+
+    Args:
+        n (int): Side of the square DNA matrix.
+
+    Returns:
+        bool: True if DETECTION_PARALLEL is enabled, the detection process pool has workers and the
+              matrix has at least DETECTION_PARALLEL_MIN_CELLS cells.
+    """
+    return DETECTION_PARALLEL and detection_pool.max_workers > 0 and n >= 4 and n * n >= DETECTION_PARALLEL_MIN_CELLS
+
+def detect_mutant_parallel(dna_sequence, band_rows=None):
+    """
+    Detects if a DNA sequence belongs to a mutant by scanning row bands in the detection process pool.
+
+    The matrix is written once to shared memory, where every worker reads its band. Each band
+    owns band_rows rows and also reads the three rows below them, so runs crossing into the next
+    band are found; a run is only counted by the band owning its first row, so runs in the overlap
+    are never counted twice. Bands publish their counts in a shared memory counter, one byte each,
+    and every worker stops once two runs have been found in total. Bands are scanned with the
+    bitboard kernel. If a worker process dies, the broken pool is replaced and the bands are
+    scanned once more in the new one.
+
+    Args:
+        dna_sequence (list of str or DnaMatrix): A list of strings representing the DNA matrix.
+        band_rows (int, optional): Rows owned by each band. Defaults to DETECTION_BAND_ROWS, or when
+                                   that is 0 to about four bands per detection process.
+
+    Raises:
+        BrokenProcessPool: Raised if a worker process also dies scanning the bands in the new pool.
+
+    Returns:
+        bool: True if the DNA sequence is identified as mutant, False otherwise.
+    """
+    n = len(dna_sequence)
+    if n < 4:
+        return False
+
+    band_rows = band_rows or DETECTION_BAND_ROWS or max(16, -(-n // (detection_pool.max_workers * 4)))
+    bands = [(start, min(start + band_rows, n)) for start in range(0, n, band_rows)]
+    matrix = SharedMatrix(flat_bases(dna_sequence))
+    try:
+        for attempt in range(2):
+            pool = detection_pool.get()
+            try:
+                return _scan_bands(pool, matrix, n, bands)
+            except BrokenProcessPool:
+                # A worker died: scan again once in a new pool
+                detection_pool.replace(pool)
+                if attempt:
+                    raise
+    finally:
+        matrix.release()
+
+def _scan_bands(pool, matrix, n, bands):
+    """
+    Scans the bands of a matrix in shared memory with the given pool, see detect_mutant_parallel.
+    """
+    counter = SharedMatrix(bytes(len(bands)))
+    try:
+        futures = []
+        for slot, (start, end) in enumerate(bands):
+            futures.append(pool.submit(
+                _scan_band, matrix.name, n, start, min(end + 3, n), end - start, counter.name, slot, len(bands)
+            ))
+        found = 0
+        try:
+            for future in as_completed(futures):
+                found += future.result()
+                if found >= 2:
+                    return True
+        finally:
+            # Bands not started yet are dropped, and running ones return at their next step now
+            # that the counter reaches two; waiting for them means no worker is still attached
+            # when the counter is unlinked
+            for future in futures:
+                future.cancel()
+            wait(futures)
+        return False
+    finally:
+        counter.release()
+
+# Available detection engines, selectable by name in check_if_mutant
+ENGINES = {
+    "loop": detect_mutant,
+    "numpy": detect_mutant_numpy,
+    "bitboard": detect_mutant_bitboard,
+}
+
+def check_if_mutant(dna_sequence, engine=None, parallel=None):
+    """
+    Executes the mutant detection logic.
+
+    Args:
+        dna_sequence (list of str or DnaMatrix): A list of strings representing the DNA matrix.
+        engine (str, optional): Name of the detection engine to use ("loop", "numpy" or "bitboard").
+                                Defaults to the MUTANT_ENGINE environment variable.
+        parallel (bool, optional): Whether to scan the matrix in parallel bands, see detect_mutant_parallel,
+                                   which always use the bitboard kernel. Defaults to False when an engine
+                                   is given, otherwise to use_parallel_detection for the size of the matrix.
+
+    Raises:
+        ValueError: Raised if the engine name is unknown, or if both an engine and parallel are given.
+
     Returns:
         bool: True if the DNA sequence is identified as mutant, False otherwise.
     """
-    is_mutant = detect_mutant(dna_sequence)
+    if engine is not None and parallel:
+        raise ValueError(f"Parallel detection always uses the bitboard kernel, it cannot run the '{engine}' engine")
+    if parallel is None:
+        parallel = engine is None and use_parallel_detection(len(dna_sequence))
+    engine = engine or MUTANT_ENGINE
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown detection engine '{engine}'. Available engines: {', '.join(ENGINES)}")
+    if parallel:
+        return detect_mutant_parallel(dna_sequence)
+    is_mutant = ENGINES[engine](dna_sequence)
     return is_mutant
\ No newline at end of file
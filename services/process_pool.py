@@ -0,0 +1,66 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Number of worker processes for mutant detection (0 runs every detection inline)
+DETECTION_PROCESS_WORKERS = int(os.getenv("DETECTION_PROCESS_WORKERS", os.cpu_count() or 1))
+
+class DetectionPool:
+    """
+    Spawn process pool for detection work, started on first use and replaced when it breaks.
+
+    When one worker is killed, for instance by the out-of-memory killer, a ProcessPoolExecutor
+    is broken for good and every later submission raises BrokenProcessPool. Callers that catch it
+    call replace with the pool they used, and the next call to get starts a fresh one.
+
+    Attributes:
+        max_workers (int): Number of worker processes.
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Returns the running pool, starting it if needed.
+
+        Returns:
+            ProcessPoolExecutor: The pool to submit work to.
+        """
+        with self._lock:
+            if self._pool is None:
+                # Spawned workers do not inherit the event loop, locks or open sockets of the server
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def replace(self, broken):
+        """
+        Drops a broken pool, so the next call to get starts a new one. Does nothing if it was already replaced.
+
+        Args:
+            broken (ProcessPoolExecutor): The pool that raised BrokenProcessPool.
+        """
+        with self._lock:
+            if self._pool is broken:
+                self._pool = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        """
+        Stops the pool, if it was started, waiting for the work already submitted to finish.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+# Pool shared by the detection of whole matrices and the parallel band scans, so a worker never
+# holds more than one set of detection processes
+detection_pool = DetectionPool(DETECTION_PROCESS_WORKERS)
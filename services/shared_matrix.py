@@ -0,0 +1,82 @@
+from multiprocessing import shared_memory
+from utils.dna_codec import DnaMatrix
+
+class SharedMatrix:
+    """
+    Flat DNA bases written once into a shared memory segment, for worker processes to read by name
+    instead of receiving a pickled copy of the matrix. This saves pickling the matrix and sending it
+    through the pool's pipe, but not every copy: each worker copies the range it reads out of the
+    segment, see read_shared.
+
+    The creating process owns the segment and unlinks it when the block ends, whatever happens to
+    the workers. Pool workers spawned by this process share its resource tracker, so if this process
+    dies the tracker still unlinks the segment.
+
+    Attributes:
+        name (str): Name workers attach to.
+        size (int): Number of bytes of bases.
+    """
+
+    def __init__(self, data):
+        self.size = len(data)
+        # A segment cannot be empty
+        self._segment = shared_memory.SharedMemory(create=True, size=max(self.size, 1))
+        self._segment.buf[:self.size] = data
+        self.name = self._segment.name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.release()
+        return False
+
+    def release(self):
+        """
+        Closes and unlinks the segment. Safe to call more than once.
+        """
+        if self._segment is not None:
+            segment, self._segment = self._segment, None
+            segment.close()
+            segment.unlink()
+
+def read_shared(name, start, stop):
+    """
+    Reads a range of bytes from a shared memory segment created by another process.
+
+    The range is copied into the worker's memory, so a worker checking the whole matrix holds one
+    copy of it and a band worker one copy of its band. The engines translate the bases with
+    bytes.translate, which a memoryview of the segment does not offer, and the copy lets the
+    segment be closed right away.
+
+    Args:
+        name (str): Name of the segment.
+        start (int): Offset of the first byte.
+        stop (int): Offset after the last byte.
+
+    Raises:
+        FileNotFoundError: Raised if the segment no longer exists.
+
+    Returns:
+        bytes: A local copy of the range, which the detection engines can translate.
+    """
+    segment = shared_memory.SharedMemory(name=name)
+    try:
+        return bytes(segment.buf[start:stop])
+    finally:
+        segment.close()
+
+def detect_shared(detector, name, n):
+    """
+    Worker process entry point that runs a detector on a matrix held in shared memory.
+
+    Args:
+        detector (callable): Detection function, such as check_if_mutant.
+        name (str): Name of the segment holding the n * n flat bases.
+        n (int): Side of the square DNA matrix.
+
+    Returns:
+        bool: The result of the detector.
+    """
+    # Only the detection engines read it, which accept any bytes, so it is not validated again
+    return detector(DnaMatrix.for_detection(read_shared(name, 0, n * n), n))
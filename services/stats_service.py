@@ -1,11 +1,148 @@
 from repositories.dna_repository import get_daily_counts
+from repositories import async_dna_repository
+from utils.metrics import register_cache
+import os
+import threading
+import time
 
-def get_stats():
+# Seconds the daily counts are served from memory before being read again (0 disables the cache)
+STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", 5))
+# Keep the cached counts current by adding every record saved by this worker
+STATS_CACHE_APPLY_DELTAS = os.getenv("STATS_CACHE_APPLY_DELTAS", "true").lower() in ("1", "true", "yes")
+
+class StatsCache:
+    """
+    In-memory copy of the daily counts behind GET /api/stats.
+
+    The counts are read from the database at most once per TTL. In between, records saved by
+    this worker can be added as deltas, so the cached statistics stay current; records saved
+    by other workers show up after the next reload. A delta is only added to counts loaded before
+    its record was saved, as counts reloaded meanwhile may already include it.
+
+    Attributes:
+        ttl (float): Seconds the counts are served before being reloaded, 0 disables the cache.
+        apply_deltas (bool): Whether records saved by this worker are added to the cached counts.
+        hits (int): Lookups answered from the cached counts.
+        misses (int): Lookups that had to reload the counts.
+    """
+
+    def __init__(self, ttl=STATS_CACHE_TTL, apply_deltas=STATS_CACHE_APPLY_DELTAS):
+        self.ttl = ttl
+        self.apply_deltas = apply_deltas
+        self.hits = 0
+        self.misses = 0
+        self._daily = None
+        self._loaded_at = None
+        # Incremented every time the counts are replaced or dropped
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def lookup(self):
+        """
+        Returns the cached daily counts if they are younger than the TTL.
+
+        Returns:
+            list: (date, mutants, humans) tuples, or None if they must be reloaded.
+        """
+        with self._lock:
+            if self._daily is None or not self.ttl or time.monotonic() - self._loaded_at > self.ttl:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return [(day, counts[0], counts[1]) for day, counts in self._daily.items()]
+
+    def store(self, daily_counts):
+        """
+        Replaces the cached daily counts with a fresh copy read from the database.
+
+        Args:
+            daily_counts (list): (date, mutants, humans) tuples.
+        """
+        with self._lock:
+            self._daily = {day: [mutants, humans] for day, mutants, humans in daily_counts}
+            self._loaded_at = time.monotonic()
+            self._generation += 1
+
+    def generation(self):
+        """
+        Returns the generation of the cached counts, read before saving records whose deltas are applied.
+
+        Returns:
+            int: A number that changes every time the counts are replaced or dropped.
+        """
+        with self._lock:
+            return self._generation
+
+    def apply_delta(self, day, is_mutant, generation=None):
+        """
+        Adds a newly saved record to the cached counts, if deltas are enabled and counts are cached.
+
+        Args:
+            day (date): The date the record was saved with.
+            is_mutant (bool): Whether the record is a mutant.
+            generation (int, optional): The generation read before the record was saved. If the counts
+                                        were reloaded since, they may already include the record and
+                                        the delta is skipped.
+        """
+        if not self.apply_deltas:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if self._daily is not None:
+                counts = self._daily.setdefault(day, [0, 0])
+                counts[0 if is_mutant else 1] += 1
+
+    def age(self):
+        """
+        Returns the seconds elapsed since the counts were read from the database.
+
+        Returns:
+            float: The age of the cached counts, or None if nothing is cached.
+        """
+        with self._lock:
+            return None if self._loaded_at is None else time.monotonic() - self._loaded_at
+
+    def clear(self):
+        """
+        Drops the cached counts, so the next request reads them from the database, and resets the counters.
+        """
+        with self._lock:
+            self._daily = None
+            self._loaded_at = None
+            self._generation += 1
+            self.hits = self.misses = 0
+
+    def stats(self):
+        """
+        Returns the current size and counters of the cache.
+
+        Returns:
+            dict: size (number of cached days), hits, misses and hit_ratio.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": 0 if self._daily is None else len(self._daily),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
+
+# Cache shared by the statistics endpoint of this worker
+stats_cache = StatsCache()
+register_cache("stats", stats_cache.stats)
+
+def get_stats(force_refresh=False):
     """
     Calculates statistics for mutant and human DNA sequences recorded in the database.
 
     Retrieves daily counts of mutants and humans, then aggregates total counts, calculates
     the mutant ratio, and identifies the days with the highest number of mutants and humans.
+    The daily counts are served from stats_cache while they are younger than STATS_CACHE_TTL.
+
+    Args:
+        force_refresh (bool): Read the daily counts from the database even if the cached ones are fresh.
 
     Returns:
         dict: A dictionary containing:
@@ -15,8 +152,38 @@ def get_stats():
               - "most_mutants_day" (str): Date with the highest recorded mutants, in "YYYY-MM-DD" format.
               - "most_humans_day" (str): Date with the highest recorded humans, in "YYYY-MM-DD" format.
     """
-    daily_counts = get_daily_counts()
+    daily_counts = None if force_refresh else stats_cache.lookup()
+    if daily_counts is None:
+        daily_counts = get_daily_counts()
+        stats_cache.store(daily_counts)
+    return summarize_daily_counts(daily_counts)
+
+async def get_stats_async(force_refresh=False):
+    """
+    Asynchronous version of get_stats that reads the daily counts through the asyncpg repository.
+
+    Args:
+        force_refresh (bool): Read the daily counts from the database even if the cached ones are fresh.
+
+    Returns:
+        dict: The same statistics returned by get_stats.
+    """
+    daily_counts = None if force_refresh else stats_cache.lookup()
+    if daily_counts is None:
+        daily_counts = await async_dna_repository.get_daily_counts()
+        stats_cache.store(daily_counts)
+    return summarize_daily_counts(daily_counts)
+
+def summarize_daily_counts(daily_counts):
+    """
+    Aggregates daily counts of mutants and humans into the statistics returned by get_stats.
+
+    Args:
+        daily_counts (list): List of (date, mutants, humans) tuples.
 
+    Returns:
+        dict: The same statistics returned by get_stats.
+    """
     # Sum all mutants and humans
     count_mutant_dna = sum(day[1] for day in daily_counts)  # Sum of the 'mutants' column
     count_human_dna = sum(day[2] for day in daily_counts)   # Sum of the 'humans' column
@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from utils.metrics import register_cache
+
+# Maximum number of sequences kept in the verdict cache (0 disables it)
+VERDICT_CACHE_SIZE = int(os.getenv("VERDICT_CACHE_SIZE", 10_000))
+# Seconds a cached verdict stays valid (0 keeps it until it is evicted)
+VERDICT_CACHE_TTL = float(os.getenv("VERDICT_CACHE_TTL", 3600))
+
+class VerdictCache:
+    """
+    Bounded, thread-safe LRU cache of recorded DNA sequences keyed by sequence digest.
+
+    Only results returned by the repository are stored, so a cached entry always holds the
+    verdict and record_id of the row in the database, even when another worker wrote it.
+
+    Attributes:
+        maxsize (int): Maximum number of entries, 0 disables the cache.
+        ttl (float): Seconds an entry stays valid, 0 for no expiry.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups not found in the cache, or found expired.
+        evictions (int): Entries dropped to stay within maxsize.
+    """
+
+    def __init__(self, maxsize=VERDICT_CACHE_SIZE, ttl=VERDICT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest):
+        """
+        Returns the recorded verdict of a sequence if it is cached and not expired.
+
+        Args:
+            digest (bytes): Digest of the normalized DNA sequence.
+
+        Returns:
+            dict: {"is_mutant": bool, "record_id": str}, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None or (self.ttl and time.monotonic() - entry[2] > self.ttl):
+                if entry is not None:
+                    del self._entries[digest]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return {"is_mutant": entry[0], "record_id": entry[1]}
+
+    def put(self, digest, is_mutant, record_id):
+        """
+        Stores the recorded verdict of a sequence, evicting the least recently used entries if needed.
+
+        Args:
+            digest (bytes): Digest of the normalized DNA sequence.
+            is_mutant (bool): Mutant status stored in the database.
+            record_id (str): ID of the record stored in the database.
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[digest] = (is_mutant, record_id, time.monotonic())
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Drops every entry and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Returns the current size and counters of the cache.
+
+        Returns:
+            dict: size, maxsize, hits, misses, evictions and hit_ratio.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
+
+# Cache shared by the API handlers of this worker
+verdict_cache = VerdictCache()
+register_cache("verdict", verdict_cache.stats)
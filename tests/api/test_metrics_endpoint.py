@@ -0,0 +1,45 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from prometheus_client import REGISTRY
+from api import metrics, mutant
+from services.verdict_cache import verdict_cache
+
+app = FastAPI()
+app.include_router(mutant.router)
+app.include_router(metrics.router)
+client = TestClient(app)
+
+def _sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+def test_metrics_endpoint():
+    """
+    Test case for the /metrics endpoint, which exposes the metrics in the Prometheus text format.
+    """
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "mutant_stage_seconds" in response.text
+    assert 'cache_hit_ratio{cache="verdict"}' in response.text
+    assert 'cache_hit_ratio{cache="stats"}' in response.text
+
+@patch("api.mutant.save_dna")
+def test_mutant_request_stages(mock_save_dna):
+    """
+    Test case for a /mutant request, which must observe every stage and count its verdict.
+    """
+    verdict_cache.clear()
+    mock_save_dna.return_value = {"exists": False, "is_mutant": True, "record_id": "id-1"}
+    stages = ["parse", "join", "encode", "detect", "db_save"]
+    before = {stage: _sample("mutant_stage_seconds_count", {"stage": stage}) for stage in stages}
+    verdicts = _sample("mutant_verdicts_total", {"verdict": "mutant", "result": "new"})
+
+    response = client.post("/mutant", json={"dna": ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]})
+
+    assert response.status_code == 200
+    for stage in stages:
+        assert _sample("mutant_stage_seconds_count", {"stage": stage}) == before[stage] + 1
+    assert _sample("mutant_verdicts_total", {"verdict": "mutant", "result": "new"}) == verdicts + 1
+    verdict_cache.clear()
@@ -1,12 +1,25 @@
+import asyncio
+import json
 import uuid
 from fastapi.testclient import TestClient
 from unittest.mock import patch
-from api.mutant import router
-from fastapi import HTTPException
+from api.mutant import router, _read_ndjson_lines
+from utils.dna_codec import DnaMatrix, decode_verdict
+from services.verdict_cache import verdict_cache
+from fastapi import FastAPI, HTTPException
 import pytest
 
 client = TestClient(router)
 
+@pytest.fixture(autouse=True)
+def clear_verdict_cache():
+    """
+    Start every test with an empty verdict cache, so mocked results are never answered from it.
+    """
+    verdict_cache.clear()
+    yield
+    verdict_cache.clear()
+
 @patch("api.mutant.save_dna")
 @patch("api.mutant.check_if_mutant")
 def test_is_mutant_new_mutant(mock_check_if_mutant, mock_save_dna):
@@ -99,4 +112,276 @@ def test_is_mutant_existing_human(mock_check_if_mutant, mock_save_dna):
 
     # Verify that the exception is HTTP 403 with the correct message
     assert exc_info.value.status_code == 403
-    assert "already recorded as human" in str(exc_info.value.detail)
\ No newline at end of file
+    assert "already recorded as human" in str(exc_info.value.detail)
+
+@patch("api.mutant.save_dna_batch")
+@patch("api.mutant.check_if_mutant")
+def test_is_mutant_batch(mock_check_if_mutant, mock_save_dna_batch):
+    """
+    Test case for the batch endpoint, which reports a status per sample instead of raising errors.
+
+    Args:
+        mock_check_if_mutant (MagicMock): Mock for the check_if_mutant function.
+        mock_save_dna_batch (MagicMock): Mock for the save_dna_batch function.
+    """
+    # Mock one new mutant and one already recorded human
+    mock_check_if_mutant.side_effect = [True, False]
+    mock_save_dna_batch.return_value = [
+        {"exists": False, "is_mutant": True, "record_id": "mutant_id"},
+        {"exists": True, "is_mutant": False, "record_id": "human_id"}
+    ]
+
+    batch_request = {"samples": [
+        {"dna": ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]},
+        {"dna": ["ATGCGA", "CAGTGC", "TTATTT", "AGACGG", "GCGTCA", "TCACTG"]}
+    ]}
+    response = client.post("/mutant/batch", json=batch_request)
+
+    # Verify that both samples were saved in one call and reported in order
+    assert response.status_code == 200
+    assert response.json()["results"] == [
+        {"status": "mutant", "record_id": "mutant_id", "exists": False},
+        {"status": "human", "record_id": "human_id", "exists": True}
+    ]
+    mock_save_dna_batch.assert_called_once()
+    assert [is_mutant for _, _, is_mutant in mock_save_dna_batch.call_args[0][0]] == [True, False]
+
+@patch("api.mutant.DB_DRIVER", "asyncpg")
+@patch("api.mutant.async_dna_repository.save_dna")
+@patch("api.mutant.check_if_mutant")
+def test_is_mutant_asyncpg_driver(mock_check_if_mutant, mock_async_save_dna):
+    """
+    Test case for a new mutant when the asyncpg driver is selected, so the async repository is awaited.
+
+    Args:
+        mock_check_if_mutant (MagicMock): Mock for the check_if_mutant function.
+        mock_async_save_dna (AsyncMock): Mock for the async save_dna function.
+    """
+    mock_check_if_mutant.return_value = True
+    mock_async_save_dna.return_value = {"exists": False, "is_mutant": True, "record_id": "async_id"}
+
+    dna_request = {"dna": ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]}
+    response = client.post("/mutant", json=dna_request)
+
+    assert response.status_code == 200
+    assert response.json()["record_id"] == "async_id"
+    mock_async_save_dna.assert_awaited_once()
+
+@patch("api.mutant.save_dna")
+@patch("api.mutant.check_if_mutant")
+def test_is_mutant_repeat_answered_from_cache(mock_check_if_mutant, mock_save_dna):
+    """
+    Test case for a repeated submission, which is answered from the verdict cache
+    without running detection or touching the database again.
+
+    Args:
+        mock_check_if_mutant (MagicMock): Mock for the check_if_mutant function.
+        mock_save_dna (MagicMock): Mock for the save_dna function.
+    """
+    mock_check_if_mutant.return_value = True
+    mock_save_dna.return_value = {"exists": False, "is_mutant": True, "record_id": "mutant_id"}
+
+    dna_request = {"dna": ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]}
+    assert client.post("/mutant", json=dna_request).status_code == 200
+
+    # The second submission must report the recorded mutant from the cache
+    with pytest.raises(HTTPException) as exc_info:
+        client.post("/mutant", json=dna_request)
+
+    assert exc_info.value.status_code == 403
+    assert "already recorded as mutant" in str(exc_info.value.detail)
+    mock_check_if_mutant.assert_called_once()
+    mock_save_dna.assert_called_once()
+
+@pytest.mark.parametrize("dna", [["ATGC", "ATGC", "ATG", "ATGC"], ["ATG", "ATG"], ["ATGX", "ATGC", "ATGC", "ATGC"], []])
+@patch("api.mutant.save_dna")
+@patch("api.mutant.check_if_mutant")
+def test_is_mutant_invalid_matrix(mock_check_if_mutant, mock_save_dna, dna):
+    """
+    Test case for ragged, non-square, empty or non-A/T/C/G matrices, which are rejected with 422
+    before reaching detection or the database.
+
+    Args:
+        mock_check_if_mutant (MagicMock): Mock for the check_if_mutant function.
+        mock_save_dna (MagicMock): Mock for the save_dna function.
+        dna (list): The invalid DNA matrix.
+    """
+    app = FastAPI()
+    app.include_router(router)
+
+    response = TestClient(app).post("/mutant", json={"dna": dna})
+
+    assert response.status_code == 422
+    mock_check_if_mutant.assert_not_called()
+    mock_save_dna.assert_not_called()
+
+@pytest.mark.parametrize("packed", [True, False])
+@patch("api.mutant.save_dna")
+@patch("api.mutant.check_if_mutant")
+def test_is_mutant_binary(mock_check_if_mutant, mock_save_dna, packed):
+    """
+    Test case for a matrix sent in the binary wire format, answered in the compact binary form.
+
+    Args:
+        mock_check_if_mutant (MagicMock): Mock for the check_if_mutant function.
+        mock_save_dna (MagicMock): Mock for the save_dna function.
+        packed (bool): Whether the bases are sent at 2 bits each or one byte each.
+    """
+    matrix = DnaMatrix.from_rows(["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"])
+    mock_check_if_mutant.return_value = True
+    mock_save_dna.return_value = {"exists": False, "is_mutant": True, "record_id": "new_id"}
+
+    response = client.post("/mutant", content=matrix.to_wire(packed), headers={
+        "Content-Type": "application/octet-stream", "Accept": "application/octet-stream"
+    })
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/octet-stream"
+    assert decode_verdict(response.content) == {"is_mutant": True, "exists": False, "record_id": "new_id"}
+    # The detector gets the decoded matrix itself, and the repository its packed form and digest
+    assert mock_check_if_mutant.call_args[0][0] == matrix
+    assert mock_save_dna.call_args[0][1].digest == matrix.digest
+
+@patch("api.mutant.save_dna")
+@patch("api.mutant.check_if_mutant")
+def test_is_mutant_binary_invalid(mock_check_if_mutant, mock_save_dna):
+    """
+    Test case for a binary body whose data does not match its header, which is rejected with 422.
+
+    Args:
+        mock_check_if_mutant (MagicMock): Mock for the check_if_mutant function.
+        mock_save_dna (MagicMock): Mock for the save_dna function.
+    """
+    app = FastAPI()
+    app.include_router(router)
+    body = DnaMatrix.from_rows(["ATGC", "CAGT", "TTAT", "AGAA"]).to_wire(packed=False)[:-1]
+
+    response = TestClient(app).post("/mutant", content=body, headers={"Content-Type": "application/octet-stream"})
+
+    assert response.status_code == 422
+    mock_check_if_mutant.assert_not_called()
+
+@patch("api.mutant.DETAIL_MAX_BASES", 10)
+@patch("api.mutant.save_dna")
+@patch("api.mutant.check_if_mutant")
+def test_is_mutant_large_detail(mock_check_if_mutant, mock_save_dna):
+    """
+    Test case for a matrix larger than DETAIL_MAX_BASES, whose detail has its size and first bases only.
+
+    Args:
+        mock_check_if_mutant (MagicMock): Mock for the check_if_mutant function.
+        mock_save_dna (MagicMock): Mock for the save_dna function.
+    """
+    mock_check_if_mutant.return_value = False
+    mock_save_dna.return_value = {"exists": True, "is_mutant": False, "record_id": "existing_id"}
+
+    with pytest.raises(HTTPException) as exc_info:
+        client.post("/mutant", json={"dna": ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]})
+
+    assert exc_info.value.status_code == 403
+    assert exc_info.value.detail == "The 6x6 DNA sequence 'ATGCGACAGT...' is already recorded as human."
+
+@patch("api.mutant.NDJSON_CHUNK_SIZE", 2)
+@patch("api.mutant.save_dna_batch")
+@patch("api.mutant.check_if_mutant")
+def test_is_mutant_stream(mock_check_if_mutant, mock_save_dna_batch):
+    """
+    Test case for the NDJSON stream endpoint, which saves samples in chunks and returns one
+    result line per input line, including an error line for invalid input.
+
+    Args:
+        mock_check_if_mutant (MagicMock): Mock for the check_if_mutant function.
+        mock_save_dna_batch (MagicMock): Mock for the save_dna_batch function.
+    """
+    mock_check_if_mutant.return_value = True
+    mock_save_dna_batch.side_effect = lambda records: [
+        {"exists": False, "is_mutant": is_mutant, "record_id": record_id} for record_id, _, is_mutant in records
+    ]
+
+    body = "\n".join([
+        '{"dna": ["AAAA", "AAAA", "CTGC", "GCTA"]}',
+        '{"dna": ["CCCC", "CCCC", "CTGC", "GCTA"]}',
+        '{"not_dna": true}',
+        '{"dna": ["GGGG", "GGGG", "CTGC", "GCTA"]}'
+    ])
+    response = client.post("/mutant/stream", content=body)
+
+    assert response.status_code == 200
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [result.get("status") for result in results] == ["mutant", "mutant", None, "mutant"]
+    assert results[2]["error"][0]["type"] == "missing"
+    assert results[2]["error"][0]["loc"] == ["dna"]
+    # Two chunks of at most two lines each
+    assert mock_save_dna_batch.call_count == 2
+
+@patch("api.mutant.NDJSON_MAX_LINE_BYTES", 16)
+@patch("api.mutant.save_dna_batch")
+@patch("api.mutant.check_if_mutant")
+def test_is_mutant_stream_errors(mock_check_if_mutant, mock_save_dna_batch):
+    """
+    Test case for the NDJSON stream endpoint with an invalid matrix and a line too long, which ends
+    the body, and with a ValueError while saving, which is not reported as a line error.
+
+    Args:
+        mock_check_if_mutant (MagicMock): Mock for the check_if_mutant function.
+        mock_save_dna_batch (MagicMock): Mock for the save_dna_batch function.
+    """
+    mock_check_if_mutant.return_value = True
+    mock_save_dna_batch.side_effect = lambda records: [
+        {"exists": False, "is_mutant": is_mutant, "record_id": record_id} for record_id, _, is_mutant in records
+    ]
+
+    response = client.post("/mutant/stream", content='{"dna": ["AT", "A"]}\n{"dna": ["AAAA", "AAAA", "CTGC", "GCTA"]}')
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert results[0]["error"][0]["type"] == "value_error"
+    assert results[1] == {"error": "NDJSON line longer than 16 bytes"}
+    assert mock_save_dna_batch.call_count == 0
+
+    mock_save_dna_batch.side_effect = ValueError("database rejected the batch")
+    with pytest.raises(ValueError):
+        client.post("/mutant/stream", content='{"dna":["A"]}')
+    assert mock_save_dna_batch.call_count == 1
+
+def test_read_ndjson_lines_across_chunks():
+    """
+    Test case for _read_ndjson_lines when lines are split across body chunks and blank lines are present.
+    """
+    async def body():
+        for chunk in [b'{"dna": ["AT",', b' "GC"]}\n\n{"dna"', b': ["CC", "CC"]}']:
+            yield chunk
+
+    async def collect():
+        return [line async for line in _read_ndjson_lines(body())]
+
+    assert asyncio.run(collect()) == [b'{"dna": ["AT", "GC"]}', b'{"dna": ["CC", "CC"]}']
+
+@pytest.mark.parametrize("body, status_code, rows_read", [
+    (b"AAAAT\nCGCGC\nTTTTG\nCGCGC\nGCGCA\n", 200, 3),
+    (b"ATGCGA\r\nCAGTGC\r\nTTATTT\r\nAGACGG\r\nGCGTCA\r\nTCACTG", 403, None),
+    (b"ATGC\nATGC\nATG\nATGC\n", 422, None),
+    (b"ATGC\nATGC\n", 422, None),
+    (b"ATGX\nATGC\nATGC\nATGC\n", 422, None),
+    (b"", 422, None),
+])
+def test_is_mutant_rows(body, status_code, rows_read):
+    """
+    Test case for the row streaming endpoint, which reads rows until the verdict is known.
+
+    Args:
+        body (bytes): The request body, one row per line.
+        status_code (int): The expected response status.
+        rows_read (int): The expected number of rows read for a mutant.
+    """
+    app = FastAPI()
+    app.include_router(router)
+
+    def chunks():
+        for start in range(0, len(body), 7):
+            yield body[start:start + 7]
+
+    response = TestClient(app).post("/mutant/rows", content=chunks(), headers={"Content-Type": "text/plain"})
+
+    assert response.status_code == status_code
+    if rows_read is not None:
+        assert response.json() == {"status": "mutant", "rows_read": rows_read}
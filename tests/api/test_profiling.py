@@ -0,0 +1,68 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from api import mutant
+from api.profiling import ProfilingMiddleware, format_timeline, server_timing
+from services.verdict_cache import verdict_cache
+import pytest
+
+MUTANT_DNA = {"dna": ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]}
+
+@pytest.fixture
+def client(tmp_path):
+    """
+    Client of an app serving /mutant behind the profiling middleware, dumping to a temporary directory.
+    """
+    app = FastAPI()
+    app.include_router(mutant.router)
+    app.add_middleware(ProfilingMiddleware, secret="s3cret", dump_dir=str(tmp_path))
+    verdict_cache.clear()
+    yield TestClient(app)
+    verdict_cache.clear()
+
+@patch("api.mutant.save_dna")
+def test_profiled_request(mock_save_dna, client, tmp_path):
+    """
+    Test case for a request with the profiling secret, which gets timing headers and leaves its dumps.
+    """
+    mock_save_dna.return_value = {"exists": False, "is_mutant": True, "record_id": "id-1"}
+
+    response = client.post("/mutant", json=MUTANT_DNA, headers={"X-Profile": "s3cret"})
+
+    assert response.status_code == 200
+    assert response.json()["record_id"] == "id-1"
+    profile_id = response.headers["x-profile-id"]
+    timing = response.headers["server-timing"]
+    for stage in ("parse", "detect", "db_save", "total"):
+        assert f"{stage};dur=" in timing
+    assert (tmp_path / f"{profile_id}.prof").exists()
+    report = (tmp_path / f"{profile_id}.txt").read_text()
+    assert report.startswith("POST /mutant")
+    assert "detection" in report and "database" in report
+    assert "function calls" in report
+
+@patch("api.mutant.save_dna")
+def test_request_without_secret_is_not_profiled(mock_save_dna, client, tmp_path):
+    """
+    Test case for requests without the header or with a wrong secret, which are served unchanged.
+    """
+    mock_save_dna.return_value = {"exists": False, "is_mutant": True, "record_id": "id-1"}
+
+    for headers in ({}, {"X-Profile": "wrong"}):
+        verdict_cache.clear()
+        response = client.post("/mutant", json=MUTANT_DNA, headers=headers)
+        assert response.status_code == 200
+        assert "x-profile-id" not in response.headers
+        assert "server-timing" not in response.headers
+    assert list(tmp_path.iterdir()) == []
+
+def test_timeline_formatting():
+    """
+    Test case for server_timing and format_timeline, which add up repeated stages.
+    """
+    timeline = [("detect", 10.001, 0.002), ("db_save", 10.004, 0.003), ("detect", 10.008, 0.001)]
+
+    assert server_timing(timeline, 0.010) == "detect;dur=3.000, db_save;dur=3.000, total;dur=10.000"
+    report = format_timeline(timeline, 10.0, 0.010)
+    assert "detection 3.000 ms, database 3.000 ms, other 4.000 ms" in report
+    assert report.index("db_save") < report.rindex("detect")
@@ -33,3 +33,24 @@ def test_stats(mock_get_stats):
     assert data["ratio"] == pytest.approx(36.36, rel=0.01)
     assert data["most_mutants_day"] == "2024-11-08"
     assert data["most_humans_day"] == "2024-11-09"
+
+@patch("api.stats.get_stats")
+def test_stats_force_refresh(mock_get_stats):
+    """
+    Test case for the /stats endpoint with ?refresh=true, which must bypass the statistics cache.
+
+    Args:
+        mock_get_stats (MagicMock): Mock for the get_stats function to simulate database response.
+    """
+    mock_get_stats.return_value = {
+        "count_mutant_dna": 4,
+        "count_human_dna": 7,
+        "ratio": 36.36,
+        "most_mutants_day": "2024-11-08",
+        "most_humans_day": "2024-11-09"
+    }
+
+    response = client.get("/stats", params={"refresh": "true"})
+
+    assert response.status_code == 200
+    mock_get_stats.assert_called_once_with(True)
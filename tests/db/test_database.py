@@ -1,4 +1,8 @@
-from unittest.mock import patch
+import psycopg2
+import pytest
+from unittest.mock import patch, MagicMock
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
 import db.database as db
 
 @patch('db.database.psycopg2.connect')
@@ -15,29 +19,200 @@ def test_get_db_connection(mock_connect):
     mock_connect.assert_called_once()  # Ensure psycopg2.connect was called exactly once
     assert conn == mock_connect.return_value  # Verify that it returns the mocked connection
 
-@patch('db.database.get_db_connection')
-def test_initialize_db(mock_get_db_connection):
+@patch('db.database.db_connection')
+def test_initialize_db(mock_db_connection):
     """
     Test case for initialize_db to verify that it creates the dna_records table
-    if it does not already exist.
+    and its digest index if they do not already exist.
 
     Args:
-        mock_get_db_connection (MagicMock): Mock for the get_db_connection function.
+        mock_db_connection (MagicMock): Mock for the pooled db_connection context manager.
     """
-    # Simulate the database connection and cursor
-    mock_conn = mock_get_db_connection.return_value
+    # Simulate the borrowed database connection and cursor
+    mock_conn = mock_db_connection.return_value.__enter__.return_value
     mock_cursor = mock_conn.cursor.return_value
 
     # Execute initialize_db
     db.initialize_db()
 
-    # Verify that cursor and commit were called with the correct SQL statement
-    mock_cursor.execute.assert_called_once_with('''
+    # Verify that cursor and commit were called with the correct SQL statements
+    mock_cursor.execute.assert_any_call('''
     CREATE TABLE IF NOT EXISTS dna_records (
         id TEXT PRIMARY KEY,
         dna_sequence TEXT,
         is_mutant BOOLEAN,
         date TIMESTAMP DEFAULT CURRENT_DATE
     )''')
+    mock_cursor.execute.assert_any_call("CREATE UNIQUE INDEX IF NOT EXISTS dna_records_dna_digest_idx ON dna_records (dna_digest)")
     mock_conn.commit.assert_called_once()
-    mock_conn.close.assert_called_once()
+
+@patch('db.database.db_connection')
+def test_initialize_db_fills_new_daily_stats(mock_db_connection):
+    """
+    Test case for initialize_db to verify that the per-day counters are filled from the
+    existing records only when their table is created.
+
+    Args:
+        mock_db_connection (MagicMock): Mock for the pooled db_connection context manager.
+    """
+    mock_cursor = mock_db_connection.return_value.__enter__.return_value.cursor.return_value
+
+    # Simulate a database where dna_daily_stats does not exist yet
+    mock_cursor.fetchone.return_value = (False,)
+    db.initialize_db()
+    mock_cursor.execute.assert_any_call(db.FILL_DAILY_STATS)
+
+    # Simulate a database where it already exists
+    mock_cursor.reset_mock()
+    mock_cursor.fetchone.return_value = (True,)
+    db.initialize_db()
+    assert db.FILL_DAILY_STATS not in [call.args[0] for call in mock_cursor.execute.call_args_list]
+
+@patch('db.database.ThreadedConnectionPool')
+def test_db_connection_returns_connection_to_pool(mock_pool_class):
+    """
+    Test case for db_connection to ensure that the borrowed connection is given back to the pool,
+    and that a connection found closed is discarded and replaced.
+
+    Args:
+        mock_pool_class (MagicMock): Mock for psycopg2's ThreadedConnectionPool class.
+    """
+    # Simulate a pool whose first connection was closed by the server
+    closed_conn = MagicMock(closed=1)
+    healthy_conn = MagicMock(closed=0)
+    healthy_conn.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_IDLE
+    mock_pool = mock_pool_class.return_value
+    mock_pool.getconn.side_effect = [closed_conn, healthy_conn]
+
+    db.close_pool()
+    try:
+        with db.db_connection() as conn:
+            assert conn is healthy_conn
+    finally:
+        db.close_pool()
+
+    # Verify that the closed connection was discarded and the healthy one returned
+    mock_pool.putconn.assert_any_call(closed_conn, close=True)
+    mock_pool.putconn.assert_any_call(healthy_conn, close=False)
+    mock_pool.closeall.assert_called_once()
+
+@patch('db.database.ThreadedConnectionPool')
+def test_db_connection_raises_without_healthy_connection(mock_pool_class):
+    """
+    Test case for db_connection to ensure that a PoolError is raised, and every connection discarded,
+    when the pool only hands out closed connections.
+
+    Args:
+        mock_pool_class (MagicMock): Mock for psycopg2's ThreadedConnectionPool class.
+    """
+    # Simulate a pool where the server closed every idle connection
+    closed_conns = [MagicMock(closed=1) for _ in range(db.DB_POOL_MAX_SIZE + 1)]
+    mock_pool = mock_pool_class.return_value
+    mock_pool.getconn.side_effect = closed_conns
+
+    db.close_pool()
+    try:
+        with pytest.raises(PoolError):
+            with db.db_connection():
+                pass
+    finally:
+        db.close_pool()
+
+    # Verify that no closed connection was handed out or kept in the pool
+    for conn in closed_conns:
+        mock_pool.putconn.assert_any_call(conn, close=True)
+
+@patch('db.database._schema_ready', False)
+@patch('db.maintenance.pack_sequences')
+@patch('db.database.get_db_connection')
+@patch('db.database.initialize_db')
+@patch('db.database.db_connection')
+def test_ensure_schema_runs_once(mock_db_connection, mock_initialize_db, mock_get_db_connection, mock_pack_sequences):
+    """
+    Test case for ensure_schema to verify that the DDL and the packing of text records run under the
+    schema advisory lock on a database missing the schema, and that the check is not repeated once it succeeded.
+
+    Args:
+        mock_db_connection (MagicMock): Mock for the pooled db_connection context manager.
+        mock_initialize_db (MagicMock): Mock for initialize_db.
+        mock_get_db_connection (MagicMock): Mock for the unpooled connection holding the advisory lock.
+        mock_pack_sequences (MagicMock): Mock for db.maintenance.pack_sequences.
+    """
+    mock_cursor = mock_db_connection.return_value.__enter__.return_value.cursor.return_value
+    mock_cursor.fetchone.return_value = (False,)
+    mock_pack_sequences.return_value = 0
+
+    db.ensure_schema()
+    db.ensure_schema()
+
+    # Checked once before taking the lock and once more while holding it
+    assert [call.args[0] for call in mock_cursor.execute.call_args_list] == [db.SCHEMA_IS_CURRENT] * 2
+    lock_conn = mock_get_db_connection.return_value
+    lock_conn.cursor.return_value.__enter__.return_value.execute.assert_called_once_with(
+        "SELECT pg_advisory_lock(%s)", (db.SCHEMA_LOCK_ID,)
+    )
+    mock_initialize_db.assert_called_once()
+    mock_pack_sequences.assert_called_once()
+    lock_conn.close.assert_called_once()
+
+@patch('db.database._schema_ready', False)
+@patch('db.maintenance.pack_sequences')
+@patch('db.database.get_db_connection')
+@patch('db.database.initialize_db')
+@patch('db.database.db_connection')
+def test_ensure_schema_packs_text_records(mock_db_connection, mock_initialize_db, mock_get_db_connection, mock_pack_sequences):
+    """
+    Test case for ensure_schema on a current schema with text records left to pack, which are
+    packed before the application serves requests.
+
+    Args:
+        mock_db_connection (MagicMock): Mock for the pooled db_connection context manager.
+        mock_initialize_db (MagicMock): Mock for initialize_db.
+        mock_get_db_connection (MagicMock): Mock for the unpooled connection holding the advisory lock.
+        mock_pack_sequences (MagicMock): Mock for db.maintenance.pack_sequences.
+    """
+    mock_cursor = mock_db_connection.return_value.__enter__.return_value.cursor.return_value
+    # Schema current, text records pending, then the same again once the lock is held
+    mock_cursor.fetchone.side_effect = [(True,), (True,), (True,), (True,)]
+    mock_pack_sequences.return_value = 3
+
+    db.ensure_schema()
+
+    assert [call.args[0] for call in mock_cursor.execute.call_args_list] == [
+        db.SCHEMA_IS_CURRENT, db.UNPACKED_RECORDS_PENDING
+    ] * 2
+    mock_pack_sequences.assert_called_once()
+
+@patch('db.database._schema_ready', False)
+@patch('db.database.time.sleep')
+@patch('db.database.initialize_db')
+@patch('db.database.db_connection')
+def test_ensure_schema_retries(mock_db_connection, mock_initialize_db, mock_sleep):
+    """
+    Test case for ensure_schema to verify that connection failures are retried with exponential
+    backoff, and raised once the retries are exhausted.
+
+    Args:
+        mock_db_connection (MagicMock): Mock for the pooled db_connection context manager.
+        mock_initialize_db (MagicMock): Mock for initialize_db.
+        mock_sleep (MagicMock): Mock for time.sleep.
+    """
+    mock_cursor = mock_db_connection.return_value.__enter__.return_value.cursor.return_value
+    # Schema current and no text records left to pack
+    mock_cursor.fetchone.side_effect = [(True,), (False,)]
+    # The database becomes reachable on the third attempt
+    mock_db_connection.return_value.__enter__.side_effect = [
+        psycopg2.OperationalError("refused"), psycopg2.OperationalError("refused"), mock_db_connection.return_value.__enter__.return_value
+    ]
+
+    db.ensure_schema(retries=3, backoff=0.5)
+
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [0.5, 1.0]
+    # The schema was already current, so no DDL was run
+    mock_initialize_db.assert_not_called()
+
+    db._schema_ready = False
+    mock_db_connection.return_value.__enter__.side_effect = psycopg2.OperationalError("refused")
+    with pytest.raises(psycopg2.OperationalError):
+        db.ensure_schema(retries=2, backoff=0.5)
+    assert [call.args[0] for call in mock_sleep.call_args_list][2:] == [0.5, 1.0]
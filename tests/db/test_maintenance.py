@@ -0,0 +1,107 @@
+from unittest.mock import patch
+import db.maintenance as maintenance
+
+@patch('db.maintenance.db_connection')
+def test_backfill_dna_digests(mock_db_connection):
+    """
+    Test case for backfill_dna_digests to verify that it keeps updating batches, committing
+    each one, until no record is left without a digest.
+
+    Args:
+        mock_db_connection (MagicMock): Mock for the pooled db_connection context manager.
+    """
+    # Simulate two full batches followed by an empty one
+    mock_conn = mock_db_connection.return_value.__enter__.return_value
+    mock_cursor = mock_conn.cursor.return_value
+    rowcounts = iter([2, 1, 0])
+    mock_cursor.execute.side_effect = lambda *args: setattr(mock_cursor, "rowcount", next(rowcounts))
+
+    updated = maintenance.backfill_dna_digests(batch_size=2)
+
+    assert updated == 3
+    assert mock_cursor.execute.call_count == 3
+    assert mock_conn.commit.call_count == 3
+
+@patch('db.maintenance.db_connection')
+def test_rebuild_daily_stats(mock_db_connection):
+    """
+    Test case for rebuild_daily_stats to verify that the counters are replaced in one
+    transaction while writes to dna_records are blocked.
+
+    Args:
+        mock_db_connection (MagicMock): Mock for the pooled db_connection context manager.
+    """
+    mock_conn = mock_db_connection.return_value.__enter__.return_value
+    mock_cursor = mock_conn.cursor.return_value
+    mock_cursor.rowcount = 5
+
+    days = maintenance.rebuild_daily_stats()
+
+    assert days == 5
+    assert [call.args[0] for call in mock_cursor.execute.call_args_list] == [
+        "LOCK TABLE dna_records IN SHARE MODE",
+        "DELETE FROM dna_daily_stats",
+        maintenance.FILL_DAILY_STATS
+    ]
+    mock_conn.commit.assert_called_once()
+
+@patch('db.maintenance.execute_values')
+@patch('db.maintenance.db_connection')
+def test_pack_sequences(mock_db_connection, mock_execute_values):
+    """
+    Test case for pack_sequences to verify that only square A/C/G/T text records are converted,
+    after removing the packed duplicates stored before the conversion.
+
+    Args:
+        mock_db_connection (MagicMock): Mock for the pooled db_connection context manager.
+        mock_execute_values (MagicMock): Mock for psycopg2's execute_values helper.
+    """
+    mock_conn = mock_db_connection.return_value.__enter__.return_value
+    mock_cursor = mock_conn.cursor.return_value
+    mock_cursor.fetchall.side_effect = [
+        [('id_1', 'ATGCATGCATGCATGC'), ('id_2', 'ATGCA'), ('id_3', 'ATXCATGCATGCATGC')],
+        []
+    ]
+    mock_cursor.rowcount = 1
+
+    converted = maintenance.pack_sequences(batch_size=3)
+
+    # Only id_1 is square and made of A/C/G/T
+    assert converted == 1
+    updates = mock_execute_values.call_args[0][2]
+    assert [(record_id, rows, cols) for record_id, _, rows, cols, _ in updates] == [('id_1', 4, 4)]
+    # Packed duplicates of the record are deleted and uncounted before it takes their digest
+    assert [call[0][1] for call in mock_execute_values.call_args_list] == [
+        maintenance.DELETE_PACKED_DUPLICATES, maintenance.PACK_RECORDS
+    ]
+
+@patch('db.maintenance.execute_values')
+@patch('db.maintenance.db_connection')
+def test_pack_sequences_without_digest(mock_db_connection, mock_execute_values):
+    """
+    Test case for pack_sequences with text records stored before digests existed, which are packed
+    with a digest and, when the same matrix was stored twice, kept once.
+
+    Args:
+        mock_db_connection (MagicMock): Mock for the pooled db_connection context manager.
+        mock_execute_values (MagicMock): Mock for psycopg2's execute_values helper.
+    """
+    mock_conn = mock_db_connection.return_value.__enter__.return_value
+    mock_cursor = mock_conn.cursor.return_value
+    mock_cursor.fetchall.side_effect = [
+        [('id_1', 'ATGCATGCATGCATGC'), ('id_2', 'CCCCATGCATGCATGC'), ('id_3', 'ATGCATGCATGCATGC')],
+        []
+    ]
+    mock_cursor.rowcount = 2
+
+    converted = maintenance.pack_sequences(batch_size=3)
+
+    assert converted == 2
+    # Records without a digest are read too
+    select = mock_cursor.execute.call_args_list[0].args[0]
+    assert "dna_digest" not in select
+    # The second copy of the first matrix is deleted and uncounted, the other records are packed
+    mock_cursor.execute.assert_any_call(maintenance.DELETE_TEXT_DUPLICATES, (['id_3'],))
+    updates = mock_execute_values.call_args[0][2]
+    assert [record_id for record_id, _, _, _, _ in updates] == ['id_1', 'id_2']
+    assert len({digest for _, _, _, _, digest in updates}) == 2
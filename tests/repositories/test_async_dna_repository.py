@@ -0,0 +1,88 @@
+import asyncio
+from unittest.mock import patch, AsyncMock
+from datetime import datetime
+import repositories.async_dna_repository as async_repo
+from utils.dna_codec import sequence_digest, encode_dna
+
+@patch('repositories.async_dna_repository.async_db_connection')
+def test_save_dna_existing(mock_async_db_connection):
+    """
+    Test case for the async save_dna when the DNA sequence already exists in the database.
+
+    Args:
+        mock_async_db_connection (MagicMock): Mock for the async_db_connection context manager.
+    """
+    # Simulate the borrowed asyncpg connection and an upsert that hit the existing row
+    mock_conn = AsyncMock()
+    mock_async_db_connection.return_value.__aenter__.return_value = mock_conn
+    encoded = encode_dna(['A', 'T', 'G', 'C'])
+    digest = encoded.digest
+    mock_conn.fetch.return_value = [{"dna_digest": digest, "id": "existing_id", "is_mutant": True, "inserted": False}]
+
+    result = asyncio.run(async_repo.save_dna('new_id', ['A', 'T', 'G', 'C'], True))
+
+    # Verify the result and that the record was sent as one array per column
+    assert result == {"exists": True, "is_mutant": True, "record_id": 'existing_id'}
+    mock_conn.fetch.assert_awaited_once_with(
+        async_repo.UPSERT_RECORDS, ['new_id'], [None], [encoded.packed], [4], [1], [digest], [True], [datetime.now().date()]
+    )
+
+@patch('repositories.async_dna_repository.async_db_connection')
+def test_save_dna_new(mock_async_db_connection):
+    """
+    Test case for the async save_dna when the DNA sequence does not exist in the database.
+
+    Args:
+        mock_async_db_connection (MagicMock): Mock for the async_db_connection context manager.
+    """
+    mock_conn = AsyncMock()
+    mock_async_db_connection.return_value.__aenter__.return_value = mock_conn
+    mock_conn.fetch.return_value = [{"dna_digest": sequence_digest(['A', 'T', 'G', 'C']), "id": "new_id", "is_mutant": True, "inserted": True}]
+
+    result = asyncio.run(async_repo.save_dna('new_id', ['A', 'T', 'G', 'C'], True))
+
+    # Verify that the sequence is inserted and returns the expected result
+    assert result == {"exists": False, "is_mutant": True, "record_id": 'new_id'}
+
+@patch('repositories.async_dna_repository.async_db_connection')
+def test_save_dna_batch_committed_during_upsert(mock_async_db_connection):
+    """
+    Test case for the async save_dna_batch when another transaction stored a sequence while the
+    upsert ran, so the upsert does not return it and the row is looked up afterwards.
+
+    Args:
+        mock_async_db_connection (MagicMock): Mock for the async_db_connection context manager.
+    """
+    mock_conn = AsyncMock()
+    mock_async_db_connection.return_value.__aenter__.return_value = mock_conn
+    new_digest = sequence_digest(['AT', 'GC'])
+    raced_digest = sequence_digest(['CC', 'CC'])
+    mock_conn.fetch.side_effect = [
+        [{"dna_digest": new_digest, "id": "id_1", "is_mutant": True, "inserted": True}],
+        [{"dna_digest": raced_digest, "id": "other_id", "is_mutant": False}]
+    ]
+
+    results = asyncio.run(async_repo.save_dna_batch([('id_1', ['AT', 'GC'], True), ('id_2', ['CC', 'CC'], False)]))
+
+    assert results == [
+        {"exists": False, "is_mutant": True, "record_id": 'id_1'},
+        {"exists": True, "is_mutant": False, "record_id": 'other_id'}
+    ]
+    mock_conn.fetch.assert_awaited_with(async_repo.SELECT_BY_DIGESTS, [raced_digest])
+
+@patch('repositories.async_dna_repository.async_db_connection')
+def test_get_daily_counts(mock_async_db_connection):
+    """
+    Test case for the async get_daily_counts to verify that records are returned as tuples.
+
+    Args:
+        mock_async_db_connection (MagicMock): Mock for the async_db_connection context manager.
+    """
+    mock_conn = AsyncMock()
+    mock_async_db_connection.return_value.__aenter__.return_value = mock_conn
+    mock_conn.fetch.return_value = [(datetime(2024, 11, 8), 3, 2)]
+
+    results = asyncio.run(async_repo.get_daily_counts())
+
+    assert results == [(datetime(2024, 11, 8), 3, 2)]
+    mock_conn.fetch.assert_awaited_once_with(async_repo.SELECT_DAILY_COUNTS)
@@ -0,0 +1,81 @@
+from unittest.mock import patch
+from repositories.digest_filter import DigestFilter, SELECT_DIGESTS, filter_size
+from utils.dna_codec import sequence_digest
+
+def _digest(index):
+    """
+    Returns the digest of a distinct 2x2 sequence for every index up to 255.
+    """
+    bases = "ACGT"
+    rows = ["".join(bases[(index >> shift) & 3] for shift in (0, 2)), "".join(bases[(index >> shift) & 3] for shift in (4, 6))]
+    return sequence_digest(rows)
+
+def test_filter_size():
+    """
+    Test case for filter_size, which follows the optimal Bloom filter formulas.
+    """
+    bits, hashes = filter_size(1_000_000, 0.01)
+    # About 9.6 bits and 7 hashes per entry for a 1% false-positive rate
+    assert 9_500_000 < bits < 9_700_000 and bits % 8 == 0
+    assert hashes == 7
+
+def test_digest_filter_not_ready():
+    """
+    Test case for DigestFilter before it is warmed: every digest may be stored and nothing is allocated.
+    """
+    digest_filter = DigestFilter(capacity=100, fp_rate=0.01)
+    digest_filter.add(_digest(1))
+
+    assert digest_filter.might_contain(_digest(2))
+    assert digest_filter.stats()["bytes"] == 0
+    assert digest_filter.skipped == 0
+
+@patch('repositories.digest_filter.db_connection')
+def test_digest_filter_warm(mock_db_connection):
+    """
+    Test case for DigestFilter.warm, which sizes the filter from the planner estimate and streams
+    the stored digests through a named server-side cursor.
+
+    Args:
+        mock_db_connection (MagicMock): Mock for the pooled db_connection context manager.
+    """
+    mock_conn = mock_db_connection.return_value.__enter__.return_value
+    mock_conn.cursor.return_value.fetchone.return_value = (100,)
+    mock_stream = mock_conn.cursor.return_value.__enter__.return_value
+    mock_stream.__iter__.return_value = iter([(memoryview(_digest(index)),) for index in range(100)])
+
+    digest_filter = DigestFilter(capacity=10, fp_rate=0.01)
+    digest_filter.warm()
+
+    # Sized for twice the estimated records, which is larger than the configured capacity
+    assert digest_filter.ready
+    assert digest_filter.capacity == 200
+    mock_conn.cursor.assert_any_call(name="digest_filter_warm")
+    mock_stream.execute.assert_called_once_with(SELECT_DIGESTS)
+    assert digest_filter.entries == 100
+
+    # Stored digests are never reported as absent, and most new ones are
+    assert all(digest_filter.might_contain(_digest(index)) for index in range(100))
+    absent = sum(not digest_filter.might_contain(_digest(index)) for index in range(100, 256))
+    assert absent > 140
+    assert digest_filter.skipped == absent
+
+def test_digest_filter_stats():
+    """
+    Test case for DigestFilter.stats, which reports the measured false-positive rate over the new sequences.
+    """
+    digest_filter = DigestFilter(capacity=100, fp_rate=0.01)
+    digest_filter._resize(100)
+    digest_filter.ready = True
+    for index in range(50):
+        digest_filter.add(_digest(index))
+    for index in range(50, 80):
+        digest_filter.might_contain(_digest(index))
+    # Every digest checked above is new, so each one not skipped is a false positive
+    digest_filter.record_false_positive(30 - digest_filter.skipped)
+
+    stats = digest_filter.stats()
+    assert stats["bytes"] == filter_size(100, 0.01)[0] // 8
+    assert stats["entries"] == 50
+    assert stats["false_positive_ratio"] == (30 - digest_filter.skipped) / 30
+    assert 0 < stats["expected_false_positive_ratio"] < 0.01
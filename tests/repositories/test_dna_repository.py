@@ -0,0 +1,188 @@
+from unittest.mock import patch
+from datetime import datetime
+import repositories.dna_repository as repo
+from utils.dna_codec import sequence_digest, encode_dna
+
+@patch('repositories.dna_repository.execute_values')
+@patch('repositories.dna_repository.db_connection')
+def test_save_dna_existing(mock_db_connection, mock_execute_values):
+    """
+    Test case for save_dna when the DNA sequence already exists in the database.
+
+    Args:
+        mock_db_connection (MagicMock): Mock for the pooled db_connection context manager.
+        mock_execute_values (MagicMock): Mock for psycopg2's execute_values helper.
+    """
+    # Simulate the borrowed database connection
+    mock_conn = mock_db_connection.return_value.__enter__.return_value
+    encoded = encode_dna(['A', 'T', 'G', 'C'])
+    digest = encoded.digest
+
+    # Simulate that the upsert hit the existing row, which keeps its ID and status
+    mock_execute_values.return_value = [(memoryview(digest), 'existing_id', True, False)]
+
+    # Call save_dna
+    result = repo.save_dna('new_id', ['A', 'T', 'G', 'C'], True)
+
+    # Verify the result and that the sequence was resolved with a single upsert on its digest
+    assert result == {"exists": True, "is_mutant": True, "record_id": 'existing_id'}
+    mock_execute_values.assert_called_once_with(
+        mock_conn.cursor.return_value,
+        repo.UPSERT_RECORDS,
+        [('new_id', None, encoded.packed, 4, 1, digest, True, datetime.now().date())],
+        template=repo.UPSERT_TEMPLATE,
+        page_size=1,
+        fetch=True
+    )
+    mock_conn.cursor.return_value.execute.assert_not_called()
+
+@patch('repositories.dna_repository.execute_values')
+@patch('repositories.dna_repository.db_connection')
+def test_save_dna_new(mock_db_connection, mock_execute_values):
+    """
+    Test case for save_dna when the DNA sequence does not exist in the database.
+
+    Args:
+        mock_db_connection (MagicMock): Mock for the pooled db_connection context manager.
+        mock_execute_values (MagicMock): Mock for psycopg2's execute_values helper.
+    """
+    # Simulate the borrowed database connection
+    mock_conn = mock_db_connection.return_value.__enter__.return_value
+
+    # Simulate that the upsert inserted a new row
+    mock_execute_values.return_value = [(memoryview(sequence_digest(['A', 'T', 'G', 'C'])), 'new_id', True, True)]
+
+    # Call save_dna
+    result = repo.save_dna('new_id', ['A', 'T', 'G', 'C'], True)
+
+    # Verify that the sequence is inserted and returns the expected result
+    assert result == {"exists": False, "is_mutant": True, "record_id": 'new_id'}
+    mock_conn.commit.assert_called_once()
+
+@patch('repositories.dna_repository.db_connection')
+def test_get_daily_counts(mock_db_connection):
+    """
+    Test case for get_daily_counts to verify that it retrieves the daily counts
+    of mutants and humans from the per-day counters table.
+
+    Args:
+        mock_db_connection (MagicMock): Mock for the pooled db_connection context manager.
+    """
+    # Simulate the borrowed database connection and cursor
+    mock_conn = mock_db_connection.return_value.__enter__.return_value
+    mock_cursor = mock_conn.cursor.return_value
+
+    # Simulate database results
+    mock_cursor.fetchall.return_value = [(datetime(2024, 11, 8), 3, 2)]
+
+    # Call get_daily_counts
+    results = repo.get_daily_counts()
+
+    # Verify the results and that the query was executed correctly
+    assert results == [(datetime(2024, 11, 8), 3, 2)]
+    mock_cursor.execute.assert_called_once_with("SELECT date, mutants, humans FROM dna_daily_stats")
+
+@patch('repositories.dna_repository.execute_values')
+@patch('repositories.dna_repository.db_connection')
+def test_save_dna_batch(mock_db_connection, mock_execute_values):
+    """
+    Test case for save_dna_batch with a sequence already in the database, a new sequence
+    and the same new sequence repeated within the batch.
+
+    Args:
+        mock_db_connection (MagicMock): Mock for the pooled db_connection context manager.
+        mock_execute_values (MagicMock): Mock for psycopg2's execute_values helper.
+    """
+    # Simulate the borrowed database connection
+    mock_conn = mock_db_connection.return_value.__enter__.return_value
+
+    # Simulate that only 'ATGC' already exists in the database
+    mock_execute_values.return_value = [
+        (memoryview(sequence_digest(['CC', 'CC'])), 'id_2', False, True),
+        (memoryview(sequence_digest(['AT', 'GC'])), 'existing_id', True, False)
+    ]
+
+    # Call save_dna_batch
+    results = repo.save_dna_batch([
+        ('id_1', ['AT', 'GC'], True),
+        ('id_2', ['CC', 'CC'], False),
+        ('id_3', ['CC', 'CC'], False)
+    ])
+
+    # Verify the per-record results and that the repeated sequence is sent only once
+    assert results == [
+        {"exists": True, "is_mutant": True, "record_id": 'existing_id'},
+        {"exists": False, "is_mutant": False, "record_id": 'id_2'},
+        {"exists": True, "is_mutant": False, "record_id": 'id_2'}
+    ]
+    sent_rows = mock_execute_values.call_args[0][2]
+    assert [row[0] for row in sent_rows] == ['id_1', 'id_2']
+    mock_conn.commit.assert_called_once()
+
+@patch('repositories.dna_repository.execute_values')
+@patch('repositories.dna_repository.db_connection')
+def test_save_dna_batch_committed_during_upsert(mock_db_connection, mock_execute_values):
+    """
+    Test case for save_dna_batch when another transaction stored a sequence while the upsert ran,
+    so the upsert neither inserts nor returns it and the row is looked up afterwards.
+
+    Args:
+        mock_db_connection (MagicMock): Mock for the pooled db_connection context manager.
+        mock_execute_values (MagicMock): Mock for psycopg2's execute_values helper.
+    """
+    mock_conn = mock_db_connection.return_value.__enter__.return_value
+    mock_cursor = mock_conn.cursor.return_value
+    new_digest = sequence_digest(['AT', 'GC'])
+    raced_digest = sequence_digest(['CC', 'CC'])
+    mock_execute_values.return_value = [(memoryview(new_digest), 'id_1', True, True)]
+    mock_cursor.fetchall.return_value = [(memoryview(raced_digest), 'other_id', False)]
+
+    results = repo.save_dna_batch([('id_1', ['AT', 'GC'], True), ('id_2', ['CC', 'CC'], False)])
+
+    assert results == [
+        {"exists": False, "is_mutant": True, "record_id": 'id_1'},
+        {"exists": True, "is_mutant": False, "record_id": 'other_id'}
+    ]
+    mock_cursor.execute.assert_called_once_with(repo.SELECT_BY_DIGESTS, ([raced_digest],))
+    mock_conn.commit.assert_called_once()
+
+@patch('repositories.dna_repository.digest_filter')
+@patch('repositories.dna_repository.execute_values')
+@patch('repositories.dna_repository.db_connection')
+def test_save_dna_batch_digest_filter(mock_db_connection, mock_execute_values, mock_digest_filter):
+    """
+    Test case for save_dna_batch when the digest filter reports sequences as definitely absent:
+    they are inserted without resolving a conflict, and one stored meanwhile falls back to the upsert.
+
+    Args:
+        mock_db_connection (MagicMock): Mock for the pooled db_connection context manager.
+        mock_execute_values (MagicMock): Mock for psycopg2's execute_values helper.
+        mock_digest_filter (MagicMock): Mock for the digest filter of the worker.
+    """
+    mock_conn = mock_db_connection.return_value.__enter__.return_value
+    new_digest = sequence_digest(['AT', 'GC'])
+    raced_digest = sequence_digest(['CC', 'CC'])
+    mock_digest_filter.might_contain.return_value = False
+    mock_digest_filter.ready = True
+
+    # 'CCCC' was stored by another worker after the filter was warmed, so the plain insert skips it
+    mock_execute_values.side_effect = [
+        [(memoryview(new_digest), 'id_1', True, True)],
+        [(memoryview(raced_digest), 'other_id', False, False)]
+    ]
+
+    results = repo.save_dna_batch([('id_1', ['AT', 'GC'], True), ('id_2', ['CC', 'CC'], False)])
+
+    assert results == [
+        {"exists": False, "is_mutant": True, "record_id": 'id_1'},
+        {"exists": True, "is_mutant": False, "record_id": 'other_id'}
+    ]
+    first, second = mock_execute_values.call_args_list
+    assert first[0][1] == repo.INSERT_NEW_RECORDS
+    assert [row[0] for row in first[0][2]] == ['id_1', 'id_2']
+    assert second[0][1] == repo.UPSERT_RECORDS
+    assert [row[0] for row in second[0][2]] == ['id_2']
+    mock_conn.commit.assert_called_once()
+    # Both digests are now known to be stored, and no false positive was possible
+    assert {call[0][0] for call in mock_digest_filter.add.call_args_list} == {new_digest, raced_digest}
+    mock_digest_filter.record_false_positive.assert_not_called()
@@ -0,0 +1,112 @@
+import time
+from unittest.mock import patch
+from repositories.write_behind import WriteBehindQueue, INSERT_RECORDS
+from utils.dna_codec import sequence_digest
+
+@patch('repositories.write_behind.execute_values')
+@patch('repositories.write_behind.db_connection')
+def test_write_behind_duplicates_while_queued(mock_db_connection, mock_execute_values):
+    """
+    Test case for WriteBehindQueue to verify that a sequence submitted again before it is
+    flushed is reported as existing, and that flush inserts it once with a single commit.
+
+    Args:
+        mock_db_connection (MagicMock): Mock for the pooled db_connection context manager.
+        mock_execute_values (MagicMock): Mock for psycopg2's execute_values helper.
+    """
+    mock_conn = mock_db_connection.return_value.__enter__.return_value
+    mock_cursor = mock_conn.cursor.return_value
+    mock_cursor.fetchall.return_value = []
+
+    # Keep the background thread from flushing on its own
+    queue = WriteBehindQueue(max_records=100, max_delay_ms=60_000)
+    first = queue.save_batch([('id_1', ['AT', 'GC'], True)])
+    second = queue.save_batch([('id_2', ['AT', 'GC'], True)])
+
+    assert first == [{"exists": False, "is_mutant": True, "record_id": 'id_1'}]
+    assert second == [{"exists": True, "is_mutant": True, "record_id": 'id_1'}]
+    mock_cursor.execute.assert_called_once()
+
+    # Stopping drains the queue with one insert
+    queue.stop()
+    assert queue.pending_count() == 0
+    mock_execute_values.assert_called_once()
+    assert mock_execute_values.call_args[0][1] == INSERT_RECORDS
+    assert [row[0] for row in mock_execute_values.call_args[0][2]] == ['id_1']
+    mock_conn.commit.assert_called_once()
+
+@patch('repositories.write_behind.execute_values')
+@patch('repositories.write_behind.db_connection')
+def test_write_behind_existing_in_database(mock_db_connection, mock_execute_values):
+    """
+    Test case for WriteBehindQueue when the sequence is already in the database, so nothing is queued.
+
+    Args:
+        mock_db_connection (MagicMock): Mock for the pooled db_connection context manager.
+        mock_execute_values (MagicMock): Mock for psycopg2's execute_values helper.
+    """
+    mock_cursor = mock_db_connection.return_value.__enter__.return_value.cursor.return_value
+    mock_cursor.fetchall.return_value = [(memoryview(sequence_digest(['AT', 'GC'])), 'existing_id', False)]
+
+    queue = WriteBehindQueue(max_records=100, max_delay_ms=60_000)
+    result = queue.save_batch([('id_1', ['AT', 'GC'], True)])
+    queue.stop()
+
+    assert result == [{"exists": True, "is_mutant": False, "record_id": 'existing_id'}]
+    mock_execute_values.assert_not_called()
+
+@patch('repositories.write_behind.execute_values')
+@patch('repositories.write_behind.db_connection')
+def test_write_behind_flushes_after_max_delay(mock_db_connection, mock_execute_values):
+    """
+    Test case for WriteBehindQueue to verify that a queued record is flushed once max_delay_ms has passed.
+
+    Args:
+        mock_db_connection (MagicMock): Mock for the pooled db_connection context manager.
+        mock_execute_values (MagicMock): Mock for psycopg2's execute_values helper.
+    """
+    mock_db_connection.return_value.__enter__.return_value.cursor.return_value.fetchall.return_value = []
+
+    queue = WriteBehindQueue(max_records=100, max_delay_ms=10)
+    queue.save_batch([('id_1', ['AT', 'GC'], True)])
+
+    deadline = time.monotonic() + 5
+    while queue.pending_count() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    queue.stop()
+
+    assert queue.pending_count() == 0
+    mock_execute_values.assert_called_once()
+
+@patch('repositories.write_behind.execute_values')
+@patch('repositories.write_behind.db_connection')
+def test_write_behind_flushed_during_lookup(mock_db_connection, mock_execute_values):
+    """
+    Test case for WriteBehindQueue when a sequence being flushed is submitted again and the flush
+    commits while the other sequences are looked up: it is looked up too, not queued again as new.
+
+    Args:
+        mock_db_connection (MagicMock): Mock for the pooled db_connection context manager.
+        mock_execute_values (MagicMock): Mock for psycopg2's execute_values helper.
+    """
+    flushed = sequence_digest(['AT', 'GC'])
+    queue = WriteBehindQueue(max_records=100, max_delay_ms=60_000)
+    queue._in_flight[flushed] = ('flushed_id', None, b'', 2, 2, flushed, True, None)
+
+    def commit_flush(query, params):
+        # The flush commits and empties the in-flight records during the first lookup
+        queue._in_flight = {}
+
+    mock_cursor = mock_db_connection.return_value.__enter__.return_value.cursor.return_value
+    mock_cursor.execute.side_effect = commit_flush
+    mock_cursor.fetchall.side_effect = [[], [(memoryview(flushed), 'flushed_id', True)]]
+
+    result = queue.save_batch([('new_id_A', ['AT', 'GC'], True), ('new_id_B', ['CC', 'CC'], False)])
+    queue.stop()
+
+    assert result == [
+        {"exists": True, "is_mutant": True, "record_id": 'flushed_id'},
+        {"exists": False, "is_mutant": False, "record_id": 'new_id_B'}
+    ]
+    assert mock_cursor.execute.call_args_list[1][0][1] == ([flushed],)
+    assert [row[0] for row in mock_execute_values.call_args[0][2]] == ['new_id_B']
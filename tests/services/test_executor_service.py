@@ -0,0 +1,62 @@
+import asyncio
+from unittest.mock import patch, MagicMock
+import services.executor_service as executor_service
+from services.mutant_service import check_if_mutant
+
+def test_run_detection_inline_without_pool():
+    """
+    Test case for run_detection when the process pool is not running, so the detector runs inline
+    and never scans bands from the event loop.
+    """
+    detector = MagicMock(return_value=True)
+
+    result = asyncio.run(executor_service.run_detection(detector, ["AAAA", "AAAA", "CTGC", "GCTA"]))
+
+    assert result == True
+    detector.assert_called_once_with(["AAAA", "AAAA", "CTGC", "GCTA"], parallel=False)
+
+@patch.object(executor_service, "DETECTION_INLINE_MAX_CELLS", 4)
+@patch.object(executor_service, "DETECTION_PROCESS_WORKERS", 1)
+def test_run_detection_in_process_pool():
+    """
+    Test case for run_detection when the matrix is above the inline threshold, so it is
+    checked in the process pool started by start_executors.
+    """
+    executor_service.start_executors()
+    try:
+        mutant = asyncio.run(executor_service.run_detection(check_if_mutant, ["AAAA", "AAAA", "CTGC", "GCTA"]))
+        human = asyncio.run(executor_service.run_detection(check_if_mutant, ["ATGC", "CAGT", "TTAT", "AGAC"]))
+    finally:
+        executor_service.shutdown_executors()
+
+    assert mutant == True
+    assert human == False
+    assert executor_service._process_pool is None
+
+def test_run_blocking():
+    """
+    Test case for run_blocking to ensure positional arguments are forwarded to the function.
+    """
+    func = MagicMock(return_value={"exists": False})
+
+    result = asyncio.run(executor_service.run_blocking(func, "id", "ATGC", True))
+
+    assert result == {"exists": False}
+    func.assert_called_once_with("id", "ATGC", True)
+
+@patch.object(executor_service, "DETECTION_INLINE_MAX_CELLS", 4)
+@patch.object(executor_service, "use_parallel_detection", return_value=True)
+def test_run_detection_parallel_in_thread(mock_use_parallel_detection):
+    """
+    Test case for run_detection with a matrix large enough for parallel detection, which runs the
+    detector in a thread since it spreads the work over its own processes.
+    """
+    detector = MagicMock(return_value=True)
+    executor_service._process_pool = MagicMock()
+    try:
+        result = asyncio.run(executor_service.run_detection(detector, ["AAAA", "AAAA", "CTGC", "GCTA"]))
+    finally:
+        executor_service._process_pool = None
+
+    assert result == True
+    detector.assert_called_once_with(["AAAA", "AAAA", "CTGC", "GCTA"])
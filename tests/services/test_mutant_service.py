@@ -1,4 +1,9 @@
+import random
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import patch, MagicMock
 import services.mutant_service as mutant_service
+from utils.dna_codec import DnaMatrix
 
 def test_detect_mutant_true():
     """
@@ -41,3 +46,203 @@ def test_check_if_mutant():
         "TCACTG"
     ]
     assert mutant_service.check_if_mutant(dna_sequence) == True
+
+def test_detect_mutant_numpy():
+    """
+    Test case for detect_mutant_numpy with the same mutant and human sequences used above.
+    """
+    mutant_dna = ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]
+    human_dna = ["ATGCGA", "CAGTGC", "TTATTT", "AGACGG", "GCGTCA", "TCACTG"]
+    assert mutant_service.detect_mutant_numpy(mutant_dna) == True
+    assert mutant_service.detect_mutant_numpy(human_dna) == False
+    assert mutant_service.check_if_mutant(mutant_dna, engine="numpy") == True
+
+def test_detection_engines_match_detect_mutant():
+    """
+    Test case to ensure every engine agrees with detect_mutant on random boards, including
+    overlapping runs and characters outside A/T/C/G, which must be skipped.
+    """
+    rng = random.Random(1234)
+    for _ in range(300):
+        n = rng.randint(1, 12)
+        alphabet = rng.choice(["AT", "ATCG", "ATX", "AX-", "AAAT"])
+        dna_sequence = ["".join(rng.choices(alphabet, k=n)) for _ in range(n)]
+        expected = mutant_service.detect_mutant(dna_sequence)
+        for engine in mutant_service.ENGINES:
+            assert mutant_service.check_if_mutant(dna_sequence, engine=engine) == expected, (engine, dna_sequence)
+
+def test_detection_engines_dna_matrix():
+    """
+    Test case to ensure every engine gives the same result for a DnaMatrix as for its rows.
+    """
+    rng = random.Random(4321)
+    for _ in range(200):
+        n = rng.randint(1, 12)
+        dna_sequence = ["".join(rng.choices(rng.choice(["AT", "ATCG", "AAAT"]), k=n)) for _ in range(n)]
+        expected = mutant_service.detect_mutant(dna_sequence)
+        matrix = DnaMatrix.from_rows(dna_sequence)
+        for engine in mutant_service.ENGINES:
+            assert mutant_service.check_if_mutant(matrix, engine=engine) == expected, (engine, dna_sequence)
+
+def test_check_if_mutant_unknown_engine():
+    """
+    Test case for check_if_mutant when an unknown engine is requested.
+    """
+    with pytest.raises(ValueError):
+        mutant_service.check_if_mutant(["AAAA", "AAAA", "AAAA", "AAAA"], engine="quantum")
+
+def test_detect_mutant_bitboard():
+    """
+    Test case for detect_mutant_bitboard, including runs that would wrap across rows
+    if the start-column masks were missing.
+    """
+    mutant_dna = ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]
+    human_dna = ["ATGCGA", "CAGTGC", "TTATTT", "AGACGG", "GCGTCA", "TCACTG"]
+    wrapping_dna = ["TCAA", "AATG", "GCAA", "AATC"]
+    assert mutant_service.detect_mutant_bitboard(mutant_dna) == True
+    assert mutant_service.detect_mutant_bitboard(human_dna) == False
+    assert mutant_service.detect_mutant_bitboard(wrapping_dna) == mutant_service.detect_mutant(wrapping_dna) == False
+
+def test_detection_engines_ragged_rows():
+    """
+    Test case to ensure every engine ignores extra columns and rejects short rows like detect_mutant.
+    """
+    long_rows = ["AAAAT", "AAAAT", "CTGC", "GCTA"]
+    short_rows = ["AAAA", "AAA", "CTGC", "GCTA"]
+    for engine in mutant_service.ENGINES:
+        assert mutant_service.check_if_mutant(long_rows, engine=engine) == True
+        with pytest.raises(IndexError):
+            mutant_service.check_if_mutant(short_rows, engine=engine)
+
+def test_detect_mutant_stream_matches_detect_mutant():
+    """
+    Test case to ensure the streaming detector agrees with detect_mutant on random square boards,
+    including characters outside A/T/C/G, which must be skipped.
+    """
+    rng = random.Random(2024)
+    for _ in range(500):
+        n = rng.randint(1, 14)
+        alphabet = rng.choice(["AT", "ATCG", "ATX", "AX-", "AAAT"])
+        dna_sequence = ["".join(rng.choices(alphabet, k=n)) for _ in range(n)]
+        expected = mutant_service.detect_mutant(dna_sequence)
+        assert mutant_service.detect_mutant_stream(dna_sequence) == expected, dna_sequence
+        assert mutant_service.detect_mutant_stream(row.encode() for row in dna_sequence) == expected, dna_sequence
+
+def test_streaming_detector_stops_early():
+    """
+    Test case for StreamingDetector, which knows the verdict as soon as the second run is complete.
+    """
+    detector = mutant_service.StreamingDetector()
+    rows = ["AAAAT", "CGCGC", "TTTTG", "CGCGC", "GCGCA"]
+
+    assert [detector.feed(row) for row in rows[:3]] == [False, False, True]
+    assert detector.rows_read == 3
+
+def test_streaming_detector_rejects_invalid_shape():
+    """
+    Test case for StreamingDetector with ragged rows, too few or too many rows, and strict alphabet checks.
+    """
+    detector = mutant_service.StreamingDetector()
+    detector.feed("ATGC")
+    with pytest.raises(ValueError):
+        detector.feed("ATG")
+    with pytest.raises(ValueError):
+        detector.finish()
+    with pytest.raises(ValueError):
+        mutant_service.detect_mutant_stream(["ATG", "CAT", "GCA", "TGC"])
+    with pytest.raises(ValueError):
+        mutant_service.StreamingDetector(strict=True).feed("ATGX")
+
+def test_band_runs_match_whole_board():
+    """
+    Test case for _count_band_runs, where bands of any height, each with its 3-row overlap,
+    must together count every run of the board exactly once.
+    """
+    rng = random.Random(99)
+    for _ in range(500):
+        n = rng.randint(4, 14)
+        dna_sequence = ["".join(rng.choices(rng.choice(["AT", "ATCG", "ATX", "AAAT"]), k=n)) for _ in range(n)]
+        flat = "".join(dna_sequence).encode()
+        band_rows = rng.randint(1, n)
+        total = 0
+        for start in range(0, n, band_rows):
+            end = min(start + band_rows, n)
+            stop = min(end + 3, n)
+            total += mutant_service._count_band_runs(flat[start * n:stop * n], n, stop - start, end - start, limit=n * n * 4)
+        assert total == mutant_service._count_band_runs(flat, n, n, n, limit=n * n * 4)
+        assert (total >= 2) == mutant_service.detect_mutant(dna_sequence)
+
+def test_bitboard_masks_cache_limit():
+    """
+    Test case for _bitboard_masks, which only caches the masks of boards up to BITBOARD_MASK_CACHE_MAX_CELLS cells.
+    """
+    mutant_service._cached_bitboard_masks.cache_clear()
+    small = mutant_service._bitboard_masks(4)
+    with patch.object(mutant_service, "BITBOARD_MASK_CACHE_MAX_CELLS", 16):
+        large = mutant_service._bitboard_masks(8)
+        assert mutant_service._bitboard_masks(8) == large
+        assert mutant_service._bitboard_masks(4) is small
+    assert mutant_service._cached_bitboard_masks.cache_info().currsize == 1
+    assert large == mutant_service._build_bitboard_masks(8, 8)
+
+def test_count_band_runs_publishes_progress():
+    """
+    Test case for _count_band_runs, which reports every new count as soon as it is found, so other
+    bands can stop before this one returns.
+    """
+    published = []
+    flat = b"AAAA" + b"CCCC" + b"ATGC" + b"GTCA"
+
+    found = mutant_service._count_band_runs(flat, 4, 4, 4, on_found=published.append)
+
+    assert found == 2
+    assert published == [1, 2]
+
+def test_detect_mutant_parallel_replaces_broken_pool():
+    """
+    Test case for detect_mutant_parallel when a band worker dies, so the bands are scanned once
+    more in a new pool, and the error is raised if that one breaks too.
+    """
+    broken, fresh = MagicMock(), MagicMock()
+    with patch.object(mutant_service, "detection_pool") as mock_pool, \
+         patch.object(mutant_service, "_scan_bands", side_effect=[BrokenProcessPool(), True]) as mock_scan:
+        mock_pool.get.side_effect = [broken, fresh]
+        assert mutant_service.detect_mutant_parallel(["ATGCATGC"] * 8, band_rows=4) is True
+    mock_pool.replace.assert_called_once_with(broken)
+    assert [call.args[0] for call in mock_scan.call_args_list] == [broken, fresh]
+
+    with patch.object(mutant_service, "detection_pool"), \
+         patch.object(mutant_service, "_scan_bands", side_effect=BrokenProcessPool()):
+        with pytest.raises(BrokenProcessPool):
+            mutant_service.detect_mutant_parallel(["ATGCATGC"] * 8, band_rows=4)
+
+def test_detect_mutant_parallel():
+    """
+    Test case to ensure parallel band detection agrees with detect_mutant, with bands small enough
+    for runs to cross band edges, and that check_if_mutant only uses it above the size threshold.
+    """
+    rng = random.Random(7)
+    try:
+        for _ in range(20):
+            n = rng.randint(4, 24)
+            dna_sequence = ["".join(rng.choices(rng.choice(["AT", "ATCG", "ATX"]), k=n)) for _ in range(n)]
+            matrix = dna_sequence if rng.random() < 0.5 or "X" in "".join(dna_sequence) else DnaMatrix.from_rows(dna_sequence)
+            expected = mutant_service.detect_mutant(dna_sequence)
+            assert mutant_service.detect_mutant_parallel(matrix, band_rows=rng.randint(1, 6)) == expected, dna_sequence
+    finally:
+        mutant_service.detection_pool.shutdown()
+
+    with patch.object(mutant_service, "DETECTION_PARALLEL", True), \
+         patch.object(mutant_service, "DETECTION_PARALLEL_MIN_CELLS", 64), \
+         patch.object(mutant_service, "detect_mutant_parallel", return_value=True) as mock_parallel:
+        assert mutant_service.use_parallel_detection(8) and not mutant_service.use_parallel_detection(7)
+        human = ["".join("ATCG"[(col + 2 * row) % 4] for col in range(7)) for row in range(7)]
+        assert mutant_service.check_if_mutant(human) is False
+        mock_parallel.assert_not_called()
+        assert mutant_service.check_if_mutant(["ATGCATGC"] * 8) is True
+        mock_parallel.assert_called_once()
+        # An explicit engine is used as asked, and cannot be combined with parallel bands
+        assert mutant_service.check_if_mutant(["ATGCATGC"] * 8, engine="loop") is True
+        mock_parallel.assert_called_once()
+        with pytest.raises(ValueError):
+            mutant_service.check_if_mutant(["ATGCATGC"] * 8, engine="loop", parallel=True)
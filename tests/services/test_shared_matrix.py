@@ -0,0 +1,85 @@
+import asyncio
+import os
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from functools import partial
+from unittest.mock import patch
+import services.executor_service as executor_service
+from services.mutant_service import check_if_mutant
+from services.shared_matrix import SharedMatrix, detect_shared, read_shared
+
+def _exists(name):
+    try:
+        shared_memory.SharedMemory(name=name).close()
+        return True
+    except FileNotFoundError:
+        return False
+
+def test_shared_matrix_lifecycle():
+    """
+    Test case for SharedMatrix, which is readable by name until the block ends, even when it raises.
+    """
+    with SharedMatrix(b"AAAAAAAACTGCGCTA") as shared:
+        assert read_shared(shared.name, 4, 12) == b"AAAACTGC"
+        assert detect_shared(check_if_mutant, shared.name, 4) is True
+    assert not _exists(shared.name)
+
+    with pytest.raises(RuntimeError):
+        with SharedMatrix(b"ATGC") as shared:
+            raise RuntimeError("detection failed")
+    assert not _exists(shared.name)
+    shared.release()
+
+def _crash(dna_sequence):
+    os._exit(1)
+
+def _crash_once(marker, dna_sequence):
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return check_if_mutant(dna_sequence)
+
+@patch.object(executor_service, "DETECTION_INLINE_MAX_CELLS", 4)
+@patch.object(executor_service, "DETECTION_PROCESS_WORKERS", 1)
+def test_run_detection_frees_segment_when_worker_crashes():
+    """
+    Test case for run_detection in the process pool, whose shared memory segment is unlinked
+    after a successful run and after the worker process dies, both times it is retried.
+    The broken pool is replaced, so later matrices are checked again.
+    """
+    names = []
+
+    class RecordingSharedMatrix(SharedMatrix):
+        def __init__(self, data):
+            super().__init__(data)
+            names.append(self.name)
+
+    executor_service.start_executors()
+    try:
+        with patch.object(executor_service, "SharedMatrix", RecordingSharedMatrix):
+            assert asyncio.run(executor_service.run_detection(check_if_mutant, ["AAAA", "AAAA", "CTGC", "GCTA"])) is True
+            with pytest.raises(BrokenProcessPool):
+                asyncio.run(executor_service.run_detection(_crash, ["ATGC", "CAGT", "TTAT", "AGAC"]))
+            assert asyncio.run(executor_service.run_detection(check_if_mutant, ["ATGC", "CAGT", "TTAT", "AGAC"])) is False
+    finally:
+        executor_service.shutdown_executors()
+
+    assert len(names) == 4
+    assert not any(_exists(name) for name in names)
+
+@patch.object(executor_service, "DETECTION_INLINE_MAX_CELLS", 4)
+@patch.object(executor_service, "DETECTION_PROCESS_WORKERS", 1)
+def test_run_detection_retries_when_worker_crashes(tmp_path):
+    """
+    Test case for run_detection when a worker process dies once, so the matrix is checked
+    again in a new pool.
+    """
+    executor_service.start_executors()
+    try:
+        broken = executor_service._process_pool.get()
+        detector = partial(_crash_once, str(tmp_path / "crashed"))
+        assert asyncio.run(executor_service.run_detection(detector, ["AAAA", "AAAA", "CTGC", "GCTA"])) is True
+        assert executor_service._process_pool.get() is not broken
+    finally:
+        executor_service.shutdown_executors()
@@ -1,8 +1,17 @@
 from unittest.mock import patch
-from datetime import datetime
+from datetime import datetime, date
 import services.stats_service as stats_service
 import pytest
 
+@pytest.fixture(autouse=True)
+def clear_stats_cache():
+    """
+    Start every test with an empty statistics cache, so mocked counts are always read.
+    """
+    stats_service.stats_cache.clear()
+    yield
+    stats_service.stats_cache.clear()
+
 @patch('services.stats_service.get_daily_counts')
 def test_get_stats(mock_get_daily_counts):
     """
@@ -27,4 +36,70 @@ def test_get_stats(mock_get_daily_counts):
     assert result["ratio"] == pytest.approx(36.36, rel=0.01)
     assert result["most_mutants_day"] == "2024-11-08"
     assert result["most_humans_day"] == "2024-11-09"
-    
\ No newline at end of file
+    
+@patch('services.stats_service.get_daily_counts')
+def test_get_stats_cached_with_deltas(mock_get_daily_counts):
+    """
+    Test case for get_stats to verify that the daily counts are read once, kept current
+    with deltas from new records, and read again when a refresh is forced.
+
+    Args:
+        mock_get_daily_counts (MagicMock): Mock for the get_daily_counts function to simulate database response.
+    """
+    mock_get_daily_counts.return_value = [(date(2024, 11, 8), 3, 2)]
+
+    assert stats_service.get_stats()["count_mutant_dna"] == 3
+
+    # A mutant saved by this worker is added without reading the database again
+    stats_service.stats_cache.apply_delta(date(2024, 11, 9), True)
+    result = stats_service.get_stats()
+    assert result["count_mutant_dna"] == 4
+    assert stats_service.stats_cache.age() is not None
+    mock_get_daily_counts.assert_called_once()
+
+    # Forcing a refresh reads the database again
+    assert stats_service.get_stats(force_refresh=True)["count_mutant_dna"] == 3
+    assert mock_get_daily_counts.call_count == 2
+
+@patch('services.stats_service.get_daily_counts')
+def test_get_stats_skips_delta_after_reload(mock_get_daily_counts):
+    """
+    Test case for apply_delta when the counts were reloaded while the record was being saved,
+    so the reload may already include it and the delta is not added a second time.
+
+    Args:
+        mock_get_daily_counts (MagicMock): Mock for the get_daily_counts function to simulate database response.
+    """
+    mock_get_daily_counts.return_value = [(date(2024, 11, 8), 3, 2)]
+    stats_service.get_stats()
+
+    generation = stats_service.stats_cache.generation()
+    # Another request reloads the counts after the record was committed
+    mock_get_daily_counts.return_value = [(date(2024, 11, 8), 4, 2)]
+    stats_service.get_stats(force_refresh=True)
+    stats_service.stats_cache.apply_delta(date(2024, 11, 8), True, generation)
+    assert stats_service.get_stats()["count_mutant_dna"] == 4
+
+    # Without a reload in between, the delta is added
+    generation = stats_service.stats_cache.generation()
+    stats_service.stats_cache.apply_delta(date(2024, 11, 8), True, generation)
+    assert stats_service.get_stats()["count_mutant_dna"] == 5
+
+@patch('services.stats_service.time.monotonic')
+@patch('services.stats_service.get_daily_counts')
+def test_get_stats_cache_expires(mock_get_daily_counts, mock_monotonic):
+    """
+    Test case for get_stats to verify that the daily counts are read again once the TTL has passed.
+
+    Args:
+        mock_get_daily_counts (MagicMock): Mock for the get_daily_counts function to simulate database response.
+        mock_monotonic (MagicMock): Mock for the monotonic clock.
+    """
+    mock_get_daily_counts.return_value = [(date(2024, 11, 8), 3, 2)]
+    mock_monotonic.return_value = 100
+    stats_service.get_stats()
+
+    mock_monotonic.return_value = 100 + stats_service.stats_cache.ttl + 1
+    stats_service.get_stats()
+
+    assert mock_get_daily_counts.call_count == 2
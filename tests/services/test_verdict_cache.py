@@ -0,0 +1,45 @@
+from unittest.mock import patch
+from services.verdict_cache import VerdictCache
+
+def test_verdict_cache_lru_eviction():
+    """
+    Test case for VerdictCache to verify that the least recently used entry is evicted
+    and that hits, misses and evictions are counted.
+    """
+    cache = VerdictCache(maxsize=2, ttl=0)
+    cache.put(b"first", True, "id_1")
+    cache.put(b"second", False, "id_2")
+
+    # Reading "first" makes "second" the least recently used entry
+    assert cache.get(b"first") == {"is_mutant": True, "record_id": "id_1"}
+    cache.put(b"third", True, "id_3")
+
+    assert cache.get(b"second") is None
+    assert cache.get(b"third") == {"is_mutant": True, "record_id": "id_3"}
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 2, "misses": 1, "evictions": 1, "hit_ratio": 2 / 3}
+
+@patch("services.verdict_cache.time.monotonic")
+def test_verdict_cache_ttl(mock_monotonic):
+    """
+    Test case for VerdictCache to verify that entries older than the TTL are treated as misses.
+
+    Args:
+        mock_monotonic (MagicMock): Mock for the monotonic clock.
+    """
+    cache = VerdictCache(maxsize=10, ttl=60)
+    mock_monotonic.return_value = 100
+    cache.put(b"digest", True, "id_1")
+
+    mock_monotonic.return_value = 159
+    assert cache.get(b"digest") is not None
+    mock_monotonic.return_value = 161
+    assert cache.get(b"digest") is None
+    assert cache.stats()["size"] == 0
+
+def test_verdict_cache_disabled():
+    """
+    Test case for VerdictCache with maxsize 0, which never stores anything.
+    """
+    cache = VerdictCache(maxsize=0, ttl=0)
+    cache.put(b"digest", True, "id_1")
+    assert cache.get(b"digest") is None
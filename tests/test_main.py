@@ -0,0 +1,29 @@
+import asyncio
+from unittest.mock import patch, AsyncMock
+import main
+
+@patch("main.close_pool")
+@patch("main.close_async_pool", new_callable=AsyncMock)
+@patch("main.write_behind_queue")
+@patch("main.shutdown_executors")
+@patch("main.run_blocking", new_callable=AsyncMock)
+@patch("main.start_executors")
+def test_lifespan_closes_pools_when_flush_fails(mock_start_executors, mock_run_blocking, mock_shutdown_executors,
+                                                mock_write_behind_queue, mock_close_async_pool, mock_close_pool, caplog):
+    """
+    Test case for the lifespan shutdown when the final write-behind flush fails: the records left
+    are logged and both connection pools are still closed.
+    """
+    mock_write_behind_queue.stop.side_effect = RuntimeError("database down")
+    mock_write_behind_queue.pending_record_ids.return_value = ["id_1", "id_2"]
+
+    async def run():
+        async with main.lifespan(main.app):
+            pass
+
+    with patch("main.DB_DRIVER", "psycopg2"), patch("main.DIGEST_FILTER_ENABLED", False):
+        asyncio.run(run())
+
+    mock_close_async_pool.assert_awaited_once()
+    mock_close_pool.assert_called_once()
+    assert "2 records were not saved: id_1, id_2" in caplog.text
@@ -0,0 +1,79 @@
+import io
+import json
+from unittest.mock import MagicMock
+from utils.batch_classify import classify_file, classify_line
+
+MUTANT = ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]
+HUMAN = ["ATGCGA", "CAGTGC", "TTATTT", "AGACGG", "GCGTCA", "TCACTG"]
+
+def _lines():
+    return [
+        json.dumps({"id": "a", "dna": MUTANT}) + "\n",
+        "not json\n",
+        "\n",
+        json.dumps({"dna": HUMAN}) + "\n",
+        json.dumps({"dna": "ATGC"}) + "\n",
+    ]
+
+def test_classify_line():
+    """
+    Test case for classify_line with valid and invalid samples.
+    """
+    result, dna = classify_line(json.dumps({"id": 7, "dna": MUTANT}), keep_dna=True)
+    assert result == {"id": 7, "is_mutant": True, "cells": 36}
+    assert dna == MUTANT
+    assert classify_line(json.dumps({"dna": HUMAN}))[0]["is_mutant"] is False
+    assert "error" in classify_line(json.dumps({"sequence": MUTANT}))[0]
+    assert classify_line(json.dumps({"dna": ["ATG", "AT"]}))[0]["error"].startswith("ValueError: The DNA matrix must be square")
+    assert "error" in classify_line(json.dumps({"dna": ["ATGC", "ATGC", "ATGC", "ATGX"]}))[0]
+
+def test_classify_file_keeps_order():
+    """
+    Test case for classify_file in one process and with worker processes, which must write the same verdicts in input order.
+    """
+    outputs = []
+    for workers in (0, 2):
+        output = io.StringIO()
+        totals = classify_file(_lines(), output, workers=workers, chunk_size=1)
+        outputs.append([json.loads(line) for line in output.getvalue().splitlines()])
+        assert (totals["lines"], totals["matrices"], totals["errors"], totals["cells"]) == (4, 2, 2, 72)
+
+    assert outputs[0] == outputs[1]
+    assert [result["line"] for result in outputs[0]] == [1, 2, 3, 4]
+    assert outputs[0][0] == {"line": 1, "id": "a", "is_mutant": True}
+    assert "error" in outputs[0][1]
+    assert outputs[0][2] == {"line": 3, "id": None, "is_mutant": False}
+
+def test_classify_file_persist():
+    """
+    Test case for classify_file with persist, which saves only the valid matrices and adds their record ids.
+    """
+    save_batch = MagicMock(return_value=[
+        {"record_id": "id-1", "exists": False},
+        {"record_id": "id-2", "exists": True},
+    ])
+    output = io.StringIO()
+    classify_file(_lines(), output, workers=0, persist=True, save_batch=save_batch)
+
+    records = save_batch.call_args[0][0]
+    assert [(dna, is_mutant) for _, dna, is_mutant in records] == [(MUTANT, True), (HUMAN, False)]
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert (results[0]["record_id"], results[0]["exists"]) == ("id-1", False)
+    assert (results[2]["record_id"], results[2]["exists"]) == ("id-2", True)
+
+def test_classify_file_persists_in_batches():
+    """
+    Test case for classify_file with persist, which saves matrices in batches of half the look-ahead
+    instead of holding every verdict until the whole file is classified.
+    """
+    lines = [json.dumps({"id": index, "dna": MUTANT if index % 2 else HUMAN}) + "\n" for index in range(5)]
+    save_batch = MagicMock(side_effect=lambda records: [{"record_id": record_id, "exists": False} for record_id, _, _ in records])
+    output = io.StringIO()
+
+    totals = classify_file(lines, output, workers=0, chunk_size=1, persist=True, save_batch=save_batch)
+
+    assert [len(call.args[0]) for call in save_batch.call_args_list] == [2, 2, 1]
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [result["id"] for result in results] == [0, 1, 2, 3, 4]
+    assert [result["is_mutant"] for result in results] == [False, True, False, True, False]
+    assert totals["matrices"] == 5
@@ -0,0 +1,83 @@
+import json
+import pytest
+from services.mutant_service import ENGINES
+from utils.benchmark_detectors import (
+    INPUTS, compare_results, load_baseline, main, run_benchmarks, save_baseline, worst_case_human
+)
+
+@pytest.mark.parametrize("input_name", ["mutant-early", "mutant-late", "worst-human"])
+def test_inputs_expected_verdict(input_name):
+    """
+    Test case for the generated inputs, which every engine must classify as expected.
+    """
+    generator, expected = INPUTS[input_name]
+    for size in (4, 5, 9, 32):
+        dna_sequence = generator(size)
+        assert len(dna_sequence) == size and all(len(row) == size for row in dna_sequence)
+        for detector in ENGINES.values():
+            assert detector(dna_sequence) is expected
+
+def test_worst_case_human_layout():
+    """
+    Test case for worst_case_human, whose rows shift the four letters by two places from one row to the next.
+    """
+    dna_sequence = worst_case_human(8)
+    assert dna_sequence[0] == "ATCGATCG"
+    assert dna_sequence[1] == "CGATCGAT"
+
+def test_run_benchmarks():
+    """
+    Test case for run_benchmarks with small sizes, which must report every case without errors.
+    """
+    results, errors = run_benchmarks(sizes=[8, 16], warmup=0, repeat=1)
+
+    assert errors == []
+    assert len(results) == len(ENGINES) * len(INPUTS) * 2
+    result = results["bitboard/worst-human/16"]
+    assert result["verdict"] is False
+    assert result["runs"] == 1
+    assert result["ns_per_cell"] == pytest.approx(result["median_s"] * 1e9 / 256)
+
+def test_run_benchmarks_size_limits():
+    """
+    Test case for run_benchmarks, which skips the sizes above the limit of slow engines.
+    """
+    results, _ = run_benchmarks(sizes=[2048], engines=["loop"], inputs=["mutant-early"], warmup=0, repeat=1)
+    assert results == {}
+
+def test_compare_results():
+    """
+    Test case for compare_results, which flags cases slower than the threshold and skips noisy ones.
+    """
+    baseline = {
+        "a": {"median_s": 1.0, "ns_per_cell": 10.0},
+        "b": {"median_s": 1.0, "ns_per_cell": 10.0},
+        "c": {"median_s": 1e-6, "ns_per_cell": 1.0},
+    }
+    results = {
+        "a": {"median_s": 1.2, "ns_per_cell": 12.0},
+        "b": {"median_s": 1.5, "ns_per_cell": 15.0},
+        "c": {"median_s": 1e-5, "ns_per_cell": 10.0},
+        "d": {"median_s": 1.0, "ns_per_cell": 10.0},
+    }
+    ratios, regressions = compare_results(results, baseline, threshold=0.25)
+
+    assert ratios == pytest.approx({"a": 1.2, "b": 1.5})
+    assert regressions == ["b"]
+
+def test_main_regression_exit_status(tmp_path):
+    """
+    Test case for main, which saves a baseline and fails when a run is slower than it.
+    """
+    path = tmp_path / "baseline.json"
+    args = ["--sizes", "64", "--engines", "bitboard", "--inputs", "worst-human", "--warmup", "0", "--repeat", "1"]
+    assert main(args + ["--save", str(path)]) == 0
+
+    results = load_baseline(path)
+    assert set(results) == {"bitboard/worst-human/64"}
+    for result in results.values():
+        result["median_s"] = 1.0
+        result["ns_per_cell"] = 1e-3
+    save_baseline(path, results)
+    assert json.loads(path.read_text())["results"] == results
+    assert main(args + ["--compare", str(path)]) == 1
@@ -0,0 +1,134 @@
+import hashlib
+import random
+import pickle
+import pytest
+import struct
+from utils.dna_codec import DnaMatrix, encode_dna, decode_dna, decode_verdict, encode_verdict, pack_bases, unpack_bases
+
+def test_pack_bases_round_trip():
+    """
+    Test case for pack_bases and unpack_bases with every length around a byte boundary.
+    """
+    rng = random.Random(42)
+    for length in range(0, 40):
+        bases = "".join(rng.choices("ACGT", k=length))
+        packed = pack_bases(bases)
+        assert len(packed) == (length + 3) // 4
+        assert unpack_bases(packed, length) == bases
+
+def test_encode_dna_packed():
+    """
+    Test case for encode_dna with a matrix made only of A/C/G/T, which is packed at 2 bits per base.
+    """
+    dna_sequence = ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]
+    encoded = encode_dna(dna_sequence)
+
+    assert encoded.text is None
+    assert len(encoded.packed) == 9
+    assert (encoded.rows, encoded.cols) == (6, 6)
+    assert decode_dna(encoded) == dna_sequence
+    # The same bases with a different shape are a different matrix
+    assert encode_dna(["ATGCGACAGTGCTTATGT", "AGAAGGCCCCTATCACTG"]).digest != encoded.digest
+
+def test_encode_dna_text_fallback():
+    """
+    Test case for encode_dna with characters outside A/C/G/T or ragged rows, which are kept as text
+    with the same digest PostgreSQL computes with sha256(convert_to(dna_sequence, 'UTF8')).
+    """
+    for dna_sequence in (["ATX", "AAA", "TTT"], ["AT", "GCA"]):
+        encoded = encode_dna(dna_sequence)
+        assert encoded.packed is None
+        assert encoded.text == "".join(dna_sequence)
+        assert encoded.digest == hashlib.sha256("".join(dna_sequence).encode("utf-8")).digest()
+
+def test_dna_matrix_from_rows():
+    """
+    Test case for DnaMatrix.from_rows, which keeps the flat bases and the same packed form and digest as encode_dna.
+    """
+    dna_sequence = ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]
+    matrix = DnaMatrix.from_rows(dna_sequence)
+    encoded = encode_dna(dna_sequence)
+
+    assert matrix.data == "".join(dna_sequence).encode("ascii")
+    assert (len(matrix), matrix.n) == (6, 6)
+    assert (matrix.packed, matrix.digest) == (encoded.packed, encoded.digest)
+    assert encode_dna(matrix) == encoded
+    assert matrix[2] == "TTATGT"
+    assert list(matrix) == dna_sequence == matrix.rows()
+    assert matrix == dna_sequence
+    assert pickle.loads(pickle.dumps(matrix)) == matrix
+    with pytest.raises(AttributeError):
+        matrix.n = 5
+
+@pytest.mark.parametrize("rows", [[], ["AT", "GCA"], ["ATG", "ATG"], ["ATX", "AAA", "TTT"], ["atg", "ATG", "ATG"], ["ATÉ", "ATG", "ATG"]])
+def test_dna_matrix_rejects_invalid_rows(rows):
+    """
+    Test case for DnaMatrix.from_rows with empty, ragged or non-square matrices and characters outside A/T/C/G.
+    """
+    with pytest.raises(ValueError):
+        DnaMatrix.from_rows(rows)
+
+def test_dna_matrix_for_detection():
+    """
+    Test case for DnaMatrix.for_detection, which keeps unvalidated bases for the engines and cannot be encoded or hashed.
+    """
+    matrix = DnaMatrix.for_detection(b"AAAX?TGCCCCCAAAA", 4)
+
+    assert matrix.rows() == ["AAAX", "?TGC", "CCCC", "AAAA"]
+    assert (matrix.packed, matrix.digest) == (None, None)
+    assert repr(matrix) == "DnaMatrix(n=4, for_detection)"
+    assert pickle.loads(pickle.dumps(matrix)) == matrix
+    with pytest.raises(TypeError):
+        hash(matrix)
+    with pytest.raises(ValueError):
+        encode_dna(matrix)
+
+def test_dna_matrix_wire_round_trip():
+    """
+    Test case for DnaMatrix.to_wire and from_wire in both encodings, for every size around a byte boundary.
+    """
+    rng = random.Random(42)
+    for n in range(1, 10):
+        matrix = DnaMatrix.from_rows(["".join(rng.choice("ACGT") for _ in range(n)) for _ in range(n)])
+        for packed in (True, False):
+            decoded = DnaMatrix.from_wire(matrix.to_wire(packed))
+            assert decoded == matrix
+            assert decoded.packed == matrix.packed
+            assert decoded.digest == matrix.digest
+
+def test_dna_matrix_from_wire_ignores_padding():
+    """
+    Test case for DnaMatrix.from_wire with padding bits set in the last packed byte,
+    which must not change the matrix or its digest.
+    """
+    matrix = DnaMatrix.from_rows(["ACG", "TAC", "GTA"])
+    body = bytearray(matrix.to_wire())
+    body[-1] |= 0b00111111
+
+    assert DnaMatrix.from_wire(bytes(body)).digest == matrix.digest
+
+@pytest.mark.parametrize("body", [
+    b"\x01\x00\x00",
+    struct.pack(">BII", 1, 0, 0),
+    struct.pack(">BII", 1, 2, 3) + b"ACGTAC",
+    struct.pack(">BII", 1, 2, 2) + b"ACG",
+    struct.pack(">BII", 1, 2, 2) + b"ACGX",
+    struct.pack(">BII", 2, 3, 3) + b"\x00\x00",
+    struct.pack(">BII", 3, 2, 2) + b"\x00",
+])
+def test_dna_matrix_from_wire_rejects_invalid(body):
+    """
+    Test case for DnaMatrix.from_wire with a short header, an empty or non-square matrix, data of the
+    wrong size, characters outside A/T/C/G and an unknown encoding.
+    """
+    with pytest.raises(ValueError):
+        DnaMatrix.from_wire(body)
+
+def test_verdict_round_trip():
+    """
+    Test case for encode_verdict and decode_verdict.
+    """
+    body = encode_verdict(True, False, "1234-5678")
+
+    assert body == b"\x01\x001234-5678"
+    assert decode_verdict(body) == {"is_mutant": True, "exists": False, "record_id": "1234-5678"}
@@ -0,0 +1,50 @@
+import asyncio
+import pytest
+from utils.load_test import InMemoryDnaStore, parse_mix, percentile, run_sweep
+
+MUTANT = ["ATGCGA", "CAGTGC", "TTATGT", "AGAAGG", "CCCCTA", "TCACTG"]
+HUMAN = ["ATGCGA", "CAGTGC", "TTATTT", "AGACGG", "GCGTCA", "TCACTG"]
+
+def test_in_memory_store():
+    """
+    Test case for InMemoryDnaStore, which must follow the contract of the DNA repository.
+    """
+    store = InMemoryDnaStore()
+
+    assert store.save_dna("id-1", MUTANT, True) == {"exists": False, "is_mutant": True, "record_id": "id-1"}
+    results = store.save_dna_batch([("id-2", HUMAN, False), ("id-3", MUTANT, True), ("id-4", HUMAN, False)])
+    assert [(result["exists"], result["record_id"]) for result in results] == [(False, "id-2"), (True, "id-1"), (True, "id-2")]
+    [(_, mutants, humans)] = store.get_daily_counts()
+    assert (mutants, humans) == (1, 1)
+
+def test_parse_mix():
+    """
+    Test case for parse_mix with and without weights, and with an invalid size.
+    """
+    assert parse_mix("6:0.9,200:0.1") == {6: 0.9, 200: 0.1}
+    assert parse_mix("10") == {10: 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("3")
+
+def test_percentile():
+    """
+    Test case for percentile with the nearest-rank method.
+    """
+    values = list(range(1, 101))
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([7], 0.95) == 7
+    assert percentile([], 0.5) == 0.0
+
+def test_run_sweep():
+    """
+    Test case for run_sweep, which drives the whole app in-process against the in-memory store.
+    """
+    results = asyncio.run(run_sweep([1, 4], {"small": {6: 1.0}}, requests=30, stats_ratio=0.2, db_latency=0))
+
+    assert [(result["mix"], result["concurrency"]) for result in results] == [("small", 1), ("small", 4)]
+    for result in results:
+        assert result["errors"] == 0, result["error_samples"]
+        assert result["requests"] == 30
+        assert set(result["endpoints"]) == {"mutant", "stats"}
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
@@ -0,0 +1,80 @@
+from prometheus_client import CollectorRegistry, REGISTRY
+from utils.metrics import BloomFilterCollector, CacheCollector, observe_stage, record_verdict, start_timeline, stop_timeline, time_stage
+
+def _sample(name, labels=None):
+    return REGISTRY.get_sample_value(name, labels or {}) or 0
+
+def test_time_stage():
+    """
+    Test case for time_stage and observe_stage, which add observations to the stage histogram.
+    """
+    before = _sample("mutant_stage_seconds_count", {"stage": "test"})
+    with time_stage("test"):
+        pass
+    observe_stage("test", 0.5)
+
+    assert _sample("mutant_stage_seconds_count", {"stage": "test"}) == before + 2
+    assert _sample("mutant_stage_seconds_sum", {"stage": "test"}) >= 0.5
+
+def test_record_verdict():
+    """
+    Test case for record_verdict, which counts verdicts by result and records the matrix size.
+    """
+    new_mutants = _sample("mutant_verdicts_total", {"verdict": "mutant", "result": "new"})
+    existing_humans = _sample("mutant_verdicts_total", {"verdict": "human", "result": "existing"})
+    small = _sample("mutant_matrix_rows_bucket", {"le": "6.0"})
+
+    record_verdict(True, False, 6)
+    record_verdict(False, True, 100)
+
+    assert _sample("mutant_verdicts_total", {"verdict": "mutant", "result": "new"}) == new_mutants + 1
+    assert _sample("mutant_verdicts_total", {"verdict": "human", "result": "existing"}) == existing_humans + 1
+    assert _sample("mutant_matrix_rows_bucket", {"le": "6.0"}) == small + 1
+
+def test_cache_collector():
+    """
+    Test case for CacheCollector, which reads the counters of the registered caches at scrape time.
+    """
+    registry = CollectorRegistry()
+    collector = CacheCollector()
+    registry.register(collector)
+    counters = {"hits": 3, "misses": 1, "hit_ratio": 0.75, "size": 2}
+    collector.register("test", lambda: counters)
+
+    assert registry.get_sample_value("cache_hits_total", {"cache": "test"}) == 3
+    assert registry.get_sample_value("cache_misses_total", {"cache": "test"}) == 1
+    assert registry.get_sample_value("cache_hit_ratio", {"cache": "test"}) == 0.75
+    counters["size"] = 5
+    assert registry.get_sample_value("cache_entries", {"cache": "test"}) == 5
+
+def test_bloom_filter_collector():
+    """
+    Test case for BloomFilterCollector, which reads the size and accuracy of the registered filters at scrape time.
+    """
+    registry = CollectorRegistry()
+    collector = BloomFilterCollector()
+    registry.register(collector)
+    stats = {"bytes": 1024, "entries": 10, "skipped": 7, "false_positive_ratio": 0.125,
+             "expected_false_positive_ratio": 0.01}
+    collector.register("test", lambda: stats)
+
+    assert registry.get_sample_value("bloom_filter_bytes", {"filter": "test"}) == 1024
+    assert registry.get_sample_value("bloom_filter_entries", {"filter": "test"}) == 10
+    assert registry.get_sample_value("bloom_filter_skipped_lookups_total", {"filter": "test"}) == 7
+    assert registry.get_sample_value("bloom_filter_false_positive_ratio", {"filter": "test"}) == 0.125
+    assert registry.get_sample_value("bloom_filter_expected_false_positive_ratio", {"filter": "test"}) == 0.01
+
+def test_timeline():
+    """
+    Test case for start_timeline, which records the stages timed until stop_timeline is called.
+    """
+    timeline, token = start_timeline()
+    with time_stage("test"):
+        pass
+    observe_stage("other", 0.25)
+    stop_timeline(token)
+    with time_stage("test"):
+        pass
+
+    assert [stage for stage, _, _ in timeline] == ["test", "other"]
+    assert timeline[1][2] == 0.25
@@ -0,0 +1,79 @@
+import urllib.error
+from unittest.mock import MagicMock, patch
+import pytest
+from utils.startup_timing import measure_first_response, measure_import, slowest_imports, summarize
+
+IMPORTTIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |      40000 |     numpy.core
+import time:       500 |      50000 |   fastapi
+import time:       200 |      20000 |   api.mutant
+import time:        10 |         10 |     db.database
+import time:       800 |      71000 | main
+"""
+
+@patch('utils.startup_timing.subprocess.run')
+def test_measure_import(mock_run):
+    """
+    Test case for measure_import, which reads the time printed by each fresh interpreter.
+
+    Args:
+        mock_run (MagicMock): Mock for subprocess.run.
+    """
+    mock_run.side_effect = [MagicMock(stdout="0.25\n"), MagicMock(stdout="0.5\n")]
+
+    assert measure_import("main", runs=2) == [0.25, 0.5]
+    assert mock_run.call_args[0][0][1] == "-c"
+
+@patch('utils.startup_timing.subprocess.run')
+def test_slowest_imports(mock_run):
+    """
+    Test case for slowest_imports, which lists the direct imports of the module by cumulative time.
+
+    Args:
+        mock_run (MagicMock): Mock for subprocess.run.
+    """
+    mock_run.return_value = MagicMock(stderr=IMPORTTIME_OUTPUT)
+
+    assert slowest_imports("main", top=2) == [("fastapi", 0.05), ("api.mutant", 0.02)]
+    assert mock_run.call_args[0][0][1:3] == ["-X", "importtime"]
+
+@patch('utils.startup_timing.time.sleep')
+@patch('utils.startup_timing.urllib.request.urlopen')
+@patch('utils.startup_timing.subprocess.Popen')
+def test_measure_first_response(mock_popen, mock_urlopen, mock_sleep):
+    """
+    Test case for measure_first_response, which polls the spawned server until it answers,
+    counting an HTTP error as an answer, and always stops the server.
+
+    Args:
+        mock_popen (MagicMock): Mock for subprocess.Popen.
+        mock_urlopen (MagicMock): Mock for urllib.request.urlopen.
+        mock_sleep (MagicMock): Mock for time.sleep.
+    """
+    process = mock_popen.return_value
+    process.poll.return_value = None
+    mock_urlopen.side_effect = [
+        urllib.error.URLError("refused"),
+        urllib.error.HTTPError("http://127.0.0.1/metrics", 500, "error", {}, None)
+    ]
+
+    timings = measure_first_response(runs=1, no_db=True)
+
+    assert len(timings) == 1 and timings[0] >= 0
+    assert mock_popen.call_args[0][0][3] == "--serve"
+    assert mock_urlopen.call_count == 2
+    process.terminate.assert_called_once()
+
+    # A server that exits before answering is reported
+    mock_urlopen.side_effect = urllib.error.URLError("refused")
+    process.poll.return_value = 1
+    with pytest.raises(RuntimeError):
+        measure_first_response(runs=1)
+    assert mock_popen.call_args[0][0][1:3] == ["-m", "uvicorn"]
+
+def test_summarize():
+    """
+    Test case for summarize, which reports timings in milliseconds.
+    """
+    assert summarize([0.3, 0.1, 0.2]) == {"median_ms": 200.0, "min_ms": 100.0, "max_ms": 300.0}
@@ -0,0 +1,184 @@
+"""
+Offline batch classifier for JSONL files of DNA samples.
+
+Every input line is a JSON object with a "dna" list, like the body of POST /api/mutant, and may
+carry an "id" that is copied to the output. Lines are parsed, validated like the API does and
+classified in worker processes in chunked work units, and one verdict line per input line is
+written in input order as soon as it is ready.
+
+Usage:
+    python -m utils.batch_classify samples.jsonl -o verdicts.jsonl [--workers N] [--chunk-size N]
+                                   [--engine NAME] [--persist]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import uuid
+from services.mutant_service import check_if_mutant, ENGINES, MUTANT_ENGINE
+from utils.dna_codec import DnaMatrix
+
+def classify_line(line, engine=None, keep_dna=False):
+    """
+    Parses, validates and classifies one JSONL line.
+
+    The matrix is validated with DnaMatrix.from_rows, like the body of POST /api/mutant, so a
+    matrix that is not square or has other bases than A, T, C and G is reported as an error.
+
+    Args:
+        line (str): A JSON object with a "dna" list of strings and an optional "id".
+        engine (str, optional): Name of the detection engine to use.
+        keep_dna (bool): Whether to return the parsed matrix, needed to persist it.
+
+    Returns:
+        tuple: (result, dna) where result is the output dictionary and dna the DnaMatrix, or None.
+    """
+    try:
+        sample = json.loads(line)
+        dna = sample["dna"]
+        if not isinstance(dna, list) or not all(isinstance(row, str) for row in dna):
+            raise ValueError("'dna' must be a list of strings")
+        dna = DnaMatrix.from_rows(dna)
+        # Lines are already spread over the worker processes, which must not start band processes of their own
+        result = {"id": sample.get("id"), "is_mutant": check_if_mutant(dna, engine=engine, parallel=False), "cells": len(dna) ** 2}
+        return result, dna if keep_dna else None
+    except (ValueError, KeyError, TypeError, IndexError) as error:
+        return {"error": f"{type(error).__name__}: {error}"}, None
+
+def _classify_unit(args):
+    """
+    Worker entry point, unpacks the arguments of classify_line.
+    """
+    return classify_line(*args)
+
+def _write_verdicts(batch, output, totals, save_batch=None):
+    """
+    Writes the verdicts of a batch of classified lines, saving their matrices first when save_batch is given.
+    """
+    if save_batch is not None:
+        saved = iter(save_batch([
+            (str(uuid.uuid4()), dna, result["is_mutant"]) for result, dna in batch if dna is not None
+        ]))
+
+    for result, dna in batch:
+        totals["lines"] += 1
+        if "error" in result:
+            totals["errors"] += 1
+        else:
+            totals["matrices"] += 1
+            totals["cells"] += result.pop("cells")
+            if save_batch is not None:
+                save_result = next(saved)
+                result["record_id"] = save_result["record_id"]
+                result["exists"] = save_result["exists"]
+        result = {"line": totals["lines"], **result}
+        output.write(json.dumps(result) + "\n")
+    output.flush()
+    batch.clear()
+
+def classify_file(lines, output, workers=None, chunk_size=64, engine=None, persist=False, save_batch=None):
+    """
+    Classifies JSONL lines with a pool of worker processes and writes the verdicts in input order.
+
+    Results are streamed from the pool as each chunk is done, so a slow chunk only holds back the
+    verdicts after it and never leaves the other workers idle. At most a few chunks per worker are
+    read ahead of the results received, so memory stays bounded however large the input is. With
+    persist, matrices are saved in batches of half that look-ahead, while the workers keep
+    classifying the next lines.
+
+    Args:
+        lines (Iterable[str]): The input JSONL lines.
+        output (TextIO): Where the verdict lines are written.
+        workers (int, optional): Number of worker processes, 0 classifies in this process. Defaults to the CPU count.
+        chunk_size (int): Number of lines sent to a worker at a time.
+        engine (str, optional): Name of the detection engine to use.
+        persist (bool): Whether to save every classified matrix through the repository layer.
+        save_batch (callable, optional): Repository function used to persist, defaults to save_dna_batch.
+
+    Returns:
+        dict: Totals with the number of lines, matrices, errors, cells and elapsed seconds.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if not persist:
+        save_batch = None
+    elif save_batch is None:
+        from repositories.dna_repository import save_dna_batch as save_batch
+
+    totals = {"lines": 0, "matrices": 0, "errors": 0, "cells": 0}
+    started = time.perf_counter()
+    look_ahead = max(workers, 1) * chunk_size * 4
+    batch_size = max(look_ahead // 2, 1) if persist else chunk_size
+    # One slot per line read but not yet classified, taken by the feeder and returned by the results loop
+    slots = threading.Semaphore(look_ahead)
+    stopped = False
+
+    def units():
+        for line in lines:
+            if not line.strip():
+                continue
+            slots.acquire()
+            if stopped:
+                return
+            yield line, engine, persist
+
+    pool = multiprocessing.get_context("spawn").Pool(workers) if workers > 0 else None
+    try:
+        if pool is not None:
+            classified = pool.imap(_classify_unit, units(), chunksize=chunk_size)
+        else:
+            classified = map(_classify_unit, units())
+        batch = []
+        for item in classified:
+            slots.release()
+            batch.append(item)
+            if len(batch) >= batch_size:
+                _write_verdicts(batch, output, totals, save_batch)
+        _write_verdicts(batch, output, totals, save_batch)
+    finally:
+        if pool is not None:
+            # Lets the pool's feeder thread return if it is waiting for a slot
+            stopped = True
+            slots.release()
+            pool.close()
+            pool.join()
+
+    totals["seconds"] = time.perf_counter() - started
+    return totals
+
+def main(argv=None):
+    """
+    Command line entry point, see the module docstring for usage.
+    """
+    parser = argparse.ArgumentParser(prog="python -m utils.batch_classify", description="Classify a JSONL file of DNA samples.")
+    parser.add_argument("input", help="JSONL file with one {\"dna\": [...]} object per line, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file for the verdicts, or - for stdout (default)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes, 0 runs in this process")
+    parser.add_argument("--chunk-size", type=int, default=64, help="lines sent to a worker at a time")
+    parser.add_argument("--engine", default=MUTANT_ENGINE, choices=sorted(ENGINES), help=f"detection engine (default: {MUTANT_ENGINE})")
+    parser.add_argument("--persist", action="store_true", help="save every classified matrix in the database")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        totals = classify_file(source, output, args.workers, args.chunk_size, args.engine, args.persist)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+    seconds = totals["seconds"] or 1e-9
+    print(
+        f"Classified {totals['matrices']} matrices ({totals['errors']} errors) in {totals['seconds']:.2f} s: "
+        f"{totals['matrices'] / seconds:.1f} matrices/s, {totals['cells'] / seconds:.0f} cells/s "
+        f"with {args.workers} workers",
+        file=sys.stderr
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+Benchmark suite for the mutant detection engines of services.mutant_service.
+
+Every engine in ENGINES is timed on square matrices of several sizes and input shapes, after a
+warmup, and reported in nanoseconds per cell along with the peak memory allocated by one run.
+Results can be saved as a JSON baseline and compared with a previous baseline, in which case the
+command exits with status 1 when a case is slower than the baseline by more than the threshold.
+
+Usage:
+    python -m utils.benchmark_detectors [--sizes 16 128 1024 4096] [--engines loop bitboard]
+                                        [--inputs random worst-human] [--save baseline.json]
+                                        [--compare baseline.json] [--threshold 0.25]
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from services.mutant_service import ENGINES
+
+BASES = "ATCG"
+
+DEFAULT_SIZES = [16, 128, 1024, 4096]
+
+# Largest size benchmarked per engine by default, the pure Python loop takes minutes beyond it
+ENGINE_MAX_SIZE = {"loop": 1024}
+
+def worst_case_human(n, rng=None):
+    """
+    Builds a matrix without any sequence of four equal letters, so every engine scans all of it.
+
+    Cell (r, c) is BASES[(c + 2r) % 4]: rows shift by one letter, columns alternate between two
+    letters and both diagonals cycle through the four letters.
+
+    Args:
+        n (int): Size of the matrix.
+        rng (random.Random, optional): Unused, accepted so every generator has the same signature.
+
+    Returns:
+        list of str: The DNA matrix.
+    """
+    return ["".join(BASES[(c + 2 * r) % 4] for c in range(n)) for r in range(n)]
+
+def random_matrix(n, rng):
+    """
+    Builds a matrix of uniformly random letters.
+
+    Args:
+        n (int): Size of the matrix.
+        rng (random.Random): Random number generator.
+
+    Returns:
+        list of str: The DNA matrix.
+    """
+    return ["".join(rng.choices(BASES, k=n)) for _ in range(n)]
+
+def mutant_early(n, rng=None):
+    """
+    Builds a mutant matrix whose two sequences start the first two rows, over a worst case human background.
+
+    Args:
+        n (int): Size of the matrix, at least 4.
+        rng (random.Random, optional): Unused.
+
+    Returns:
+        list of str: The DNA matrix.
+    """
+    dna_sequence = worst_case_human(n)
+    for row in (0, 1):
+        dna_sequence[row] = "AAAA" + dna_sequence[row][4:]
+    return dna_sequence
+
+def mutant_late(n, rng=None):
+    """
+    Builds a mutant matrix whose two sequences end the last two rows, over a worst case human background.
+
+    Args:
+        n (int): Size of the matrix, at least 4.
+        rng (random.Random, optional): Unused.
+
+    Returns:
+        list of str: The DNA matrix.
+    """
+    dna_sequence = worst_case_human(n)
+    for row in (n - 2, n - 1):
+        dna_sequence[row] = dna_sequence[row][:-4] + "AAAA"
+    return dna_sequence
+
+# Input generators and the verdict every engine must return for them (None when it depends on the data)
+INPUTS = {
+    "random": (random_matrix, None),
+    "mutant-early": (mutant_early, True),
+    "mutant-late": (mutant_late, True),
+    "worst-human": (worst_case_human, False),
+}
+
+def measure(detector, dna_sequence, warmup=1, repeat=5, max_seconds=10.0):
+    """
+    Times a detector on one matrix.
+
+    Args:
+        detector (callable): The detection function.
+        dna_sequence (list of str): The DNA matrix.
+        warmup (int): Untimed runs before measuring.
+        repeat (int): Maximum number of timed runs.
+        max_seconds (float): Stop repeating once the timed runs take this long, after at least one run.
+
+    Returns:
+        dict: The verdict, the median and minimum run time in seconds and the peak bytes allocated by one run.
+    """
+    for _ in range(warmup):
+        detector(dna_sequence)
+
+    times = []
+    gc.collect()
+    gc.disable()
+    try:
+        while len(times) < repeat and sum(times) < max_seconds:
+            start = time.perf_counter()
+            verdict = detector(dna_sequence)
+            times.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    try:
+        detector(dna_sequence)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "verdict": verdict,
+        "median_s": statistics.median(times),
+        "min_s": min(times),
+        "runs": len(times),
+        "peak_bytes": peak_bytes,
+    }
+
+def run_benchmarks(sizes=None, engines=None, inputs=None, warmup=1, repeat=5, max_seconds=10.0,
+                   seed=42, size_limits=True, report=None):
+    """
+    Benchmarks every combination of engine, input and size.
+
+    Args:
+        sizes (list of int, optional): Matrix sizes, defaults to DEFAULT_SIZES.
+        engines (list of str, optional): Engine names, defaults to every engine in ENGINES.
+        inputs (list of str, optional): Input names, defaults to every input in INPUTS.
+        warmup (int): Untimed runs before measuring each case.
+        repeat (int): Maximum number of timed runs per case.
+        max_seconds (float): Time budget of the timed runs per case.
+        seed (int): Seed of the random inputs.
+        size_limits (bool): Whether to skip the sizes above ENGINE_MAX_SIZE for slow engines.
+        report (callable, optional): Called with the key and result of each case as soon as it is measured.
+
+    Raises:
+        ValueError: Raised if an engine or input name is unknown.
+
+    Returns:
+        tuple: (results, errors) where results maps "engine/input/size" to its measures and errors
+               lists the cases whose verdict is wrong or differs between engines.
+    """
+    sizes = sizes or DEFAULT_SIZES
+    engines = engines or list(ENGINES)
+    inputs = inputs or list(INPUTS)
+    for name in engines:
+        if name not in ENGINES:
+            raise ValueError(f"Unknown detection engine '{name}'. Available engines: {', '.join(ENGINES)}")
+    for name in inputs:
+        if name not in INPUTS:
+            raise ValueError(f"Unknown input '{name}'. Available inputs: {', '.join(INPUTS)}")
+
+    results = {}
+    errors = []
+    for input_name in inputs:
+        generator, expected = INPUTS[input_name]
+        for size in sizes:
+            dna_sequence = generator(size, random.Random(seed))
+            verdicts = {}
+            for engine in engines:
+                if size_limits and size > ENGINE_MAX_SIZE.get(engine, size):
+                    continue
+                key = f"{engine}/{input_name}/{size}"
+                try:
+                    result = measure(ENGINES[engine], dna_sequence, warmup, repeat, max_seconds)
+                except (ImportError, RuntimeError) as error:
+                    print(f"Skipping {key}: {error}", file=sys.stderr)
+                    continue
+                result["ns_per_cell"] = result["median_s"] * 1e9 / (size * size)
+                results[key] = result
+                verdicts[engine] = result["verdict"]
+                if report:
+                    report(key, result)
+
+            if expected is not None:
+                errors += [
+                    f"{engine}/{input_name}/{size} returned {verdict}, expected {expected}"
+                    for engine, verdict in verdicts.items() if verdict != expected
+                ]
+            elif len(set(verdicts.values())) > 1:
+                errors.append(f"Engines disagree on {input_name}/{size}: {verdicts}")
+
+    return results, errors
+
+def compare_results(results, baseline, threshold=0.25, min_seconds=1e-4):
+    """
+    Compares results with a baseline.
+
+    Args:
+        results (dict): Results of run_benchmarks.
+        baseline (dict): Results of a previous run, as saved by save_baseline.
+        threshold (float): Allowed slowdown, 0.25 fails a case that takes more than 125% of its baseline time.
+        min_seconds (float): Cases faster than this in the baseline are too noisy to compare and are skipped.
+
+    Returns:
+        tuple: (ratios, regressions) where ratios maps every key found in both to new time / baseline
+               time, and regressions lists the keys slower than the threshold allows.
+    """
+    ratios = {}
+    regressions = []
+    for key, result in results.items():
+        previous = baseline.get(key)
+        if not previous or previous["median_s"] < min_seconds:
+            continue
+        ratios[key] = result["ns_per_cell"] / previous["ns_per_cell"]
+        if ratios[key] > 1 + threshold:
+            regressions.append(key)
+    return ratios, regressions
+
+def save_baseline(path, results):
+    """
+    Saves results as a JSON baseline, along with the platform they were measured on.
+
+    Args:
+        path (str): File to write.
+        results (dict): Results of run_benchmarks.
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "results": results,
+        }, file, indent=2, sort_keys=True)
+
+def load_baseline(path):
+    """
+    Loads the results of a JSON baseline.
+
+    Args:
+        path (str): File saved by save_baseline.
+
+    Returns:
+        dict: The baseline results.
+    """
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)["results"]
+
+def _print_result(key, result):
+    """
+    Prints one benchmark result as a table row.
+    """
+    print(
+        f"{key:<32} {result['median_s'] * 1000:>12.3f} ms {result['ns_per_cell']:>12.2f} ns/cell "
+        f"{result['peak_bytes'] / 1024:>12.1f} KiB  {'mutant' if result['verdict'] else 'human'}",
+        flush=True
+    )
+
+def main(argv=None):
+    """
+    Command line entry point, see the module docstring for usage.
+
+    Returns:
+        int: Exit status, 1 if a verdict is wrong or a case regressed past the threshold, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(prog="python -m utils.benchmark_detectors", description="Benchmark the mutant detection engines.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="matrix sizes")
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), help="engines to benchmark (default: all)")
+    parser.add_argument("--inputs", nargs="+", choices=list(INPUTS), help="inputs to benchmark (default: all)")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs before each case")
+    parser.add_argument("--repeat", type=int, default=5, help="maximum timed runs per case")
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="time budget of the timed runs per case")
+    parser.add_argument("--seed", type=int, default=42, help="seed of the random inputs")
+    parser.add_argument("--no-size-limits", action="store_true", help="also run slow engines on the largest sizes")
+    parser.add_argument("--save", metavar="PATH", help="save the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare the results with a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown against the baseline (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline(args.compare) if args.compare else None
+    results, errors = run_benchmarks(
+        args.sizes, args.engines, args.inputs, args.warmup, args.repeat, args.max_seconds,
+        args.seed, not args.no_size_limits, report=_print_result
+    )
+    if args.save:
+        save_baseline(args.save, results)
+
+    status = 0
+    for error in errors:
+        print(f"WRONG VERDICT: {error}", file=sys.stderr)
+        status = 1
+    if baseline is not None:
+        ratios, regressions = compare_results(results, baseline, args.threshold)
+        for key, ratio in sorted(ratios.items()):
+            flag = "  REGRESSION" if key in regressions else ""
+            print(f"{key:<32} {ratio * 100:>8.1f}% of baseline{flag}")
+        if regressions:
+            print(f"{len(regressions)} case(s) slower than {(1 + args.threshold) * 100:.0f}% of the baseline", file=sys.stderr)
+            status = 1
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,394 @@
+import hashlib
+import struct
+from typing import NamedTuple, Optional
+
+# 2-bit code of every base, the first base of a group of four goes in the high bits of its byte
+PACKED_BASES = "ACGT"
+_TO_BASE4_DIGITS = bytes.maketrans(PACKED_BASES.encode("ascii"), b"0123")
+_PACKED_BYTE_TO_BASES = [
+    "".join(PACKED_BASES[(byte >> shift) & 3] for shift in (6, 4, 2, 0)) for byte in range(256)
+]
+
+# ASCII base held in each 2-bit field of a packed byte, from the high bits to the low bits
+_PACKED_FIELD_TO_BASE = [
+    bytes(ord(PACKED_BASES[(byte >> shift) & 3]) for byte in range(256)) for shift in (6, 4, 2, 0)
+]
+
+# Binary body of POST /api/mutant: encoding, rows and cols as big-endian unsigned integers, then the bases
+WIRE_HEADER = struct.Struct(">BII")
+# One ASCII byte per base, row after row
+WIRE_BYTE_PER_BASE = 1
+# 2 bits per base in the layout of pack_bases, the padding bits of the last byte are ignored
+WIRE_PACKED = 2
+
+class EncodedDna(NamedTuple):
+    """
+    Storage form of a DNA matrix, shared by the API and the repositories.
+
+    Attributes:
+        text (str): The rows concatenated in order, only kept when the matrix cannot be packed.
+        packed (bytes): The bases packed at 2 bits each, or None when the matrix cannot be packed.
+        rows (int): Number of rows of the matrix.
+        cols (int): Number of columns of the matrix.
+        digest (bytes): 32-byte SHA-256 digest used to index and deduplicate the record.
+    """
+    text: Optional[str]
+    packed: Optional[bytes]
+    rows: int
+    cols: int
+    digest: bytes
+
+def normalize_dna(dna_sequence):
+    """
+    Normalizes a DNA sequence into a single string.
+
+    Args:
+        dna_sequence (list of str or str): The DNA matrix rows, or an already normalized string.
+
+    Returns:
+        str: The rows concatenated in order.
+    """
+    return "".join(dna_sequence)
+
+def pack_bases(bases):
+    """
+    Packs a string of A/C/G/T bases at 2 bits per base.
+
+    Args:
+        bases (str): The bases to pack.
+
+    Returns:
+        bytes: ceil(len(bases) / 4) bytes, or None if the string has any other character.
+    """
+    digits = bases.encode("ascii", "replace").translate(_TO_BASE4_DIGITS)
+    if digits.strip(b"0123"):
+        return None
+    return _pack_base4_digits(digits)
+
+def _pack_base4_digits(digits):
+    """
+    Packs a string of base-4 digits, b"0" to b"3", at 2 bits per digit.
+    """
+    # Pad to whole bytes and let int() do the base-4 to binary conversion in C
+    digits += b"0" * (-len(digits) % 4)
+    return int(digits, 4).to_bytes(len(digits) // 4, "big") if digits else b""
+
+def unpack_bases(packed, length):
+    """
+    Unpacks bases packed by pack_bases.
+
+    Args:
+        packed (bytes): The packed bases.
+        length (int): Number of bases to return, which drops the padding of the last byte.
+
+    Returns:
+        str: The unpacked bases.
+    """
+    return "".join([_PACKED_BYTE_TO_BASES[byte] for byte in packed])[:length]
+
+def _unpack_ascii(packed, length):
+    """
+    Unpacks bases packed by pack_bases into ASCII bytes, one 2-bit field of every byte at a time.
+    """
+    data = bytearray(len(packed) * 4)
+    for field, table in enumerate(_PACKED_FIELD_TO_BASE):
+        data[field::4] = packed.translate(table)
+    del data[length:]
+    return bytes(data)
+
+class DnaMatrix:
+    """
+    Validated, immutable N x N DNA matrix, built once from a request and shared by every layer.
+
+    The bases are kept as one flat ASCII bytes object, row after row, which the detection engines
+    read directly. The packed bases and digest are those encode_dna computes for the same rows,
+    so the matrix keys the verdict cache and is stored by the repositories without encoding it again.
+    Indexing returns rows as strings, so code written for lists of strings keeps working.
+
+    Matrices built with for_detection are the exception: they only carry the bases for the
+    detection engines, without packed bases or digest, and cannot be encoded or hashed.
+
+    Attributes:
+        data (bytes): The n * n bases, made only of A, T, C and G unless built with for_detection.
+        n (int): Number of rows and columns.
+        packed (bytes): The bases packed at 2 bits each, or None if built with for_detection.
+        digest (bytes): 32-byte SHA-256 digest of the matrix, or None if built with for_detection.
+    """
+    __slots__ = ("data", "n", "packed", "digest")
+
+    def __init__(self, data, n, packed, digest):
+        object.__setattr__(self, "data", data)
+        object.__setattr__(self, "n", n)
+        object.__setattr__(self, "packed", packed)
+        object.__setattr__(self, "digest", digest)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Validates the rows of a DNA matrix and builds the matrix.
+
+        The shape and alphabet are checked with C-level operations over the whole matrix
+        instead of per-character Python loops.
+
+        Args:
+            rows (list of str): The DNA matrix rows.
+
+        Raises:
+            ValueError: Raised if the matrix is empty, not square, or has characters other than A, T, C and G.
+
+        Returns:
+            DnaMatrix: The validated matrix.
+        """
+        n = len(rows)
+        if n == 0:
+            raise ValueError("The DNA matrix must have at least one row")
+        if set(map(len, rows)) != {n}:
+            raise ValueError(f"The DNA matrix must be square, with {n} bases in each of its {n} rows")
+        try:
+            data = "".join(rows).encode("ascii")
+        except UnicodeEncodeError:
+            data = None
+        digits = data.translate(_TO_BASE4_DIGITS) if data is not None else None
+        if digits is None or digits.strip(b"0123"):
+            raise ValueError("The DNA matrix may only contain the bases A, T, C and G")
+        packed = _pack_base4_digits(digits)
+        return cls(data, n, packed, packed_digest(packed, n, n))
+
+    @classmethod
+    def for_detection(cls, data, n):
+        """
+        Wraps flat bases for the detection engines only, without validating, packing or hashing them.
+
+        Used by worker processes that receive bases already checked by the process that sent them,
+        or trimmed from a list of strings whose invalid characters the engines skip anyway.
+
+        Args:
+            data (bytes): The n * n bases, row after row.
+            n (int): Number of rows and columns.
+
+        Returns:
+            DnaMatrix: A matrix with packed and digest set to None.
+        """
+        return cls(data, n, None, None)
+
+    @classmethod
+    def from_wire(cls, body):
+        """
+        Decodes the binary body of POST /api/mutant into a matrix, without building a string per row.
+
+        The body is a WIRE_HEADER with the encoding, rows and columns, followed by the bases: n * n
+        ASCII bytes with WIRE_BYTE_PER_BASE, or ceil(n * n / 4) bytes with WIRE_PACKED.
+
+        Args:
+            body (bytes): The request body.
+
+        Raises:
+            ValueError: Raised if the header is incomplete or has an unknown encoding, if the matrix is
+                        empty or not square, if the data does not match its size, or if it has
+                        characters other than A, T, C and G.
+
+        Returns:
+            DnaMatrix: The validated matrix.
+        """
+        if len(body) < WIRE_HEADER.size:
+            raise ValueError(f"The binary DNA body must start with a {WIRE_HEADER.size}-byte header")
+        encoding, rows, cols = WIRE_HEADER.unpack_from(body)
+        if rows == 0:
+            raise ValueError("The DNA matrix must have at least one row")
+        if rows != cols:
+            raise ValueError(f"The DNA matrix must be square, got {rows} rows of {cols} bases")
+        n = rows
+        cells = n * n
+        payload = memoryview(body)[WIRE_HEADER.size:]
+        if encoding == WIRE_BYTE_PER_BASE:
+            if len(payload) != cells:
+                raise ValueError(f"Expected {cells} bases after the header, got {len(payload)} bytes")
+            data = bytes(payload)
+            digits = data.translate(_TO_BASE4_DIGITS)
+            if digits.strip(b"0123"):
+                raise ValueError("The DNA matrix may only contain the bases A, T, C and G")
+            packed = _pack_base4_digits(digits)
+        elif encoding == WIRE_PACKED:
+            size = (cells + 3) // 4
+            if len(payload) != size:
+                raise ValueError(f"Expected {size} packed bytes after the header, got {len(payload)} bytes")
+            packed = bytearray(payload)
+            # Clear the padding bits, so the same matrix always has the same packed form and digest
+            if cells % 4:
+                packed[-1] &= (0xFF << 2 * (4 - cells % 4)) & 0xFF
+            packed = bytes(packed)
+            data = _unpack_ascii(packed, cells)
+        else:
+            raise ValueError(
+                f"Unknown DNA encoding {encoding}, expected {WIRE_BYTE_PER_BASE} (one byte per base) "
+                f"or {WIRE_PACKED} (2 bits per base)"
+            )
+        return cls(data, n, packed, packed_digest(packed, n, n))
+
+    def to_wire(self, packed=True):
+        """
+        Encodes the matrix as a binary body of POST /api/mutant.
+
+        Args:
+            packed (bool): Send 2 bits per base, or one ASCII byte per base when False.
+
+        Returns:
+            bytes: The header followed by the bases.
+        """
+        if packed:
+            return WIRE_HEADER.pack(WIRE_PACKED, self.n, self.n) + self.packed
+        return WIRE_HEADER.pack(WIRE_BYTE_PER_BASE, self.n, self.n) + self.data
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DnaMatrix is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("DnaMatrix is immutable")
+
+    def __reduce__(self):
+        # Rebuilt from its fields, so it can be sent to worker processes without validating it again
+        return (DnaMatrix, (self.data, self.n, self.packed, self.digest))
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, row):
+        if not 0 <= row < self.n:
+            raise IndexError("DNA matrix row out of range")
+        return self.data[row * self.n:(row + 1) * self.n].decode("ascii")
+
+    def __iter__(self):
+        return iter(self.rows())
+
+    def __eq__(self, other):
+        if isinstance(other, DnaMatrix):
+            return self.n == other.n and self.data == other.data
+        if isinstance(other, list):
+            return self.rows() == other
+        return NotImplemented
+
+    def __hash__(self):
+        if self.digest is None:
+            raise TypeError("A DnaMatrix built for detection only is not hashable")
+        return hash(self.digest)
+
+    def __repr__(self):
+        if self.digest is None:
+            return f"DnaMatrix(n={self.n}, for_detection)"
+        return f"DnaMatrix(n={self.n}, digest={self.digest.hex()[:16]})"
+
+    @property
+    def text(self):
+        """
+        str: The rows concatenated in order.
+        """
+        return self.data.decode("ascii")
+
+    def rows(self):
+        """
+        Splits the matrix into its rows.
+
+        Returns:
+            list of str: The n rows of the matrix.
+        """
+        text = self.text
+        return [text[start:start + self.n] for start in range(0, len(text), self.n)]
+
+def encode_dna(dna_sequence):
+    """
+    Encodes a DNA matrix into its storage form.
+
+    Square or rectangular matrices made only of A/C/G/T are packed at 2 bits per base and their
+    digest covers the dimensions and packed bytes. Any other matrix is kept as text and its digest
+    matches PostgreSQL's sha256(convert_to(dna_sequence, 'UTF8')).
+
+    Args:
+        dna_sequence (list of str, DnaMatrix or EncodedDna): The DNA matrix rows. A single string is one row.
+
+    Raises:
+        ValueError: Raised if the DnaMatrix was built with DnaMatrix.for_detection.
+
+    Returns:
+        EncodedDna: The storage form of the matrix.
+    """
+    if isinstance(dna_sequence, EncodedDna):
+        return dna_sequence
+    if isinstance(dna_sequence, DnaMatrix):
+        if dna_sequence.packed is None:
+            raise ValueError("A DnaMatrix built for detection only cannot be encoded")
+        # Already validated and packed when it was parsed
+        return EncodedDna(None, dna_sequence.packed, dna_sequence.n, dna_sequence.n, dna_sequence.digest)
+    rows = [dna_sequence] if isinstance(dna_sequence, str) else list(dna_sequence)
+    text = "".join(rows)
+    cols = len(rows[0]) if rows else 0
+    packed = pack_bases(text) if len(text) == len(rows) * cols else None
+    if packed is None:
+        return EncodedDna(text, None, len(rows), cols, hashlib.sha256(text.encode("utf-8")).digest())
+    return EncodedDna(None, packed, len(rows), cols, packed_digest(packed, len(rows), cols))
+
+def packed_digest(packed, rows, cols):
+    """
+    Computes the digest of a packed matrix, covering its dimensions and packed bytes.
+
+    Args:
+        packed (bytes): The packed bases.
+        rows (int): Number of rows of the matrix.
+        cols (int): Number of columns of the matrix.
+
+    Returns:
+        bytes: The 32-byte SHA-256 digest.
+    """
+    return hashlib.sha256(struct.pack(">II", rows, cols) + packed).digest()
+
+def decode_dna(encoded):
+    """
+    Decodes a stored DNA matrix back into its rows.
+
+    Args:
+        encoded (EncodedDna): The storage form of the matrix.
+
+    Returns:
+        list of str: The DNA matrix rows. A text matrix that cannot be split evenly is returned as one row.
+    """
+    text = encoded.text if encoded.packed is None else unpack_bases(encoded.packed, encoded.rows * encoded.cols)
+    if encoded.rows <= 0 or len(text) != encoded.rows * encoded.cols:
+        return [text]
+    return [text[row * encoded.cols:(row + 1) * encoded.cols] for row in range(encoded.rows)]
+
+def sequence_digest(dna_sequence):
+    """
+    Computes the fixed-width digest used to index and deduplicate DNA records.
+
+    Args:
+        dna_sequence (list of str, DnaMatrix or EncodedDna): The DNA matrix rows. A single string is one row.
+
+    Returns:
+        bytes: The 32-byte SHA-256 digest of the encoded matrix.
+    """
+    return encode_dna(dna_sequence).digest
+
+def encode_verdict(is_mutant, exists, record_id):
+    """
+    Encodes the result of POST /api/mutant for clients that accept application/octet-stream.
+
+    Args:
+        is_mutant (bool): Mutant status of the DNA.
+        exists (bool): Whether the DNA sequence was already recorded.
+        record_id (str): The unique ID of the record.
+
+    Returns:
+        bytes: One byte for is_mutant, one for exists, then the record_id in UTF-8.
+    """
+    return bytes((bool(is_mutant), bool(exists))) + record_id.encode("utf-8")
+
+def decode_verdict(body):
+    """
+    Decodes a result encoded by encode_verdict.
+
+    Args:
+        body (bytes): The response body.
+
+    Returns:
+        dict: {"is_mutant": bool, "exists": bool, "record_id": str}.
+    """
+    return {"is_mutant": bool(body[0]), "exists": bool(body[1]), "record_id": bytes(body[2:]).decode("utf-8")}
@@ -0,0 +1,306 @@
+"""
+In-process load test of the API.
+
+Drives main.app over ASGI with httpx, inside the app lifespan so the detection and database worker
+pools run as in production, while the database is replaced by an in-memory store that waits a
+configurable latency on every call. Every combination of concurrency level and matrix size mix is
+run in turn and reported in requests per second and p50/p95/p99 latency.
+
+Usage:
+    python -m utils.load_test [--concurrency 1 8 32 128] [--mix small=6 --mix mixed=6:0.9,200:0.1]
+                              [--requests 2000] [--stats-ratio 0.1] [--db-latency-ms 2] [--json results.json]
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import threading
+import time
+from contextlib import ExitStack
+from datetime import datetime
+from unittest.mock import patch
+import httpx
+from utils.dna_codec import encode_dna
+
+DEFAULT_CONCURRENCY = [1, 8, 32, 128]
+
+# Matrix sizes and their share of the POST /api/mutant requests
+DEFAULT_MIXES = {
+    "small": {6: 1.0},
+    "mixed": {6: 0.8, 100: 0.15, 1000: 0.05},
+    "large": {1000: 1.0},
+}
+
+class InMemoryDnaStore:
+    """
+    Stand-in for the dna_records and dna_daily_stats tables, with the contract of repositories.dna_repository.
+    Every call sleeps the configured latency, on the calling thread as a database round trip would.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self._records = {}
+        self._daily = {}
+        self._lock = threading.Lock()
+
+    def save_dna(self, record_id, dna_sequence, is_mutant):
+        """
+        Saves one DNA sequence, see repositories.dna_repository.save_dna.
+        """
+        return self.save_dna_batch([(record_id, dna_sequence, is_mutant)])[0]
+
+    def save_dna_batch(self, records):
+        """
+        Saves several DNA sequences, see repositories.dna_repository.save_dna_batch.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        today = datetime.now().date()
+        results = []
+        with self._lock:
+            for record_id, dna_sequence, is_mutant in records:
+                digest = encode_dna(dna_sequence).digest
+                stored = self._records.get(digest)
+                if stored:
+                    results.append({"exists": True, "is_mutant": stored[1], "record_id": stored[0]})
+                    continue
+                self._records[digest] = (record_id, is_mutant)
+                mutants, humans = self._daily.get(today, (0, 0))
+                self._daily[today] = (mutants + is_mutant, humans + (not is_mutant))
+                results.append({"exists": False, "is_mutant": is_mutant, "record_id": record_id})
+        return results
+
+    def get_daily_counts(self):
+        """
+        Retrieves the daily counts, see repositories.dna_repository.get_daily_counts.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            return [(day, mutants, humans) for day, (mutants, humans) in self._daily.items()]
+
+def parse_mix(spec):
+    """
+    Parses a matrix size mix like "6:0.9,200:0.1", where a size without a weight weighs 1.
+
+    Args:
+        spec (str): Comma separated sizes, each optionally followed by a colon and its weight.
+
+    Raises:
+        ValueError: Raised if a size is smaller than 4 or a weight is not positive.
+
+    Returns:
+        dict: Matrix size to weight.
+    """
+    mix = {}
+    for part in spec.split(","):
+        size, _, weight = part.partition(":")
+        size, weight = int(size), float(weight or 1)
+        if size < 4 or weight <= 0:
+            raise ValueError(f"Invalid mix entry '{part}', sizes must be at least 4 and weights positive")
+        mix[size] = weight
+    return mix
+
+def build_bodies(mix, count, rng):
+    """
+    Builds the JSON bodies of POST /api/mutant requests, drawing matrix sizes from a mix.
+    Every body is a different random matrix, so no request is answered from the verdict cache.
+
+    Args:
+        mix (dict): Matrix size to weight.
+        count (int): Number of bodies.
+        rng (random.Random): Random number generator.
+
+    Returns:
+        list: (size, body) tuples, with the body encoded as bytes.
+    """
+    sizes = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    return [
+        (size, json.dumps({"dna": ["".join(rng.choices("ATCG", k=size)) for _ in range(size)]}).encode())
+        for size in sizes
+    ]
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of sorted values.
+
+    Args:
+        sorted_values (list): Values in ascending order.
+        fraction (float): Percentile as a fraction, 0.95 for p95.
+
+    Returns:
+        float: The percentile, or 0.0 if there are no values.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), math.ceil(fraction * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+async def run_load(client, bodies, concurrency, stats_ratio=0.0, rng=None):
+    """
+    Sends the requests with a fixed number of concurrent clients and measures them.
+
+    Args:
+        client (httpx.AsyncClient): Client bound to the app.
+        bodies (list): (size, body) tuples returned by build_bodies, one POST /api/mutant each.
+        concurrency (int): Number of requests in flight at any time.
+        stats_ratio (float): Fraction of the requests sent as GET /api/stats instead.
+        rng (random.Random, optional): Random number generator choosing the stats requests.
+
+    Returns:
+        dict: Number of requests and errors, the first few errors, elapsed seconds, requests per second
+              and p50/p95/p99 latency in milliseconds, overall and per endpoint.
+    """
+    rng = rng or random.Random()
+    requests = [("stats", None) if rng.random() < stats_ratio else ("mutant", body) for _, body in bodies]
+    latencies = {"mutant": [], "stats": []}
+    errors = []
+    pending = iter(requests)
+
+    async def worker():
+        for endpoint, body in pending:
+            start = time.perf_counter()
+            error = None
+            try:
+                if endpoint == "mutant":
+                    response = await client.post("/api/mutant", content=body, headers={"Content-Type": "application/json"})
+                    if response.status_code not in (200, 403):
+                        error = f"{response.status_code} {response.text[:200]}"
+                else:
+                    response = await client.get("/api/stats")
+                    if response.status_code != 200:
+                        error = f"{response.status_code} {response.text[:200]}"
+            except Exception as exception:
+                error = repr(exception)
+            latencies[endpoint].append(time.perf_counter() - start)
+            if error:
+                errors.append(f"{endpoint}: {error}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    def summary(values):
+        values = sorted(values)
+        return {
+            "requests": len(values),
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+        }
+
+    result = summary(latencies["mutant"] + latencies["stats"])
+    result.update({
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "seconds": elapsed,
+        "requests_per_second": len(requests) / elapsed if elapsed else 0.0,
+        "endpoints": {endpoint: summary(values) for endpoint, values in latencies.items() if values},
+    })
+    return result
+
+def _patch_database(stack, store):
+    """
+    Replaces every database access of the app with the in-memory store, before main is imported.
+    """
+    for target in ("main.DB_DRIVER", "api.mutant.DB_DRIVER", "api.stats.DB_DRIVER"):
+        stack.enter_context(patch(target, "psycopg2"))
+    stack.enter_context(patch("api.mutant.save_dna", store.save_dna))
+    stack.enter_context(patch("api.mutant.save_dna_batch", store.save_dna_batch))
+    stack.enter_context(patch("services.stats_service.get_daily_counts", store.get_daily_counts))
+
+async def run_sweep(concurrency_levels, mixes, requests=2000, stats_ratio=0.1, db_latency=0.002, seed=42, report=None):
+    """
+    Runs the load test for every combination of concurrency level and matrix size mix.
+
+    Every run starts from an empty store and empty caches, and its bodies are generated before it starts.
+
+    Args:
+        concurrency_levels (list of int): Numbers of concurrent clients.
+        mixes (dict): Mix name to matrix size mix, as returned by parse_mix.
+        requests (int): Requests per run.
+        stats_ratio (float): Fraction of the requests sent as GET /api/stats.
+        db_latency (float): Seconds every call to the in-memory store waits.
+        seed (int): Seed of the generated matrices.
+        report (callable, optional): Called with each run result as soon as it is done.
+
+    Returns:
+        list: One dictionary per run with its concurrency, mix and run_load measures.
+    """
+    results = []
+    with ExitStack() as stack:
+        import main
+        # The lifespan checks the database schema before serving
+        stack.enter_context(patch("main.ensure_schema"))
+        from services.verdict_cache import verdict_cache
+        from services.stats_service import stats_cache
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with main.app.router.lifespan_context(main.app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+                for mix_name, mix in mixes.items():
+                    for concurrency in concurrency_levels:
+                        rng = random.Random(seed)
+                        bodies = build_bodies(mix, requests, rng)
+                        store = InMemoryDnaStore(db_latency)
+                        verdict_cache.clear()
+                        stats_cache.clear()
+                        with ExitStack() as run_stack:
+                            _patch_database(run_stack, store)
+                            result = await run_load(client, bodies, concurrency, stats_ratio, rng)
+                        result = {"mix": mix_name, "concurrency": concurrency, **result}
+                        results.append(result)
+                        if report:
+                            report(result)
+    return results
+
+def _print_result(result):
+    """
+    Prints one run result as a table row.
+    """
+    print(
+        f"{result['mix']:<10} {result['concurrency']:>6} {result['requests']:>8} {result['errors']:>6} "
+        f"{result['requests_per_second']:>10.1f} {result['p50_ms']:>10.2f} {result['p95_ms']:>10.2f} {result['p99_ms']:>10.2f}",
+        flush=True
+    )
+    for error in result["error_samples"]:
+        print(f"    {error}", file=sys.stderr)
+
+def main(argv=None):
+    """
+    Command line entry point, see the module docstring for usage.
+
+    Returns:
+        int: Exit status, 1 if any request failed, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(prog="python -m utils.load_test", description="Load test the API in-process.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=DEFAULT_CONCURRENCY, help="concurrent clients of each run")
+    parser.add_argument("--mix", action="append", metavar="NAME=SIZE[:WEIGHT],...",
+                        help="matrix size mix, may be repeated (default: small, mixed and large)")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per run")
+    parser.add_argument("--stats-ratio", type=float, default=0.1, help="fraction of the requests sent to GET /api/stats")
+    parser.add_argument("--db-latency-ms", type=float, default=2.0, help="latency of every database call")
+    parser.add_argument("--seed", type=int, default=42, help="seed of the generated matrices")
+    parser.add_argument("--json", metavar="PATH", help="also save the results as JSON")
+    args = parser.parse_args(argv)
+
+    mixes = DEFAULT_MIXES
+    if args.mix:
+        mixes = {}
+        for spec in args.mix:
+            name, _, sizes = spec.rpartition("=")
+            mixes[name or sizes] = parse_mix(sizes)
+
+    print(f"{'mix':<10} {'conc':>6} {'requests':>8} {'errors':>6} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    results = asyncio.run(run_sweep(
+        args.concurrency, mixes, args.requests, args.stats_ratio, args.db_latency_ms / 1000, args.seed, _print_result
+    ))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    return 1 if any(result["errors"] for result in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""
+Prometheus metrics of the API, exposed by GET /metrics.
+
+Every metric lives in the default registry of this worker process. Timers only read the clock and
+update a histogram bucket, a few microseconds per observation, so they are always on.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from prometheus_client import Counter, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Latency buckets from 10 microseconds, for in-memory stages, to 10 seconds, for the largest matrices
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+STAGE_SECONDS = Histogram(
+    "mutant_stage_seconds",
+    "Time spent in each stage of a request: parse, join, encode, detect, db_save, db_query, stats and db_read.",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+
+VERDICTS = Counter(
+    "mutant_verdicts_total",
+    "DNA sequences answered, by verdict (mutant or human) and whether they were new or already recorded.",
+    ["verdict", "result"]
+)
+
+MATRIX_ROWS = Histogram(
+    "mutant_matrix_rows",
+    "Number of rows of the DNA matrices submitted.",
+    buckets=(4, 6, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+)
+
+DB_CONNECTION_WAIT = Histogram(
+    "db_connection_wait_seconds",
+    "Time spent waiting for a pooled database connection, including health checks.",
+    buckets=LATENCY_BUCKETS
+)
+
+# Stages of the current request as (stage, start, seconds) tuples, only while it is being profiled
+_timeline = ContextVar("stage_timeline", default=None)
+
+def start_timeline():
+    """
+    Starts recording the stages of the current context, and of the threads it runs work in.
+
+    Returns:
+        tuple: (timeline, token) where timeline is the list the stages are appended to,
+               as (stage, perf_counter start, seconds) tuples, and token is given to stop_timeline.
+    """
+    timeline = []
+    return timeline, _timeline.set(timeline)
+
+def stop_timeline(token):
+    """
+    Stops recording the stages started with start_timeline.
+
+    Args:
+        token (Token): The token returned by start_timeline.
+    """
+    _timeline.reset(token)
+
+class StageTimer:
+    """
+    Context manager that observes the time spent in its block in a stage histogram,
+    and adds it to the timeline of the current request when one is being recorded.
+    """
+    __slots__ = ("_stage", "_histogram", "_start")
+
+    def __init__(self, stage, histogram):
+        self._stage = stage
+        self._histogram = histogram
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        seconds = time.perf_counter() - self._start
+        self._histogram.observe(seconds)
+        timeline = _timeline.get()
+        if timeline is not None:
+            timeline.append((self._stage, self._start, seconds))
+        return False
+
+_stage_histograms = {}
+
+def _stage_histogram(stage):
+    """
+    Returns the histogram of a stage, resolving its label only once.
+    """
+    histogram = _stage_histograms.get(stage)
+    if histogram is None:
+        histogram = _stage_histograms[stage] = STAGE_SECONDS.labels(stage)
+    return histogram
+
+def time_stage(stage):
+    """
+    Times a block of code as a stage of a DNA request.
+
+    Args:
+        stage (str): Name of the stage, the value of the "stage" label.
+
+    Returns:
+        StageTimer: Context manager observing the duration of its block.
+    """
+    return StageTimer(stage, _stage_histogram(stage))
+
+def observe_stage(stage, seconds):
+    """
+    Records the duration of a stage measured by the caller.
+
+    Args:
+        stage (str): Name of the stage, the value of the "stage" label.
+        seconds (float): Duration of the stage.
+    """
+    _stage_histogram(stage).observe(seconds)
+    timeline = _timeline.get()
+    if timeline is not None:
+        timeline.append((stage, time.perf_counter() - seconds, seconds))
+
+# Children of VERDICTS by (is_mutant, exists), resolved once
+_verdict_counters = {
+    (is_mutant, exists): VERDICTS.labels("mutant" if is_mutant else "human", "existing" if exists else "new")
+    for is_mutant in (True, False) for exists in (True, False)
+}
+
+def record_verdict(is_mutant, exists, rows):
+    """
+    Counts an answered DNA sequence and records its size.
+
+    Args:
+        is_mutant (bool): The verdict returned for the sequence.
+        exists (bool): Whether the sequence was already recorded.
+        rows (int): Number of rows of the matrix.
+    """
+    _verdict_counters[bool(is_mutant), bool(exists)].inc()
+    MATRIX_ROWS.observe(rows)
+
+class CacheCollector:
+    """
+    Collects the hits, misses, hit ratio and size of the registered caches at scrape time,
+    so the caches keep their own counters and pay nothing per lookup for the metrics.
+    """
+
+    def __init__(self):
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, stats):
+        """
+        Adds a cache, replacing any cache registered under the same name.
+
+        Args:
+            name (str): Name of the cache, the value of the "cache" label.
+            stats (callable): Returns a dictionary with hits, misses, hit_ratio and size.
+        """
+        with self._lock:
+            self._caches[name] = stats
+
+    def collect(self):
+        hits = CounterMetricFamily("cache_hits", "Lookups answered from the cache.", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Lookups not answered from the cache.", labels=["cache"])
+        ratio = GaugeMetricFamily("cache_hit_ratio", "Fraction of the lookups answered from the cache.", labels=["cache"])
+        size = GaugeMetricFamily("cache_entries", "Entries currently held by the cache.", labels=["cache"])
+        with self._lock:
+            caches = list(self._caches.items())
+        for name, stats in caches:
+            values = stats()
+            hits.add_metric([name], values["hits"])
+            misses.add_metric([name], values["misses"])
+            ratio.add_metric([name], values["hit_ratio"])
+            size.add_metric([name], values["size"])
+        return [hits, misses, ratio, size]
+
+cache_collector = CacheCollector()
+REGISTRY.register(cache_collector)
+
+def register_cache(name, stats):
+    """
+    Exposes the counters of a cache in the metrics.
+
+    Args:
+        name (str): Name of the cache, the value of the "cache" label.
+        stats (callable): Returns a dictionary with hits, misses, hit_ratio and size.
+    """
+    cache_collector.register(name, stats)
+
+class BloomFilterCollector:
+    """
+    Collects the memory footprint and the false-positive rates of the registered Bloom filters at scrape time.
+    """
+
+    def __init__(self):
+        self._filters = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, stats):
+        """
+        Adds a filter, replacing any filter registered under the same name.
+
+        Args:
+            name (str): Name of the filter, the value of the "filter" label.
+            stats (callable): Returns a dictionary with bytes, entries, skipped, false_positive_ratio
+                              and expected_false_positive_ratio.
+        """
+        with self._lock:
+            self._filters[name] = stats
+
+    def collect(self):
+        size = GaugeMetricFamily("bloom_filter_bytes", "Memory held by the bit array of the filter.", labels=["filter"])
+        entries = GaugeMetricFamily("bloom_filter_entries", "Entries added to the filter.", labels=["filter"])
+        skipped = CounterMetricFamily(
+            "bloom_filter_skipped_lookups", "Lookups skipped because the filter answered definitely absent.", labels=["filter"]
+        )
+        measured = GaugeMetricFamily(
+            "bloom_filter_false_positive_ratio", "Fraction of the absent entries the filter reported as possibly present.",
+            labels=["filter"]
+        )
+        expected = GaugeMetricFamily(
+            "bloom_filter_expected_false_positive_ratio", "False-positive probability implied by the bits currently set.",
+            labels=["filter"]
+        )
+        with self._lock:
+            filters = list(self._filters.items())
+        for name, stats in filters:
+            values = stats()
+            size.add_metric([name], values["bytes"])
+            entries.add_metric([name], values["entries"])
+            skipped.add_metric([name], values["skipped"])
+            measured.add_metric([name], values["false_positive_ratio"])
+            expected.add_metric([name], values["expected_false_positive_ratio"])
+        return [size, entries, skipped, measured, expected]
+
+bloom_filter_collector = BloomFilterCollector()
+REGISTRY.register(bloom_filter_collector)
+
+def register_bloom_filter(name, stats):
+    """
+    Exposes the size and accuracy of a Bloom filter in the metrics.
+
+    Args:
+        name (str): Name of the filter, the value of the "filter" label.
+        stats (callable): Returns a dictionary with bytes, entries, skipped, false_positive_ratio
+                          and expected_false_positive_ratio.
+    """
+    bloom_filter_collector.register(name, stats)
@@ -0,0 +1,199 @@
+"""
+Cold start measurements of the API.
+
+Reports how long a fresh interpreter takes to import main, with the modules main imports that take
+the longest, and how long a freshly spawned uvicorn server takes to answer its first request. Every
+run starts a new process, so nothing is reused from a previous import.
+
+Usage:
+    python -m utils.startup_timing [--runs 5] [--top 10] [--path /metrics] [--no-db] [--timeout 30] [--json startup.json]
+
+With --no-db the schema check of the lifespan is skipped, so the server can be timed without a database.
+"""
+import argparse
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+IMPORT_SNIPPET = "import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+
+def measure_import(module="main", runs=5):
+    """
+    Times the import of a module in fresh interpreters.
+
+    Args:
+        module (str): Module to import.
+        runs (int): Number of interpreters started.
+
+    Returns:
+        list of float: Seconds spent importing the module in each interpreter.
+    """
+    timings = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET.format(module=module)], capture_output=True, text=True, check=True
+        )
+        timings.append(float(completed.stdout.strip().splitlines()[-1]))
+    return timings
+
+def slowest_imports(module="main", top=10):
+    """
+    Lists the modules imported directly by a module, by the time their own imports took.
+
+    Args:
+        module (str): Module to import.
+        top (int): Number of modules returned.
+
+    Returns:
+        list: (name, seconds) tuples of the slowest direct imports, slowest first.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True
+    )
+    # Every line is "import time: self | cumulative | name", with the name indented two spaces per
+    # nesting level, and a module is listed after everything it imports
+    children = []
+    for line in completed.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        if level == 0:
+            if name.strip() == module:
+                return sorted(children, key=lambda child: child[1], reverse=True)[:top]
+            children = []
+        elif level == 1:
+            children.append((name.strip(), int(fields[1]) / 1_000_000))
+    return []
+
+def _free_port():
+    """
+    Returns a local TCP port that is currently free.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def measure_first_response(runs=3, path="/metrics", no_db=False, timeout=30.0):
+    """
+    Times how long a freshly spawned server takes to answer its first request.
+
+    Any HTTP response counts, including errors, since the server is up once it answers.
+
+    Args:
+        runs (int): Number of servers started.
+        path (str): Path requested until the server answers.
+        no_db (bool): Skip the schema check of the lifespan, for machines without a database.
+        timeout (float): Seconds to wait for each server.
+
+    Raises:
+        RuntimeError: Raised if a server exits before answering.
+        TimeoutError: Raised if a server does not answer within timeout seconds.
+
+    Returns:
+        list of float: Seconds from spawning each server to its first response.
+    """
+    timings = []
+    for _ in range(runs):
+        port = _free_port()
+        if no_db:
+            command = [sys.executable, "-m", "utils.startup_timing", "--serve", str(port)]
+        else:
+            command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+                       "--port", str(port), "--log-level", "warning"]
+        started = time.perf_counter()
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while True:
+                try:
+                    urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1).close()
+                    break
+                except urllib.error.HTTPError:
+                    break
+                except (urllib.error.URLError, ConnectionError):
+                    pass
+                if process.poll() is not None:
+                    raise RuntimeError(f"The server exited with code {process.returncode} before answering")
+                if time.perf_counter() - started > timeout:
+                    raise TimeoutError(f"The server did not answer within {timeout} seconds")
+                time.sleep(0.01)
+            timings.append(time.perf_counter() - started)
+        finally:
+            process.terminate()
+            process.wait()
+    return timings
+
+def serve(port):
+    """
+    Runs the API with the schema check skipped, for measure_first_response with no_db.
+
+    Args:
+        port (int): Local port to listen on.
+    """
+    from unittest.mock import patch
+    import uvicorn
+
+    with patch("db.database.ensure_schema"):
+        import main
+        uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning")
+
+def summarize(timings):
+    """
+    Returns the median, minimum and maximum of a list of timings, in milliseconds.
+    """
+    return {
+        "median_ms": statistics.median(timings) * 1000,
+        "min_ms": min(timings) * 1000,
+        "max_ms": max(timings) * 1000,
+    }
+
+def main(argv=None):
+    """
+    Command line entry point, see the module docstring for usage.
+
+    Returns:
+        int: Process exit status.
+    """
+    parser = argparse.ArgumentParser(prog="python -m utils.startup_timing", description="Measure the cold start of the API.")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes started for each measure")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports of main listed")
+    parser.add_argument("--path", default="/metrics", help="path requested until the server answers")
+    parser.add_argument("--no-db", action="store_true", help="skip the schema check, no database needed")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for each server")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to this file")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.serve)
+        return 0
+
+    result = {
+        "import": summarize(measure_import("main", args.runs)),
+        "slowest_imports": [
+            {"module": name, "ms": seconds * 1000} for name, seconds in slowest_imports("main", args.top)
+        ],
+        "first_response": summarize(measure_first_response(args.runs, args.path, args.no_db, args.timeout)),
+    }
+
+    print(f"import main          median {result['import']['median_ms']:8.1f} ms  "
+          f"(min {result['import']['min_ms']:.1f}, max {result['import']['max_ms']:.1f})")
+    print(f"first response       median {result['first_response']['median_ms']:8.1f} ms  "
+          f"(min {result['first_response']['min_ms']:.1f}, max {result['first_response']['max_ms']:.1f})")
+    print("slowest imports of main:")
+    for entry in result["slowest_imports"]:
+        print(f"  {entry['module']:<40} {entry['ms']:8.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(result, output, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())